@@ -0,0 +1,115 @@
+import asyncio
+
+# ─── Analytics Aggregations ───
+# Each section is a single server-side pipeline that returns only counts. The
+# field defaults mirror the dict.get() defaults the dashboard has always used
+# (a missing status counts as "new", a missing platform as "unknown", etc.).
+
+
+def _default(field: str, fallback: str) -> dict:
+    # dict.get(field, fallback): only a *missing* key falls back, explicit nulls don't
+    return {"$cond": [{"$eq": [{"$type": f"${field}"}, "missing"]}, fallback, f"${field}"]}
+
+
+def _item_count(field: str) -> dict:
+    # len(doc.get(field, [])) for whatever json.loads produced: list, object or string
+    return {"$switch": {
+        "branches": [
+            {"case": {"$isArray": f"${field}"}, "then": {"$size": f"${field}"}},
+            {"case": {"$eq": [{"$type": f"${field}"}, "object"]}, "then": {"$size": {"$objectToArray": f"${field}"}}},
+            {"case": {"$eq": [{"$type": f"${field}"}, "string"]}, "then": {"$strLenCP": f"${field}"}},
+        ],
+        "default": 0,
+    }}
+
+
+def _counts(rows) -> dict:
+    return {r["_id"]: r["count"] for r in rows}
+
+
+async def lead_stats(db) -> dict:
+    pipeline = [
+        {"$project": {"_id": 0, "status": 1, "created_at": 1}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": _default("status", "new"), "count": {"$sum": 1}}}],
+            "by_date": [
+                {"$match": {"created_at": {"$type": "string", "$ne": ""}}},
+                {"$group": {"_id": {"$substrCP": ["$created_at", 0, 10]}, "count": {"$sum": 1}}},
+                {"$sort": {"_id": -1}},
+                {"$limit": 30},
+            ],
+        }},
+    ]
+    result = (await db.leads.aggregate(pipeline).to_list(1))[0]
+    total = result["total"][0]["count"] if result["total"] else 0
+    status_counts = _counts(result["by_status"])
+    return {
+        "total": total,
+        "by_status": status_counts,
+        "by_date": dict(sorted(_counts(result["by_date"]).items())),
+        "conversion_rate": round((status_counts.get("qualified", 0) / max(total, 1)) * 100, 1)
+    }
+
+
+async def content_stats(db, contractor_id: str) -> dict:
+    pipeline = [
+        {"$match": {"contractor_id": contractor_id}},
+        {"$group": {
+            "_id": _default("platform", "unknown"),
+            "batches": {"$sum": 1},
+            "posts": {"$sum": _item_count("items")},
+        }},
+    ]
+    rows = await db.generated_content.aggregate(pipeline).to_list(None)
+    return {
+        "total_batches": sum(r["batches"] for r in rows),
+        "total_posts": sum(r["posts"] for r in rows),
+        "by_platform": {r["_id"]: r["posts"] for r in rows}
+    }
+
+
+async def campaign_stats(db, contractor_id: str) -> dict:
+    pipeline = [
+        {"$match": {"contractor_id": contractor_id}},
+        {"$group": {"_id": _default("status", "draft"), "count": {"$sum": 1}}},
+    ]
+    by_status = _counts(await db.campaigns.aggregate(pipeline).to_list(None))
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status
+    }
+
+
+async def schedule_stats(db, contractor_id: str) -> dict:
+    pipeline = [
+        {"$match": {"contractor_id": contractor_id}},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": _default("status", "scheduled"), "count": {"$sum": 1}}}],
+            "by_platform": [{"$group": {"_id": _default("platform", "unknown"), "count": {"$sum": 1}}}],
+        }},
+    ]
+    result = (await db.scheduled_posts.aggregate(pipeline).to_list(1))[0]
+    by_status = _counts(result["by_status"])
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_platform": _counts(result["by_platform"])
+    }
+
+
+async def compute_analytics(db, contractor_id: str) -> dict:
+    leads, content, campaigns, schedule, unread = await asyncio.gather(
+        lead_stats(db),
+        content_stats(db, contractor_id),
+        campaign_stats(db, contractor_id),
+        schedule_stats(db, contractor_id),
+        db.notifications.count_documents({"contractor_id": contractor_id, "read": False}),
+    )
+    return {
+        "leads": leads,
+        "content": content,
+        "campaigns": campaigns,
+        "schedule": schedule,
+        "notifications_unread": unread
+    }
@@ -0,0 +1,100 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# ─── First-turn Answer Cache ───
+# Most advisor chats open with the same handful of questions ("what is ICF",
+# "how much more does ICF cost"). The first answer for a normalized question
+# is cached and replayed for later sessions that open with it. Only first
+# turns are cached: later answers depend on the conversation so far.
+
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "500"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_QUESTION_CHARS = int(os.environ.get("ANSWER_CACHE_MAX_QUESTION_CHARS", "200"))
+
+# "what" is noise in these questions; how/why/when/where/who change the intent, so they stay
+STOPWORDS = frozenset("""
+a about am an and any are as at be been being but by can could do does doing for from had has have
+i if im in into is it its just me much my of on or our please so some tell than that the their
+them then there these they this to us was we were what whats will with would you your
+""".split())
+
+_APOSTROPHES = re.compile(r"['’]")
+_NON_WORD = re.compile(r"[^\w\s]|_")
+
+
+def normalize_question(text: str) -> str:
+    """Case-fold, strip punctuation and stopwords; "" means don't cache."""
+    if not text or len(text) > ANSWER_CACHE_MAX_QUESTION_CHARS:
+        return ""
+    words = _NON_WORD.sub(" ", _APOSTROPHES.sub("", text.casefold())).split()
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+class AnswerCache:
+    def __init__(self, max_size: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> {"answer", "question", "expires_at", "cached_at", "hits"}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None or entry["expires_at"] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        entry["hits"] += 1
+        self.hits += 1
+        return entry["answer"]
+
+    def put(self, key: str, question: str, answer: str):
+        self._entries[key] = {
+            "answer": answer,
+            "question": question,
+            "expires_at": time.monotonic() + self.ttl,
+            "cached_at": datetime.now(timezone.utc).isoformat(),
+            "hits": 0,
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def purge(self, key: str = None) -> int:
+        if key is None:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+        return 1 if self._entries.pop(key, None) is not None else 0
+
+    def entries(self, limit: int = 100) -> list:
+        now = time.monotonic()
+        # Most recently used first
+        return [
+            {"key": key, "question": e["question"], "answer": e["answer"], "hits": e["hits"],
+             "cached_at": e["cached_at"], "expires_in": round(e["expires_at"] - now, 1)}
+            for key, e in list(reversed(self._entries.items()))[:limit]
+            if e["expires_at"] > now
+        ]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+answer_cache = AnswerCache()
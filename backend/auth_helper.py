@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import bcrypt
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# ─── Password Hashing Pool ───
+# bcrypt is deliberately slow (~250ms at cost 12), so it must never run on the
+# event loop. Hashing happens on a dedicated pool; a semaphore bounds how many
+# requests may be queued for it so a login burst gets a fast 503 instead of
+# piling up behind the pool.
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+PASSWORD_HASH_EXECUTOR = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+
+_executor = None
+_slots = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _get_slots():
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(PASSWORD_HASH_MAX_PENDING)
+    return _slots
+
+
+def _hash(password: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+async def _run(fn, *args):
+    slots = _get_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Password hash pool saturated, rejecting request")
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        slots.release()
+
+
+async def hash_password(password: str, rounds: int = None) -> str:
+    return await _run(_hash, password.encode(), rounds or BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await _run(_check, password.encode(), hashed.encode())
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+
+def get_hash_rounds(hashed: str) -> int:
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed: str) -> bool:
+    return get_hash_rounds(hashed) != BCRYPT_ROUNDS
+
+
+def shutdown_hash_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+# ─── Verified Token Cache ───
+# Dashboard polling replays the same bearer tokens constantly; caching the
+# decoded payload skips the signature and revocation checks on repeat
+# requests. Entries are keyed on a SHA-256 of the token so raw tokens are
+# never held in memory. The TTL also bounds how long another worker keeps
+# accepting a token after it was revoked.
+
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", "60"))
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (payload, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str):
+        key = _token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        key = _token_key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, token: str):
+        self._entries.pop(_token_key(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+# ─── Token Revocation ───
+# Logout records the token's hash in revoked_tokens, which every worker
+# checks before trusting a token it hasn't cached, so revocation survives
+# restarts and applies across workers. A TTL index on expires_at drops each
+# entry once the token would have expired anyway; tokens issued without an
+# exp have no expires_at and their entries are kept.
+
+async def revoke_token(db, token: str, exp: float = None):
+    token_cache.discard(token)
+    update = {"revoked_at": datetime.now(timezone.utc)}
+    if isinstance(exp, (int, float)):
+        update["expires_at"] = datetime.fromtimestamp(exp, timezone.utc)
+    await db.revoked_tokens.update_one({"_id": _token_key(token)}, {"$set": update}, upsert=True)
+
+
+async def is_revoked(db, token: str) -> bool:
+    return await db.revoked_tokens.find_one({"_id": _token_key(token)}, {"_id": 1}) is not None
@@ -0,0 +1,172 @@
+"""
+/analytics latency: legacy Python loops vs. server-side aggregation.
+
+Seeds a scratch database on a local mongod with N leads plus a contractor's
+content, campaigns and schedule, checks that both implementations agree on a
+dataset small enough for the legacy caps, then times each at every size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analytics --mongo mongodb://localhost:27017 --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from analytics_helper import compute_analytics
+
+CONTRACTOR_ID = "bench-contractor"
+STATUSES = ["new", "contacted", "qualified", "pending_match", "connected", "closed"]
+PLATFORMS = ["facebook", "instagram", "linkedin", "x", "tiktok"]
+
+
+async def legacy_analytics(db, contractor_id):
+    # Verbatim copy of the pre-aggregation endpoint body
+    leads = await db.leads.find({}, {"_id": 0}).to_list(1000)
+    status_counts = {}
+    leads_by_date = {}
+    for lead in leads:
+        s = lead.get("status", "new")
+        status_counts[s] = status_counts.get(s, 0) + 1
+        date_key = lead.get("created_at", "")[:10]
+        if date_key:
+            leads_by_date[date_key] = leads_by_date.get(date_key, 0) + 1
+
+    content = await db.generated_content.find(
+        {"contractor_id": contractor_id}, {"_id": 0, "platform": 1, "items": 1, "created_at": 1}
+    ).to_list(500)
+    content_by_platform = {}
+    total_posts = 0
+    for c in content:
+        p = c.get("platform", "unknown")
+        count = len(c.get("items", []))
+        content_by_platform[p] = content_by_platform.get(p, 0) + count
+        total_posts += count
+
+    campaigns = await db.campaigns.find(
+        {"contractor_id": contractor_id}, {"_id": 0, "status": 1, "goal": 1, "platforms": 1}
+    ).to_list(100)
+    campaign_by_status = {}
+    for camp in campaigns:
+        s = camp.get("status", "draft")
+        campaign_by_status[s] = campaign_by_status.get(s, 0) + 1
+
+    scheduled = await db.scheduled_posts.find(
+        {"contractor_id": contractor_id}, {"_id": 0, "status": 1, "platform": 1, "scheduled_date": 1}
+    ).to_list(500)
+    schedule_by_status = {}
+    schedule_by_platform = {}
+    for sp in scheduled:
+        s = sp.get("status", "scheduled")
+        schedule_by_status[s] = schedule_by_status.get(s, 0) + 1
+        p = sp.get("platform", "unknown")
+        schedule_by_platform[p] = schedule_by_platform.get(p, 0) + 1
+
+    unread = await db.notifications.count_documents({"contractor_id": contractor_id, "read": False})
+
+    return {
+        "leads": {
+            "total": len(leads),
+            "by_status": status_counts,
+            "by_date": dict(sorted(leads_by_date.items())[-30:]),
+            "conversion_rate": round((status_counts.get("qualified", 0) / max(len(leads), 1)) * 100, 1)
+        },
+        "content": {"total_batches": len(content), "total_posts": total_posts, "by_platform": content_by_platform},
+        "campaigns": {"total": len(campaigns), "by_status": campaign_by_status},
+        "schedule": {"total": len(scheduled), "by_status": schedule_by_status, "by_platform": schedule_by_platform},
+        "notifications_unread": unread
+    }
+
+
+def make_lead(rng, now):
+    created = now - timedelta(days=rng.randint(0, 120), seconds=rng.randint(0, 86399))
+    lead = {
+        "id": str(uuid.uuid4()),
+        "name": "Bench Homeowner",
+        "email": "bench@example.com",
+        "city": "Austin", "state": "TX",
+        "project_type": rng.choice(["new_home", "addition", "basement"]),
+        "description": "Looking for an ICF build " * rng.randint(1, 20),
+        "created_at": created.isoformat(),
+    }
+    if rng.random() > 0.05:  # some legacy rows have no status
+        lead["status"] = rng.choice(STATUSES)
+    return lead
+
+
+async def seed(db, n_leads, rng):
+    now = datetime.now(timezone.utc)
+    await db.leads.delete_many({})
+    batch = []
+    for _ in range(n_leads):
+        batch.append(make_lead(rng, now))
+        if len(batch) == 10000:
+            await db.leads.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.leads.insert_many(batch, ordered=False)
+
+    for coll in ("generated_content", "campaigns", "scheduled_posts", "notifications"):
+        await db[coll].delete_many({})
+    await db.generated_content.insert_many([{
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID, "platform": rng.choice(PLATFORMS),
+        "items": [{"text": "post", "hashtags": ["#ICF"]}] * rng.randint(1, 5),
+        "created_at": now.isoformat(),
+    } for _ in range(200)])
+    await db.campaigns.insert_many([{
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID,
+        "status": rng.choice(["draft", "generated", "active"]), "created_at": now.isoformat(),
+    } for _ in range(40)])
+    await db.scheduled_posts.insert_many([{
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID, "platform": rng.choice(PLATFORMS),
+        "status": rng.choice(["scheduled", "published"]), "scheduled_date": now.date().isoformat(),
+    } for _ in range(300)])
+    await db.notifications.insert_many([{
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID, "read": rng.random() > 0.5,
+        "created_at": now.isoformat(),
+    } for _ in range(100)])
+
+
+async def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo)
+    db = client[args.db]
+    rng = random.Random(42)
+    try:
+        await seed(db, 800, rng)
+        legacy = await legacy_analytics(db, CONTRACTOR_ID)
+        current = await compute_analytics(db, CONTRACTOR_ID)
+        assert legacy == current, f"Mismatch:\nlegacy={legacy}\ncurrent={current}"
+        print("Results match legacy implementation on 800 leads")
+
+        for size in args.sizes:
+            await seed(db, size, rng)
+            legacy_p50, legacy_max = await time_it(lambda: legacy_analytics(db, CONTRACTOR_ID), args.repeat)
+            agg_p50, agg_max = await time_it(lambda: compute_analytics(db, CONTRACTOR_ID), args.repeat)
+            print(f"leads={size:>8}  legacy p50={legacy_p50:8.1f}ms max={legacy_max:8.1f}ms (capped at 1000 leads)  "
+                  f"aggregation p50={agg_p50:8.1f}ms max={agg_max:8.1f}ms")
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="icf_hub_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
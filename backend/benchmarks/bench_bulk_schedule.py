@@ -0,0 +1,93 @@
+"""
+/schedule/bulk ingestion: one insert_one per post vs. streamed chunked insert_many.
+
+Builds a realistic JSON body of N posts, then ingests it into a scratch
+database on a local mongod with the legacy loop and with
+bulk_helper.stream_bulk_insert (fed in 16 KB chunks, as the ASGI server would).
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk_schedule --mongo mongodb://localhost:27017 --posts 300 3000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from bulk_helper import stream_bulk_insert, scheduled_post_doc
+from models.schedule import SchedulePostCreate
+
+PLATFORMS = ["facebook", "instagram", "linkedin", "x", "tiktok"]
+
+
+def make_body(n: int) -> bytes:
+    start = date.today()
+    posts = [{
+        "platform": PLATFORMS[i % len(PLATFORMS)],
+        "content": f"Day {i}: ICF walls cut heating and cooling costs by up to 70%. " * 4,
+        "hashtags": ["#ICF", "#EnergyEfficient", "#GreenBuilding"],
+        "cta": "Get a free ICF quote today!",
+        "scheduled_date": (start + timedelta(days=i // 3)).isoformat(),
+        "scheduled_time": "10:00",
+        "content_type": "educational",
+    } for i in range(n)]
+    return json.dumps(posts).encode()
+
+
+async def legacy_loop(collection, body: bytes, contractor_id: str):
+    posts = [SchedulePostCreate.model_validate(p) for p in json.loads(body)]
+    created = []
+    for post_data in posts:
+        doc = {
+            "id": str(uuid.uuid4()),
+            "contractor_id": contractor_id,
+            **post_data.model_dump(),
+            "status": "scheduled",
+            "published_at": None,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await collection.insert_one(doc)
+        created.append({k: v for k, v in doc.items() if k != "_id"})
+    return created
+
+
+async def chunked(body: bytes, size: int = 16384):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo)
+    collection = client[args.db].scheduled_posts
+    try:
+        for n in args.posts:
+            body = make_body(n)
+            await collection.delete_many({})
+            start = time.perf_counter()
+            legacy = await legacy_loop(collection, body, "bench")
+            legacy_ms = (time.perf_counter() - start) * 1000
+
+            await collection.delete_many({})
+            start = time.perf_counter()
+            created, errors = await stream_bulk_insert(
+                collection, chunked(body), SchedulePostCreate, scheduled_post_doc("bench"), max_items=n
+            )
+            bulk_ms = (time.perf_counter() - start) * 1000
+            assert len(created) == len(legacy) == n and not errors
+
+            print(f"posts={n:>6} body={len(body) / 1024:8.1f}KB  legacy={legacy_ms:8.1f}ms  "
+                  f"streamed={bulk_ms:8.1f}ms  speedup={legacy_ms / max(bulk_ms, 0.001):5.1f}x")
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="icf_hub_bench")
+    parser.add_argument("--posts", type=int, nargs="+", default=[300, 3000])
+    asyncio.run(main(parser.parse_args()))
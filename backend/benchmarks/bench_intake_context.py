@@ -0,0 +1,89 @@
+"""
+/intake/chat prompt size per turn: legacy context vs. the budgeted builder.
+
+Replays a scripted 30-turn intake conversation and counts the tokens (via
+context_helper.estimate_tokens) sent to the model on each turn:
+  legacy - a cached LlmChat that resends its own history every turn, with
+           the first 20 stored messages also pasted into every prompt
+  budget - a fresh LlmChat per turn given the rolling summary + newest
+           turns, plus the occasional fold call that updates the summary
+The summarizer is stubbed to return a summary of the configured size, so
+this runs without an LLM key or a database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_intake_context --turns 30 --budget 1500
+"""
+import argparse
+import random
+
+import context_helper
+from context_helper import estimate_tokens, fold_prompt, format_turn, plan_context, render_context
+
+SYSTEM_TOKENS = 305  # estimate_tokens(INTAKE_SYSTEM_PROMPT)
+INSTRUCTION = "(Respond naturally as the Intake Coordinator based on the history)"
+HOMEOWNER = [
+    "Hi, I'm Dana, planning a new build outside Tulsa, OK.",
+    "You can reach me at dana@example.com or 918-555-0142.",
+    "We're thinking about a two story home around 2,800 square feet with a walkout basement.",
+    "How does ICF hold up against tornadoes compared to wood framing?",
+    "What about the cost difference for the basement walls specifically?",
+    "Can we still do a stucco finish on the outside, or does it need siding?",
+]
+AI_SENTENCE = ("ICF walls combine continuous foam insulation with a reinforced concrete core, which gives you "
+               "excellent thermal performance, quiet interiors and strong resistance to high winds. ")
+
+
+def conversation(turns: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(turns):
+        user = HOMEOWNER[i] if i < len(HOMEOWNER) else rng.choice(HOMEOWNER[3:]) + f" (follow-up {i})"
+        yield user, AI_SENTENCE * rng.randint(3, 6)
+
+
+def legacy_run(turns: int):
+    stored, chat_history, per_turn = [], [], []
+    for user, reply in conversation(turns):
+        pasted = "Conversation History:\n" + "".join(f"{format_turn(m)}\n" for m in stored[:20])
+        prompt = f"{pasted}\nHomeowner (Current): {user}\n{INSTRUCTION}"
+        per_turn.append(SYSTEM_TOKENS + sum(chat_history) + estimate_tokens(prompt))
+        chat_history += [estimate_tokens(prompt), estimate_tokens(reply)]
+        stored += [{"role": "user", "content": user}, {"role": "assistant", "content": reply}]
+    return per_turn
+
+
+def budget_run(turns: int, budget: int):
+    summary, unsummarized, per_turn, folds = "", [], [], []
+    for user, reply in conversation(turns):
+        lines = [format_turn(m) for m in unsummarized]
+        fold, _ = plan_context(summary, lines, budget)
+        fold_tokens = 0
+        if fold:
+            fold_tokens = estimate_tokens(context_helper.FOLD_SYSTEM_PROMPT) + estimate_tokens(
+                fold_prompt(summary, lines[:fold]))
+            summary = "x" * (context_helper.INTAKE_SUMMARY_TOKENS * 4)
+            unsummarized = unsummarized[fold:]
+            lines = lines[fold:]
+        prompt = f"{render_context(summary, lines, budget)}\nHomeowner (Current): {user}\n{INSTRUCTION}"
+        per_turn.append(SYSTEM_TOKENS + estimate_tokens(prompt))
+        folds.append(fold_tokens)
+        unsummarized += [{"role": "user", "content": user}, {"role": "assistant", "content": reply}]
+    return per_turn, folds
+
+
+def main(args):
+    legacy = legacy_run(args.turns)
+    budget, folds = budget_run(args.turns, args.budget)
+    print(f"{'turn':>4} {'legacy':>8} {'budget':>8} {'fold':>6}")
+    for i, (a, b, f) in enumerate(zip(legacy, budget, folds), start=1):
+        print(f"{i:>4} {a:>8} {b:>8} {f or '':>6}")
+    total_budget = sum(budget) + sum(folds)
+    print(f"\ntotal prompt tokens: legacy={sum(legacy)}  budget={total_budget} (incl. {sum(folds)} for folds)"
+          f"  -> {sum(legacy) / max(total_budget, 1):.1f}x fewer")
+    print(f"last turn: legacy={legacy[-1]}  budget={budget[-1]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=context_helper.INTAKE_CONTEXT_TOKENS)
+    main(parser.parse_args())
@@ -0,0 +1,147 @@
+"""
+Lead scoring: one LLM call per lead vs. the rule engine in scoring_helper.
+
+Generates leads with the kinds of free-text values the API receives and
+times:
+  rules/lead   - rule_scores([lead]) in a loop, as the single-lead endpoint does
+  rules/batch  - rule_scores(leads) for the whole table at once (NumPy)
+  (cold = parse caches cleared first, warm = caches populated)
+The LLM path can't run offline, so it is modeled: prompt tokens come from
+context_helper.estimate_tokens on the legacy scoring prompts, and wall time
+is --llm-seconds per call at --concurrency calls in flight. Pass --live N
+(with EMERGENT_LLM_KEY set) to time N real legacy scoring calls instead.
+
+Usage (from backend/):
+    python -m benchmarks.bench_lead_scoring --leads 100 1000 10000 --llm-seconds 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+import uuid
+
+import scoring_helper
+from context_helper import estimate_tokens
+from scoring_helper import rule_scores
+
+# The prompts score_lead used before the rule engine
+LEGACY_SYSTEM_PROMPT = """You are an AI lead scoring agent for ICF construction. Score leads based on:
+- Budget (higher = better score)
+- Timeline (sooner = higher urgency)
+- Project type (new home > addition > basement > other)
+- Project size (larger = higher value)
+- Description quality (detailed = more serious buyer)
+
+Return valid JSON:
+{
+  "score": 0-100,
+  "grade": "A/B/C/D",
+  "urgency": "high/medium/low",
+  "estimated_value": "$X - $Y",
+  "insights": "brief analysis",
+  "recommended_action": "what the contractor should do",
+  "follow_up_message": "suggested personalized outreach message"
+}"""
+# Typical length of the JSON reply
+LEGACY_REPLY_TOKENS = 180
+
+BUDGETS = ["100k_200k", "200k_300k", "300k_500k", "500k_plus", "under_100k", "$250,000", "1.2M", "Unknown"]
+TIMELINES = ["asap", "1_3_months", "3_6_months", "6_12_months", "1-2 years", "flexible", "Unknown"]
+SIZES = ["under_1000_sqft", "1000_2000_sqft", "2000_3000_sqft", "3000_plus_sqft", "2,500 sq ft", "Unknown"]
+TYPES = ["new_home", "addition", "basement", "commercial", "foundation", "other", "Unknown"]
+DESCRIPTIONS = [
+    "",
+    "Just exploring options.",
+    "Looking to build a storm-resistant family home on a two acre lot.",
+    "Two story, 4 bed 3 bath with a walkout basement. We have plans from our architect and a permit "
+    "application in progress; energy efficiency and tornado resistance matter most to us.",
+]
+
+
+def make_leads(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [{
+        "id": str(uuid.uuid4()), "name": f"Lead {i}", "city": "Tulsa", "state": "OK",
+        "project_type": rng.choice(TYPES), "project_size": rng.choice(SIZES),
+        "budget_range": rng.choice(BUDGETS), "timeline": rng.choice(TIMELINES),
+        "description": rng.choice(DESCRIPTIONS) + (f" Lot #{i}." if rng.random() < 0.3 else ""),
+    } for i in range(n)]
+
+
+def legacy_prompt(lead: dict) -> str:
+    return f"""Score this ICF construction lead:
+Name: {lead['name']}
+Location: {lead.get('city', 'N/A')}, {lead.get('state', 'N/A')}
+Project type: {lead.get('project_type', 'N/A')}
+Project size: {lead.get('project_size', 'N/A')}
+Budget range: {lead.get('budget_range', 'N/A')}
+Timeline: {lead.get('timeline', 'N/A')}
+Description: {lead.get('description', 'N/A')}
+
+Return ONLY valid JSON with: score, grade, urgency, estimated_value, insights, recommended_action, follow_up_message"""
+
+
+def clear_caches():
+    for parse in (scoring_helper.parse_budget, scoring_helper.parse_timeline_months, scoring_helper.parse_square_feet,
+                  scoring_helper.project_type_factor, scoring_helper.description_factor):
+        parse.cache_clear()
+
+
+def timed(fn, runs: int, cold: bool) -> float:
+    samples = []
+    for _ in range(runs):
+        if cold:
+            clear_caches()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def live_llm(leads: list) -> list:
+    from llm_helper import complete
+    samples = []
+    for lead in leads:
+        started = time.perf_counter()
+        await complete(os.environ["EMERGENT_LLM_KEY"], LEGACY_SYSTEM_PROMPT, legacy_prompt(lead), route="bench",
+                       session_prefix="bench")
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(args):
+    llm_seconds = args.llm_seconds
+    if args.live:
+        samples = asyncio.run(live_llm(make_leads(args.live, seed=99)))
+        llm_seconds = statistics.median(samples)
+        print(f"live LLM scoring: {len(samples)} calls, median {llm_seconds:.2f}s, max {max(samples):.2f}s\n")
+
+    print(f"{'leads':>6} {'path':<14} {'total':>12} {'per lead':>12} {'prompt tokens':>14}")
+    for n in args.leads:
+        leads = make_leads(n)
+        runs = max(3, min(args.runs, 20_000 // n))
+        tokens = sum(estimate_tokens(LEGACY_SYSTEM_PROMPT) + estimate_tokens(legacy_prompt(lead)) for lead in leads)
+        llm_total = llm_seconds * -(-n // args.concurrency)
+        rows = [
+            ("llm (model)", llm_total, tokens),
+            ("rules/lead", timed(lambda: [rule_scores([lead]) for lead in leads], runs, cold=False), 0),
+            ("rules/batch", timed(lambda: rule_scores(leads), runs, cold=True), 0),
+            ("rules/batch*", timed(lambda: rule_scores(leads), runs, cold=False), 0),
+        ]
+        for name, total, prompt_tokens in rows:
+            print(f"{n:>6} {name:<14} {total * 1000:>10.2f}ms {total / n * 1e6:>10.1f}us {prompt_tokens or '':>14}")
+        print(f"{'':>6} rules/batch* vs llm: {llm_total / rows[3][1]:,.0f}x faster, "
+              f"{tokens + n * LEGACY_REPLY_TOKENS:,} LLM tokens avoided\n")
+    print("* warm parse caches (repeated enum-like values, as on a live lead table)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--llm-seconds", type=float, default=4.0, help="modeled latency of one scoring call")
+    parser.add_argument("--concurrency", type=int, default=scoring_helper.LEAD_SCORE_CONCURRENCY)
+    parser.add_argument("--live", type=int, default=0, help="time this many real LLM scoring calls")
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""
+Login throughput vs. event-loop responsiveness.
+
+Runs a burst of bcrypt verifications the old way (inline on the event loop)
+and through auth_helper's worker pool, while a probe task simulates an
+unrelated endpoint ticking every few milliseconds. Reports logins/sec and the
+p50/p99 latency seen by the probe.
+
+Usage (from backend/):
+    python -m benchmarks.bench_password_hashing --logins 40 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+import auth_helper
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def probe(stop: asyncio.Event, interval: float, samples: list):
+    # Each tick stands in for a cheap chat/lead request: it should take
+    # ~interval seconds unless the loop is blocked.
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def inline_login(password: bytes, hashed: bytes):
+    return bcrypt.checkpw(password, hashed)
+
+
+async def pooled_login(password: str, hashed: str):
+    return await auth_helper.verify_password(password, hashed)
+
+
+async def run_case(name, make_call, logins, concurrency, interval):
+    samples = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, interval, samples))
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await make_call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    print(f"{name:<8} logins/s={logins / elapsed:7.1f}  "
+          f"probe p50={statistics.median(samples) if samples else 0:8.2f}ms  "
+          f"p99={percentile(samples, 99):8.2f}ms  "
+          f"max={max(samples) if samples else 0:8.2f}ms  ticks={len(samples)}")
+
+
+async def main(args):
+    password = "TestPassword123!"
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=args.rounds)).decode()
+    print(f"bcrypt rounds={args.rounds} logins={args.logins} concurrency={args.concurrency} "
+          f"pool_workers={auth_helper.PASSWORD_HASH_WORKERS} executor={auth_helper.PASSWORD_HASH_EXECUTOR}")
+
+    await run_case("inline", lambda: inline_login(password.encode(), hashed.encode()),
+                   args.logins, args.concurrency, args.interval)
+    await run_case("pooled", lambda: pooled_login(password, hashed),
+                   args.logins, args.concurrency, args.interval)
+    auth_helper.shutdown_hash_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=auth_helper.BCRYPT_ROUNDS)
+    parser.add_argument("--interval", type=float, default=0.005, help="probe tick in seconds")
+    asyncio.run(main(parser.parse_args()))
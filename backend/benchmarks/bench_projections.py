@@ -0,0 +1,137 @@
+"""
+List payloads: full documents vs. the default summary projection.
+
+Seeds a scratch database on a local mongod with realistic leads (AI intake
+transcripts, matches, scores), content batches and generated campaigns, then
+for each list endpoint fetches one page with {"_id": 0} and with the
+projection_helper summary, and reports response size plus the time spent in
+the query and in FastAPI-style serialization (jsonable_encoder + json.dumps).
+
+Usage (from backend/):
+    python -m benchmarks.bench_projections --mongo mongodb://localhost:27017 --docs 500 --page 50 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from pagination_helper import paginate
+from projection_helper import resolve_projection
+
+CONTRACTOR_ID = "bench-contractor"
+PLATFORMS = ["facebook", "instagram", "linkedin", "x", "tiktok"]
+POST = ("Insulated concrete forms keep your home comfortable through every season and cut "
+        "heating and cooling bills by up to 70%. Ask us how ICF fits your next build. ")
+
+
+def _ts(i: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(minutes=i)).isoformat()
+
+
+def make_lead(i: int) -> dict:
+    lead = {
+        "id": str(uuid.uuid4()), "name": f"Lead {i}", "email": f"lead{i}@example.com", "phone": "555-0100",
+        "city": "Austin", "state": "TX", "project_type": "new_home", "project_size": "2000_3000_sqft",
+        "budget_range": "300k_500k", "timeline": "3_6_months",
+        "description": "Looking to build a storm-resistant family home on a two acre lot.",
+        "status": random.choice(["new", "contacted", "qualified", "pending_match"]), "created_at": _ts(i),
+        "ai_score": {
+            "score": random.randint(20, 95), "grade": random.choice("ABCD"), "urgency": "high",
+            "estimated_value": "$420,000", "insights": POST * 3, "recommended_action": "Call within 24 hours",
+            "follow_up_message": POST * 2,
+        },
+    }
+    if i % 3 == 0:
+        lead.update({
+            "source": "ai_intake", "session_id": str(uuid.uuid4()),
+            "chat_summary": "\n".join(f"user: {POST}\nassistant: {POST * 2}" for _ in range(12)),
+            "ai_matches": [{"contractor_id": str(uuid.uuid4()), "score": 90 - k, "reason": POST} for k in range(3)],
+        })
+    return lead
+
+
+def make_content(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID, "platform": PLATFORMS[i % len(PLATFORMS)],
+        "content_type": "educational", "topic": "Energy savings", "tone": "professional", "created_at": _ts(i),
+        "items": [{"text": POST * 2, "hashtags": ["#ICF", "#GreenBuilding", "#EnergyEfficient"],
+                   "cta": "Get a free quote", "seo_keywords": ["ICF homes", "energy efficient construction"]}
+                  for _ in range(5)],
+    }
+
+
+def make_campaign(i: int) -> dict:
+    generated = i % 4 != 0
+    return {
+        "id": str(uuid.uuid4()), "contractor_id": CONTRACTOR_ID, "name": f"Campaign {i}",
+        "goal": "lead_generation", "platforms": PLATFORMS[:3], "target_audience": "Homeowners planning a build",
+        "duration_days": 30, "description": "Spring push", "created_at": _ts(i),
+        "status": "generated" if generated else "draft",
+        "ai_content": {
+            "strategy": POST * 4,
+            "content_calendar": [{"day": d, "platform": PLATFORMS[d % 3], "content_type": "educational",
+                                  "post_text": POST * 2, "hashtags": ["#ICF", "#BuildSmart"],
+                                  "best_time": "10:00 AM", "cta": "Book a consult"} for d in range(1, 15)],
+            "seo_keywords": ["ICF", "insulated concrete forms", "storm resistant homes"],
+            "target_metrics": {"reach": "25,000", "engagement": "4.5%"},
+        } if generated else None,
+    }
+
+
+RESOURCES = [
+    ("leads", "leads", {}, make_lead),
+    ("content", "generated_content", {"contractor_id": CONTRACTOR_ID}, make_content),
+    ("campaigns", "campaigns", {"contractor_id": CONTRACTOR_ID}, make_campaign),
+]
+
+
+async def measure(collection, query, projection, page: int, runs: int):
+    query_ms, encode_ms = [], []
+    body = b""
+    for _ in range(runs):
+        start = time.perf_counter()
+        docs, _ = await paginate(collection, query, projection, "created_at", -1, page)
+        query_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        body = json.dumps(jsonable_encoder(docs)).encode()
+        encode_ms.append((time.perf_counter() - start) * 1000)
+    return len(body), statistics.median(query_ms), statistics.median(encode_ms)
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo)
+    db = client[args.db]
+    try:
+        for resource, name, query, make in RESOURCES:
+            await db[name].insert_many([make(i) for i in range(args.docs)])
+            await db[name].create_index([("created_at", -1), ("id", -1)])
+            await db[name].create_index([("contractor_id", 1), ("created_at", -1), ("id", -1)])
+
+        for page in args.page:
+            for resource, name, query, _ in RESOURCES:
+                full = await measure(db[name], query, {"_id": 0}, page, args.runs)
+                summary = await measure(db[name], query, resolve_projection(resource), page, args.runs)
+                print(f"{resource:<10} page={page:>4}  "
+                      f"full={full[0] / 1024:8.1f}KB q={full[1]:6.2f}ms ser={full[2]:6.2f}ms  "
+                      f"summary={summary[0] / 1024:7.1f}KB q={summary[1]:6.2f}ms ser={summary[2]:6.2f}ms  "
+                      f"size={full[0] / max(summary[0], 1):5.1f}x smaller")
+    finally:
+        await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="icf_hub_bench")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--page", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""
+Response encoding: FastAPI's default path vs. response_helper.
+
+Encodes pages of realistic lead, campaign, content and scheduled-post
+documents (the same generators as bench_projections) with:
+  default  - jsonable_encoder + JSONResponse.render, what a plain `return` costs
+  stdlib   - response_helper's fallback encoder
+  orjson   - response_helper's fast path
+and checks that all three produce the same JSON. Runs without a database.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --rows 50 500 --runs 50
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import response_helper
+from benchmarks.bench_projections import PLATFORMS, POST, make_campaign, make_content, make_lead
+
+
+def make_post(i: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "contractor_id": "bench-contractor", "platform": PLATFORMS[i % len(PLATFORMS)],
+        "content": POST * 2, "hashtags": ["#ICF", "#EnergyEfficient"], "cta": "Get a free ICF quote today!",
+        "scheduled_date": (date.today() + timedelta(days=i // 3)).isoformat(), "scheduled_time": "10:00",
+        "content_type": "educational", "status": "scheduled", "published_at": None, "created_at": POST[:32],
+    }
+
+
+DOCUMENTS = {"leads": make_lead, "campaigns": make_campaign, "content": make_content, "schedule": make_post}
+
+
+def default_render(docs) -> bytes:
+    return JSONResponse(None).render(jsonable_encoder(docs))
+
+
+def timed(fn, docs, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(docs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(args):
+    encoders = {
+        "default": default_render,
+        "stdlib": lambda docs: response_helper.dumps(docs, fast=False),
+    }
+    if response_helper.orjson is not None:
+        encoders["orjson"] = lambda docs: response_helper.dumps(docs, fast=True)
+    else:
+        print("orjson is not installed; only the fallback path is measured")
+
+    for rows in args.rows:
+        for name, make in DOCUMENTS.items():
+            docs = [make(i) for i in range(rows)]
+            outputs = {label: json.loads(fn(docs)) for label, fn in encoders.items()}
+            assert all(out == outputs["default"] for out in outputs.values()), f"{name}: encoders disagree"
+
+            size = len(encoders["default"](docs))
+            results = {label: timed(fn, docs, args.runs) for label, fn in encoders.items()}
+            base = results["default"]
+            line = "  ".join(f"{label}={ms:7.2f}ms ({base / max(ms, 1e-6):4.1f}x)" for label, ms in results.items())
+            print(f"{name:<10} rows={rows:>5} body={size / 1024:8.1f}KB  {line}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--runs", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from json_stream_helper import JsonArrayItems, JsonStreamError
+
+logger = logging.getLogger(__name__)
+
+# ─── Streaming Bulk Ingestion ───
+# The request body is split into array elements as it streams in; each element
+# is validated on its own and valid documents are written in unordered
+# insert_many chunks. One bad post produces an error entry, not a failed batch.
+# A body past BULK_SCHEDULE_MAX_ITEMS, or with an element over
+# BULK_SCHEDULE_MAX_ITEM_CHARS, is not read any further.
+
+BULK_SCHEDULE_MAX_ITEMS = int(os.environ.get("BULK_SCHEDULE_MAX_ITEMS", "1000"))
+BULK_SCHEDULE_MAX_ITEM_CHARS = int(os.environ.get("BULK_SCHEDULE_MAX_ITEM_CHARS", "65536"))
+BULK_INSERT_CHUNK_SIZE = int(os.environ.get("BULK_INSERT_CHUNK_SIZE", "100"))
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+async def _flush(collection, pending, created, errors):
+    if not pending:
+        return
+    docs = [doc for _, doc in pending]
+    failed = set()
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for err in e.details.get("writeErrors", []):
+            index, _ = pending[err["index"]]
+            failed.add(err["index"])
+            errors.append({"index": index, "error": err.get("errmsg", "Write failed")})
+    for i, (_, doc) in enumerate(pending):
+        if i not in failed:
+            created.append({k: v for k, v in doc.items() if k != "_id"})
+    pending.clear()
+
+
+async def stream_bulk_insert(collection, chunks, model, build_doc, max_items: int = None, chunk_size: int = None,
+                             max_item_chars: int = None):
+    """
+    Validate and insert a streamed JSON array of `model` items.
+    Returns (created_docs, errors) where each error is {"index", "error"}.
+    Reading stops at the first item past `max_items` or at an element over
+    `max_item_chars`; each gets one error entry and the rest of the body is ignored.
+    """
+    max_items = max_items or BULK_SCHEDULE_MAX_ITEMS
+    chunk_size = chunk_size or BULK_INSERT_CHUNK_SIZE
+    splitter = JsonArrayItems(max_item_chars or BULK_SCHEDULE_MAX_ITEM_CHARS)
+    created, errors, pending = [], [], []
+    index = 0
+
+    async def handle(texts) -> bool:
+        nonlocal index
+        for text in texts:
+            if index >= max_items:
+                errors.append({"index": index, "error": f"Exceeds maximum batch size of {max_items}; "
+                                                        f"later items were not read"})
+                return False
+            try:
+                item = model.model_validate(json.loads(text))
+                pending.append((index, build_doc(item)))
+            except json.JSONDecodeError as e:
+                errors.append({"index": index, "error": f"Invalid JSON: {e.msg}"})
+            except ValidationError as e:
+                errors.append({"index": index, "error": _validation_message(e)})
+            index += 1
+            if len(pending) >= chunk_size:
+                await _flush(collection, pending, created, errors)
+        return True
+
+    try:
+        async for chunk in chunks:
+            if not await handle(splitter.feed(chunk)):
+                break
+        else:
+            splitter.close()
+    except JsonStreamError as e:
+        errors.append({"index": index, "error": f"Malformed request body: {e}"})
+    await _flush(collection, pending, created, errors)
+    return created, errors
+
+
+def scheduled_post_doc(contractor_id: str):
+    def build(post) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "contractor_id": contractor_id,
+            **post.model_dump(),
+            "status": "scheduled",
+            "published_at": None,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+    return build
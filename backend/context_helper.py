@@ -0,0 +1,119 @@
+import logging
+import os
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# ─── Intake Context Window ───
+# Each /intake/chat turn is sent to a fresh LlmChat with the context built
+# here, so history is sent exactly once. The context is a rolling summary of
+# older turns plus the newest turns verbatim, kept within
+# INTAKE_CONTEXT_TOKENS. When the verbatim turns outgrow the window, the
+# oldest are folded into the summary, which is stored in intake_sessions
+# along with a created_at watermark of what it covers.
+
+INTAKE_CONTEXT_TOKENS = int(os.environ.get("INTAKE_CONTEXT_TOKENS", "1500"))
+INTAKE_SUMMARY_TOKENS = int(os.environ.get("INTAKE_SUMMARY_TOKENS", "300"))
+# After a fold the verbatim turns take at most this share of their budget, so
+# folding (one extra LLM call) happens every few turns rather than every turn
+INTAKE_FOLD_TARGET = float(os.environ.get("INTAKE_FOLD_TARGET", "0.5"))
+INTAKE_MAX_UNSUMMARIZED = 200
+
+FOLD_SYSTEM_PROMPT = "You maintain a running summary of a homeowner intake chat for ICF Hub."
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose; close enough for budgeting
+    return (len(text) + 3) // 4 if text else 0
+
+
+def format_turn(msg: dict) -> str:
+    role = "AI" if msg.get("role") == "assistant" else "Homeowner"
+    return f"{role}: {msg.get('content', '')}"
+
+
+def fold_prompt(summary: str, lines: list) -> str:
+    words = INTAKE_SUMMARY_TOKENS * 3 // 4
+    previous = summary or "(none yet)"
+    return (
+        f"Update the running summary with the new conversation turns. Keep the homeowner's name, "
+        f"location, contact details, project facts, uploaded plan insights, questions already answered "
+        f"and anything still open. Drop small talk. Reply with the summary only, under {words} words.\n\n"
+        f"Current summary:\n{previous}\n\nNew turns:\n" + "\n".join(lines)
+    )
+
+
+def plan_context(summary: str, lines: list, budget: int = None):
+    """
+    Split unsummarized turns (oldest first) into (fold, keep).
+    Returns fold=0 when everything fits beside the current summary.
+    """
+    budget = budget or INTAKE_CONTEXT_TOKENS
+    costs = [estimate_tokens(line) for line in lines]
+    if sum(costs) + estimate_tokens(summary) <= budget:
+        return 0, len(lines)
+    target = max(budget - INTAKE_SUMMARY_TOKENS, 0) * INTAKE_FOLD_TARGET
+    kept, fold = 0, len(lines)
+    while fold > 0 and kept + costs[fold - 1] <= target:
+        fold -= 1
+        kept += costs[fold]
+    return fold, len(lines) - fold
+
+
+def render_context(summary: str, lines: list, budget: int = None) -> str:
+    budget = budget or INTAKE_CONTEXT_TOKENS
+    room = max(budget - estimate_tokens(summary), 0)
+    verbatim = []
+    for line in reversed(lines):
+        cost = estimate_tokens(line)
+        if cost > room:
+            if not verbatim:
+                # A single oversized turn still goes in, trimmed from the front
+                verbatim.append("…" + line[-room * 4:] if room else "")
+            break
+        verbatim.append(line)
+        room -= cost
+    verbatim.reverse()
+
+    parts = []
+    if summary:
+        parts.append(f"Summary of earlier conversation:\n{summary}\n")
+    parts.append("Conversation History:\n" + "".join(f"{line}\n" for line in verbatim if line))
+    return "\n".join(parts)
+
+
+async def build_intake_context(db, session_id: str, summarize) -> str:
+    """
+    Context string for the next intake turn. `summarize(prompt)` is an async
+    LLM call used to fold old turns into the stored summary.
+    """
+    state = await db.intake_sessions.find_one({"_id": session_id}) or {}
+    summary = state.get("summary", "")
+    query = {"session_id": session_id}
+    if state.get("summarized_until"):
+        query["created_at"] = {"$gt": state["summarized_until"]}
+    # Newest first, so a backlog past the cap (folds keep failing) drops the oldest turns, not the latest
+    turns = await db.intake_chats.find(
+        query, {"_id": 0, "role": 1, "content": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(INTAKE_MAX_UNSUMMARIZED).to_list(INTAKE_MAX_UNSUMMARIZED)
+    turns.reverse()
+    lines = [format_turn(t) for t in turns]
+
+    fold, _ = plan_context(summary, lines)
+    if fold:
+        try:
+            summary = (await summarize(fold_prompt(summary, lines[:fold]))).strip()
+            await db.intake_sessions.update_one(
+                {"_id": session_id},
+                {"$set": {
+                    "summary": summary,
+                    "summarized_until": turns[fold - 1]["created_at"],
+                    "updated_at": datetime.now(timezone.utc).isoformat()
+                }, "$inc": {"summarized_messages": fold}},
+                upsert=True
+            )
+            lines = lines[fold:]
+        except Exception as e:
+            # Keep the old summary; render_context trims what doesn't fit this turn
+            logger.error(f"Intake summary fold failed for session {session_id}: {e}")
+    return render_context(summary, lines)
@@ -0,0 +1,62 @@
+import hashlib
+import json
+
+from fastapi import Request, Response
+from pymongo import ReturnDocument
+
+# ─── Conditional GET ───
+# Public read endpoints carry strong ETags built from a version stamp (or,
+# for tiny bodies, the body itself). When If-None-Match matches we answer
+# 304 before touching the documents or serializing anything.
+#
+# Version stamps live in the shared `counters` collection as
+# {_id: "version:<collection>", seq}. Every write to a versioned collection
+# must call bump_version, otherwise clients keep a stale copy until max-age.
+
+CACHE_POLICIES = {
+    "contractors": "public, max-age=60, stale-while-revalidate=300",
+    "stats": "public, max-age=300, stale-while-revalidate=600",
+    # Session ids are bearer-ish; let the browser keep it but always revalidate
+    "chat_history": "private, no-cache",
+}
+
+
+def _version_key(collection: str) -> str:
+    return f"version:{collection}"
+
+
+async def collection_version(db, collection: str) -> int:
+    doc = await db.counters.find_one({"_id": _version_key(collection)})
+    return doc["seq"] if doc else 0
+
+
+async def bump_version(db, collection: str) -> int:
+    doc = await db.counters.find_one_and_update(
+        {"_id": _version_key(collection)}, {"$inc": {"seq": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return doc["seq"]
+
+
+def make_etag(*parts) -> str:
+    raw = json.dumps(parts, separators=(",", ":"), sort_keys=True, default=str).encode()
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str, policy: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_POLICIES[policy]}
+
+
+def not_modified(etag: str, policy: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, policy))
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+
+# ─── Fake LLM Provider ───
+# LLM_PROVIDER=fake makes llm_helper.new_chat() build a FakeChat instead of an
+# LlmChat, so every AI route can be driven offline (see load_test.py). The
+# fake answers in the format the calling route parses, picked from the
+# prompt's own instructions: content arrays, campaign calendars, lead
+# narratives, outreach messages, intake turns (ending with "COMPLETE:"
+# once the homeowner asks for a contractor match), intake summaries, plan
+# analyses and advisor answers. JSON replies are sometimes wrapped in a
+# ```json fence, as real models do.
+#
+# Timing: time to first token is lognormal around FAKE_LLM_TTFT_MS, then the
+# reply arrives at FAKE_LLM_TOKENS_PER_SECOND (0 = all at once). Failures:
+# FAKE_LLM_ERROR_RATE of calls raise, FAKE_LLM_TRUNCATE_RATE die half way
+# through the reply, and FAKE_LLM_HANG_RATE don't answer for
+# FAKE_LLM_HANG_SECONDS.
+
+FAKE_LLM_TTFT_MS = float(os.environ.get("FAKE_LLM_TTFT_MS", "600"))
+FAKE_LLM_TTFT_SIGMA = float(os.environ.get("FAKE_LLM_TTFT_SIGMA", "0.5"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", "80"))
+FAKE_LLM_ERROR_RATE = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_TRUNCATE_RATE = float(os.environ.get("FAKE_LLM_TRUNCATE_RATE", "0"))
+FAKE_LLM_HANG_RATE = float(os.environ.get("FAKE_LLM_HANG_RATE", "0"))
+FAKE_LLM_HANG_SECONDS = float(os.environ.get("FAKE_LLM_HANG_SECONDS", "300"))
+# Share of JSON replies wrapped in a markdown fence
+FAKE_LLM_FENCE_RATE = 0.3
+# Characters per streamed delta
+CHUNK_CHARS = 24
+
+_rng = random.Random(os.environ.get("FAKE_LLM_SEED"))
+
+
+class FakeProviderError(Exception):
+    pass
+
+
+# ─── Reply Templates ───
+
+BENEFITS = [
+    "up to 60% lower heating and cooling bills", "walls rated for 250 mph winds", "a 4-hour fire rating",
+    "quiet interiors with STC 50+ walls", "no rot, mold or termite food", "R-23+ continuous insulation",
+]
+HASHTAGS = ["#ICF", "#ICFconstruction", "#EnergyEfficient", "#BuildSmart", "#StormReady", "#CustomHomes", "#NetZero"]
+KEYWORDS = ["ICF construction", "insulated concrete forms", "energy efficient homes", "storm resistant homes",
+            "ICF contractor", "concrete home builder"]
+CTAS = ["Get a free ICF quote", "Book a site visit", "Download our ICF cost guide", "Talk to an ICF expert"]
+CONTENT_TYPES = ["educational", "promotional", "testimonial", "tip", "behind_the_scenes"]
+TIMES = ["8:00 AM", "12:30 PM", "6:00 PM", "7:30 PM"]
+INTAKE_QUESTIONS = [
+    "Great to meet you! Where will the project be built (city and state)?",
+    "Thanks! What's the best email or phone number to reach you?",
+    "Do you have any blueprints, sketches, or plans? If yes, please upload them using the paperclip icon.",
+    "How can I assist you with your project today? I can review your layout, answer technical questions, "
+    "or help with cost estimates.",
+    "Good question. ICF walls typically add 3-5% to the build cost and pay it back in energy savings within "
+    "a few years. Anything else you'd like to know?",
+]
+
+
+def _pick(options: list, n: int) -> list:
+    return _rng.sample(options, min(n, len(options)))
+
+
+def _json(value) -> str:
+    text = json.dumps(value, indent=2)
+    return f"```json\n{text}\n```" if _rng.random() < FAKE_LLM_FENCE_RATE else text
+
+
+def _number(pattern: str, text: str, default: int) -> int:
+    match = re.search(pattern, text)
+    return int(match.group(1)) if match else default
+
+
+def _line(label: str, text: str, default: str = "") -> str:
+    match = re.search(rf"{label}:\s*(.+)", text)
+    return match.group(1).strip() if match else default
+
+
+def content_reply(prompt: str) -> str:
+    count = _number(r"Generate (\d+) unique", prompt, 3)
+    topic = _line("Topic focus", prompt, "ICF construction")
+    return _json([{
+        "text": f"Thinking about {topic.lower()}? ICF homes give you {_rng.choice(BENEFITS)}. "
+                f"Here's why more families are choosing insulated concrete forms this year.",
+        "hashtags": _pick(HASHTAGS, 4),
+        "cta": _rng.choice(CTAS),
+        "seo_keywords": _pick(KEYWORDS, 3),
+    } for _ in range(count)])
+
+
+def campaign_reply(prompt: str) -> str:
+    posts = _number(r"calendar with (\d+) posts", prompt, 7)
+    days = _number(r"Create a (\d+)-day", prompt, 30)
+    platforms = [p.strip() for p in _line("Platforms", prompt, "facebook").split(",") if p.strip()]
+    return _json({
+        "strategy": f"Build awareness of ICF benefits over {days} days, then convert interest into consultations.",
+        "content_calendar": [{
+            "day": i * days // posts + 1,
+            "platform": platforms[i % len(platforms)],
+            "content_type": _rng.choice(CONTENT_TYPES),
+            "post_text": f"Day {i * days // posts + 1}: ICF homes deliver {_rng.choice(BENEFITS)}.",
+            "hashtags": _pick(HASHTAGS, 3),
+            "best_time": _rng.choice(TIMES),
+            "cta": _rng.choice(CTAS),
+        } for i in range(posts)],
+        "seo_keywords": _pick(KEYWORDS, 4),
+        "target_metrics": {"reach": f"{_rng.randint(5, 50)}k", "engagement": f"{_rng.randint(2, 8)}%"},
+    })
+
+
+def narrative_reply(prompt: str) -> str:
+    name = _line("Name", prompt, "there")
+    return _json({
+        "insights": f"{name}'s budget and timeline line up with the score; the project description shows "
+                    f"real planning, so treat this as an active opportunity.",
+        "follow_up_message": f"Hi {name}, thanks for your interest in building with ICF. "
+                             f"Do you have 15 minutes this week to talk through your plans?",
+    })
+
+
+def message_reply(system_message: str, prompt: str) -> str:
+    match = re.search(r"\bto ([^.\n]+)\.", prompt)
+    name = match.group(1).strip() if match else "there"
+    body = f"Hi {name}, following up on your ICF project. We'd love to walk you through next steps."
+    if "'subject'" in system_message:
+        return _json({"subject": "Next steps for your ICF project", "body": body + "\n\nBest regards"})
+    return _json({"subject": None, "body": body[:150]})
+
+
+def intake_reply(prompt: str) -> str:
+    current = _line(r"Homeowner \(Current\)", prompt)
+    if re.search(r"\b(match|contractor)", current, re.IGNORECASE):
+        return "COMPLETE: Thank you! I'm matching you with ICF contractors in your area; they'll reach out shortly."
+    turn = prompt.count("Homeowner:")
+    return INTAKE_QUESTIONS[min(turn, len(INTAKE_QUESTIONS) - 1)]
+
+
+def summary_reply(prompt: str) -> str:
+    return "\n".join([
+        "- Name: Homeowner", "- Location: Unknown", "- Contact: Unknown",
+        "- Project Type/Size: New home, about 2,500 sq ft", "- Budget: Unknown", "- Timeline: Unknown",
+        "- Key Requirements: energy efficiency, storm resistance", "- Blueprint Insights: none uploaded",
+        "- Next Steps: match with a local ICF contractor",
+    ])
+
+
+def vision_reply(prompt: str) -> str:
+    return ("Single-story plan with 3 bedrooms, 2 baths and an open kitchen/living area. Exterior walls are "
+            "straight runs with few corners, which suits ICF well; the garage wall is a good safe-room candidate.")
+
+
+def advisor_reply(prompt: str) -> str:
+    return (f"Great question! Insulated Concrete Forms combine foam insulation with a reinforced concrete core, "
+            f"giving you {_rng.choice(BENEFITS)} and {_rng.choice(BENEFITS)}. Build cost usually runs 3-5% above "
+            f"wood framing, offset by lower energy and insurance costs. Want help finding an ICF contractor?")
+
+
+def fake_reply(system_message: str, prompt: str) -> str:
+    """The reply a route expects for this prompt, chosen from its output instructions."""
+    if "content_calendar" in prompt:
+        return campaign_reply(prompt)
+    if "JSON array with objects containing: text, hashtags" in prompt:
+        return content_reply(prompt)
+    if "insights, follow_up_message" in prompt:
+        return narrative_reply(prompt)
+    if "'body' field" in system_message:
+        return message_reply(system_message, prompt)
+    if "Homeowner (Current):" in prompt:
+        return intake_reply(prompt)
+    if "summar" in system_message.lower():
+        return summary_reply(prompt)
+    if "floor plan" in system_message:
+        return vision_reply(prompt)
+    return advisor_reply(prompt)
+
+
+# ─── Chat ───
+
+class FakeChat:
+    """Stands in for LlmChat: same constructor, with_model(), send_message() and stream_message()."""
+
+    def __init__(self, api_key: str, session_id: str, system_message: str):
+        self.session_id = session_id
+        self.system_message = system_message
+        self.model = None
+        self.messages = []
+
+    def with_model(self, provider: str, model: str):
+        self.model = (provider, model)
+        return self
+
+    async def _first_token(self) -> str:
+        """Wait out the time to first token; returns "error", "truncate" or "ok"."""
+        roll = _rng.random()
+        if roll < FAKE_LLM_HANG_RATE:
+            await asyncio.sleep(FAKE_LLM_HANG_SECONDS)
+            raise FakeProviderError("Fake provider timed out")
+        await asyncio.sleep(_rng.lognormvariate(math.log(max(FAKE_LLM_TTFT_MS, 1) / 1000), FAKE_LLM_TTFT_SIGMA))
+        roll -= FAKE_LLM_HANG_RATE
+        if roll < FAKE_LLM_ERROR_RATE:
+            return "error"
+        return "truncate" if roll - FAKE_LLM_ERROR_RATE < FAKE_LLM_TRUNCATE_RATE else "ok"
+
+    def _reply(self, message) -> str:
+        text = getattr(message, "text", "")
+        reply = fake_reply(self.system_message, text)
+        self.messages += [{"role": "user", "content": text}, {"role": "assistant", "content": reply}]
+        return reply
+
+    async def send_message(self, message) -> str:
+        outcome = await self._first_token()
+        if outcome == "error":
+            raise FakeProviderError("Fake provider error")
+        reply = self._reply(message)
+        if FAKE_LLM_TOKENS_PER_SECOND > 0:
+            await asyncio.sleep(len(reply) / 4 / FAKE_LLM_TOKENS_PER_SECOND)
+        if outcome == "truncate":
+            raise FakeProviderError("Fake provider dropped the connection")
+        return reply
+
+    async def stream_message(self, message):
+        outcome = await self._first_token()
+        if outcome == "error":
+            raise FakeProviderError("Fake provider error")
+        reply = self._reply(message)
+        end = len(reply) // 2 if outcome == "truncate" else len(reply)
+        for start in range(0, end, CHUNK_CHARS):
+            chunk = reply[start:min(start + CHUNK_CHARS, end)]
+            if start and FAKE_LLM_TOKENS_PER_SECOND > 0:
+                await asyncio.sleep(len(chunk) / 4 / FAKE_LLM_TOKENS_PER_SECOND)
+            yield chunk
+        if outcome == "truncate":
+            raise FakeProviderError("Fake provider dropped the connection")
@@ -0,0 +1,197 @@
+"""
+Declarative Mongo index registry.
+
+INDEXES is applied idempotently at startup. QUERY_SHAPES lists every
+filter/sort combination the routes issue; `python -m index_helper --check`
+runs explain() on each of them and exits non-zero if any plan falls back to a
+collection scan. Add a shape here whenever a route gains a new query.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "contractors": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("plan", ASCENDING)], name="plan"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "leads": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_at_id"),
+    ],
+    "intake_chats": [
+        IndexModel([("session_id", ASCENDING), ("created_at", ASCENDING)], name="session_created_at"),
+    ],
+    "chat_messages": [
+        IndexModel([("session_id", ASCENDING), ("created_at", ASCENDING)], name="session_created_at"),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("contractor_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="contractor_created_at_id"),
+        IndexModel([("contractor_id", ASCENDING), ("read", ASCENDING)], name="contractor_read"),
+        IndexModel([("read", ASCENDING), ("contractor_id", ASCENDING)], name="read_contractor"),
+    ],
+    "broadcast_notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "scheduled_posts": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("contractor_id", ASCENDING), ("scheduled_date", ASCENDING), ("id", ASCENDING)], name="contractor_scheduled_date_id"),
+    ],
+    "campaigns": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("contractor_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="contractor_created_at_id"),
+        # Job claims: queued jobs that are due, and running jobs whose lease expired
+        IndexModel([("generation.state", ASCENDING), ("generation.run_after", ASCENDING)], name="generation_state_run_after"),
+        IndexModel([("generation.state", ASCENDING), ("generation.lease_until", ASCENDING)], name="generation_state_lease_until"),
+    ],
+    "generated_content": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("contractor_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="contractor_created_at_id"),
+    ],
+    "social_accounts": [
+        IndexModel([("contractor_id", ASCENDING), ("platform", ASCENDING)], name="contractor_platform"),
+        IndexModel([("contractor_id", ASCENDING), ("connected", ASCENDING)], name="contractor_connected"),
+    ],
+    "integrations": [
+        IndexModel([("user_id", ASCENDING), ("provider", ASCENDING)], name="user_provider_unique", unique=True),
+    ],
+    "payment_transactions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("session_id", ASCENDING)], name="session_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ],
+    "llm_usage": [
+        IndexModel([("cost_usd", DESCENDING)], name="cost_usd"),
+    ],
+    "revoked_tokens": [
+        # Entries disappear once the token they revoke has expired on its own
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# (collection, filter, sort) for every query the routes run. Values are
+# placeholders; only the shape matters to the planner. Shapes marked
+# allow_collscan read the whole (small, capped) collection by design.
+QUERY_SHAPES = [
+    {"collection": "contractors", "filter": {"email": "x"}},
+    {"collection": "contractors", "filter": {"id": "x"}},
+    {"collection": "contractors", "filter": {"plan": {"$ne": "free"}}},
+    {"collection": "contractors", "filter": {"plan": "pro"}},
+    {"collection": "contractors", "filter": {}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "contractors", "filter": {}, "allow_collscan": True},
+    {"collection": "leads", "filter": {"id": "x"}},
+    {"collection": "leads", "filter": {}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "leads", "filter": {"id": {"$in": ["x", "y"]}}},
+    {"collection": "leads", "filter": {"status": "pending_match"}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "leads", "filter": {"$or": [{"created_at": {"$lt": "x"}}, {"created_at": "x", "id": {"$lt": "x"}}]},
+     "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "intake_chats", "filter": {"session_id": "x"}, "sort": [("created_at", 1)]},
+    {"collection": "intake_chats", "filter": {"session_id": "x"}, "sort": [("created_at", -1)]},
+    {"collection": "intake_chats", "filter": {"session_id": "x", "created_at": {"$gt": "x"}}, "sort": [("created_at", -1)]},
+    {"collection": "chat_messages", "filter": {"session_id": "x"}, "sort": [("created_at", 1)]},
+    {"collection": "chat_messages", "filter": {"session_id": "x"}, "sort": [("created_at", -1)]},
+    {"collection": "notifications", "filter": {"contractor_id": "x"}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "notifications", "filter": {"contractor_id": "x", "read": False}},
+    {"collection": "notifications", "filter": {"id": "x", "contractor_id": "x", "read": False}},
+    {"collection": "notifications", "filter": {"read": False}},
+    {"collection": "broadcast_notifications", "filter": {"id": "x"}},
+    {"collection": "broadcast_notifications", "filter": {"created_at": {"$gt": "x"}}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "scheduled_posts", "filter": {"id": "x"}},
+    {"collection": "scheduled_posts", "filter": {"id": "x", "contractor_id": "x"}},
+    {"collection": "scheduled_posts", "filter": {"contractor_id": "x"}, "sort": [("scheduled_date", 1), ("id", 1)]},
+    {"collection": "campaigns", "filter": {"id": "x", "contractor_id": "x"}},
+    {"collection": "campaigns", "filter": {"contractor_id": "x"}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "campaigns", "filter": {"$or": [
+        {"generation.state": "queued", "generation.run_after": {"$lte": "x"}},
+        {"generation.state": "running", "generation.lease_until": {"$lt": "x"}, "generation.attempts": {"$lt": 3}},
+    ]}, "sort": [("generation.run_after", 1)]},
+    {"collection": "campaigns", "filter": {"generation.state": "running", "generation.lease_until": {"$lt": "x"},
+                                           "generation.attempts": {"$gte": 3}}},
+    {"collection": "generated_content", "filter": {"id": "x", "contractor_id": "x"}},
+    {"collection": "generated_content", "filter": {"contractor_id": "x"}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "social_accounts", "filter": {"contractor_id": "x"}},
+    {"collection": "social_accounts", "filter": {"contractor_id": "x", "platform": "x"}},
+    {"collection": "social_accounts", "filter": {"contractor_id": "x", "platform": "x", "connected": True}},
+    {"collection": "social_accounts", "filter": {"contractor_id": "x", "connected": True}},
+    {"collection": "integrations", "filter": {"user_id": "x", "provider": "hubspot"}},
+    {"collection": "payment_transactions", "filter": {"session_id": "x"}},
+    {"collection": "payment_transactions", "filter": {}, "sort": [("created_at", -1), ("id", -1)]},
+    {"collection": "llm_usage", "filter": {"_id": {"$ne": "global"}}, "sort": [("cost_usd", -1)]},
+    {"collection": "revoked_tokens", "filter": {"_id": "x"}},
+]
+
+
+async def ensure_indexes(db):
+    """Create every registered index. Safe to call on each startup."""
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except PyMongoError as e:
+            # Don't block startup on a conflicting/duplicate-key index; log and keep going
+            logger.error(f"Index creation failed for {collection}: {e}")
+
+
+def _find_stages(plan, found):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.append(plan["stage"])
+        for value in plan.values():
+            _find_stages(value, found)
+    elif isinstance(plan, list):
+        for item in plan:
+            _find_stages(item, found)
+    return found
+
+
+async def check_query_coverage(db):
+    """Explain every registered query shape; return the ones that COLLSCAN."""
+    failures = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explain = await cursor.explain()
+        stages = _find_stages(explain.get("queryPlanner", {}).get("winningPlan", {}), [])
+        if "COLLSCAN" in stages and not shape.get("allow_collscan"):
+            failures.append({**shape, "stages": stages})
+    return failures
+
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        print(f"Applied indexes for {len(INDEXES)} collections")
+        if not args.check:
+            return 0
+        failures = await check_query_coverage(db)
+        for f in failures:
+            print(f"COLLSCAN: {f['collection']} filter={f['filter']} sort={f.get('sort')} stages={f['stages']}")
+        print(f"Checked {len(QUERY_SHAPES)} query shapes, {len(failures)} collection scans")
+        return 1 if failures else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply Mongo indexes and optionally verify query coverage")
+    parser.add_argument("--check", action="store_true", help="explain() every query shape and fail on COLLSCAN")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
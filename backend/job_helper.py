@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# ─── Background Jobs ───
+# Long LLM generations run as jobs instead of inside the HTTP request. A job
+# lives on the document it produces (e.g. campaigns.generation), so its state,
+# progress and result survive restarts and are visible to every worker:
+#   queued -> running -> succeeded | failed | cancelled
+# Workers claim jobs with an atomic find_one_and_update and hold a lease they
+# renew while running. A job whose worker died is reclaimed once its lease
+# expires; failures are retried with exponential backoff up to
+# JOB_MAX_ATTEMPTS. Cancelling flips the state in Mongo: the running worker
+# notices on its next lease renewal (or at once, if it's this process) and
+# any result it produces afterwards is discarded.
+
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", "2"))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "5"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "10"))
+# How often an SSE watcher re-reads a job
+JOB_WATCH_SECONDS = float(os.environ.get("JOB_WATCH_SECONDS", "1"))
+
+ACTIVE_STATES = ("queued", "running")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def public_job(job: dict) -> dict:
+    """The client-facing view of a job (no lease bookkeeping)."""
+    return {k: job.get(k) for k in ("job_id", "state", "attempts", "progress", "error",
+                                     "queued_at", "started_at", "finished_at")}
+
+
+class JobQueue:
+    """
+    Jobs stored under `field` on documents of `collection`, keyed by their
+    "id". `run(doc, report)` does the work and returns the fields to $set on
+    success; `report(append=None, **progress)` sets progress fields and
+    pushes each append value onto a progress list. `on_success(before,
+    updates)` runs after the result is written, with the document as it was.
+    `reset_progress` holds the progress fields each attempt starts from; they
+    are restored when an attempt is claimed and when one fails, so a retry
+    doesn't append to what a failed attempt reported.
+    """
+
+    def __init__(self, name: str, collection, field: str, run, on_success=None, reset_progress: dict = None):
+        self.name = name
+        self.collection = collection
+        self.field = field
+        self.run = run
+        self.on_success = on_success
+        self.reset_progress = reset_progress or {}
+        self.worker_id = f"{name}-{uuid.uuid4().hex[:8]}"
+        self._wake = asyncio.Event()
+        self._running = {}  # job_id -> Task
+        self.counts = {"claimed": 0, "succeeded": 0, "failed": 0, "retried": 0, "cancelled": 0, "recovered": 0}
+
+    def _f(self, key: str) -> str:
+        return f"{self.field}.{key}"
+
+    def _progress_reset(self) -> dict:
+        return {self._f(f"progress.{k}"): v for k, v in self.reset_progress.items()}
+
+    # ── Client side ──
+
+    async def submit(self, doc_filter: dict, progress: dict = None) -> dict:
+        """Queue a job unless one is already active; returns the active job either way."""
+        now = _iso(_now())
+        job = {
+            "job_id": str(uuid.uuid4()), "state": "queued", "attempts": 0,
+            "progress": progress or {}, "error": None,
+            "queued_at": now, "run_after": now, "started_at": None, "finished_at": None,
+            "lease_until": None, "worker": None,
+        }
+        doc = await self.collection.find_one_and_update(
+            {**doc_filter, self._f("state"): {"$nin": list(ACTIVE_STATES)}},
+            {"$set": {self.field: job}},
+            projection={"_id": 0, self.field: 1}, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            doc = await self.collection.find_one(doc_filter, {"_id": 0, self.field: 1})
+            return (doc or {}).get(self.field)
+        self._wake.set()
+        return doc[self.field]
+
+    async def cancel(self, doc_filter: dict, job_id: str) -> bool:
+        result = await self.collection.update_one(
+            {**doc_filter, self._f("job_id"): job_id, self._f("state"): {"$in": list(ACTIVE_STATES)}},
+            {"$set": {self._f("state"): "cancelled", self._f("finished_at"): _iso(_now()),
+                      self._f("lease_until"): None}}
+        )
+        if not result.modified_count:
+            return False
+        self.counts["cancelled"] += 1
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return True
+
+    # ── Worker side ──
+
+    async def _claim(self):
+        now = _now()
+        claim = {
+            self._f("state"): "running", self._f("worker"): self.worker_id,
+            self._f("started_at"): _iso(now), self._f("lease_until"): _iso(now + timedelta(seconds=JOB_LEASE_SECONDS)),
+        }
+        doc = await self.collection.find_one_and_update(
+            {"$or": [
+                {self._f("state"): "queued", self._f("run_after"): {"$lte": _iso(now)}},
+                # A worker stopped mid-job; pick it up again
+                {self._f("state"): "running", self._f("lease_until"): {"$lt": _iso(now)},
+                 self._f("attempts"): {"$lt": JOB_MAX_ATTEMPTS}},
+            ]},
+            {"$set": {**claim, **self._progress_reset()}, "$inc": {self._f("attempts"): 1}},
+            sort=[(self._f("run_after"), 1)],
+            projection={"_id": 0}, return_document=ReturnDocument.BEFORE
+        )
+        if doc is None:
+            return None
+        if doc[self.field]["state"] == "running":
+            self.counts["recovered"] += 1
+            logger.warning(f"{self.name}: recovered job {doc[self.field]['job_id']} from {doc[self.field]['worker']}")
+        doc[self.field].update({k.split(".", 1)[1]: v for k, v in claim.items()})
+        doc[self.field].setdefault("progress", {}).update(self.reset_progress)
+        doc[self.field]["attempts"] += 1
+        self.counts["claimed"] += 1
+        return doc
+
+    async def _expire_abandoned(self):
+        # Jobs whose worker died on their last attempt won't be claimed again
+        now = _iso(_now())
+        await self.collection.update_many(
+            {self._f("state"): "running", self._f("lease_until"): {"$lt": now},
+             self._f("attempts"): {"$gte": JOB_MAX_ATTEMPTS}},
+            {"$set": {self._f("state"): "failed", self._f("error"): "Worker stopped before the job finished",
+                      self._f("finished_at"): now, self._f("lease_until"): None, **self._progress_reset()}}
+        )
+
+    def _mine(self, doc: dict) -> dict:
+        job = doc[self.field]
+        return {"id": doc["id"], self._f("job_id"): job["job_id"], self._f("state"): "running",
+                self._f("worker"): self.worker_id}
+
+    async def _renew_lease(self, doc: dict, task: asyncio.Task):
+        while not task.done():
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            lease_until = _iso(_now() + timedelta(seconds=JOB_LEASE_SECONDS))
+            result = await self.collection.update_one(self._mine(doc), {"$set": {self._f("lease_until"): lease_until}})
+            if not result.matched_count:
+                # Cancelled, or reclaimed after we stalled; stop working on it
+                task.cancel()
+                return
+
+    async def _execute(self, doc: dict):
+        job = doc[self.field]
+        mine = self._mine(doc)
+
+        async def report(append: dict = None, **progress):
+            update = {"$set": {self._f(f"progress.{k}"): v for k, v in progress.items()}}
+            if append:
+                update["$push"] = {self._f(f"progress.{k}"): v for k, v in append.items()}
+            await self.collection.update_one(mine, update)
+
+        task = asyncio.ensure_future(self.run(doc, report))
+        self._running[job["job_id"]] = task
+        renewer = asyncio.ensure_future(self._renew_lease(doc, task))
+        try:
+            updates = await task
+        except asyncio.CancelledError:
+            logger.info(f"{self.name}: job {job['job_id']} stopped (cancelled)")
+            return
+        except Exception as e:
+            await self._failed(doc, e)
+            return
+        finally:
+            renewer.cancel()
+            self._running.pop(job["job_id"], None)
+
+        now = _iso(_now())
+        before = await self.collection.find_one_and_update(
+            mine,
+            {"$set": {**updates, self._f("state"): "succeeded", self._f("finished_at"): now,
+                      self._f("lease_until"): None, self._f("error"): None}},
+            projection={"_id": 0, self.field: 0}
+        )
+        if before is None:
+            logger.info(f"{self.name}: discarded result of job {job['job_id']} (no longer active)")
+            return
+        self.counts["succeeded"] += 1
+        if self.on_success is not None:
+            await self.on_success(before, updates)
+
+    async def _failed(self, doc: dict, error: Exception):
+        job = doc[self.field]
+        logger.error(f"{self.name}: job {job['job_id']} attempt {job['attempts']} failed: {error}")
+        now = _now()
+        if job["attempts"] < JOB_MAX_ATTEMPTS:
+            delay = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+            update = {self._f("state"): "queued", self._f("run_after"): _iso(now + timedelta(seconds=delay))}
+            self.counts["retried"] += 1
+        else:
+            update = {self._f("state"): "failed", self._f("finished_at"): _iso(now)}
+            self.counts["failed"] += 1
+        await self.collection.update_one(
+            self._mine(doc), {"$set": {**update, **self._progress_reset(), self._f("error"): str(error),
+                                       self._f("lease_until"): None}}
+        )
+
+    async def run_worker(self):
+        slots = asyncio.Semaphore(JOB_CONCURRENCY)
+
+        def finished(_):
+            slots.release()
+            self._wake.set()
+
+        while True:
+            self._wake.clear()
+            try:
+                await self._expire_abandoned()
+                while True:
+                    await slots.acquire()
+                    doc = None
+                    try:
+                        doc = await self._claim()
+                    finally:
+                        if doc is None:
+                            slots.release()
+                    if doc is None:
+                        break
+                    asyncio.ensure_future(self._execute(doc)).add_done_callback(finished)
+            except Exception as e:
+                logger.error(f"{self.name}: worker loop error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        return {"worker": self.worker_id, "running": len(self._running), "concurrency": JOB_CONCURRENCY,
+                **self.counts}
@@ -0,0 +1,319 @@
+import codecs
+import json
+from contextlib import aclosing
+
+# ─── Incremental JSON ───
+# Splits a top-level JSON array into its elements as bytes arrive, so callers
+# can validate and persist each element without buffering the whole body.
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class JsonArrayItems:
+    """Feed chunks of a JSON array; get back the raw text of each completed element."""
+
+    def __init__(self, max_item_chars: int = None):
+        self.max_item_chars = max_item_chars
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item = []
+        self._oversized = False
+
+    def _check_size(self):
+        if self._oversized:
+            raise JsonStreamError(f"Array element is over {self.max_item_chars} characters")
+
+    def feed(self, chunk) -> list:
+        self._check_size()
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        items = []
+        for ch in chunk:
+            if self._finished:
+                if not ch.isspace():
+                    raise JsonStreamError("Unexpected data after end of array")
+                continue
+            if not self._started:
+                if ch.isspace():
+                    continue
+                if ch != "[":
+                    raise JsonStreamError("Expected a JSON array")
+                self._started = True
+                continue
+
+            if self.max_item_chars is not None and len(self._item) >= self.max_item_chars:
+                # Hand back the elements before it; the next feed() or close() raises
+                self._oversized = True
+                break
+
+            if self._in_string:
+                self._item.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0 and ch in ",]":
+                text = "".join(self._item).strip()
+                self._item = []
+                if text:
+                    items.append(text)
+                elif ch == ",":
+                    raise JsonStreamError("Empty array element")
+                if ch == "]":
+                    self._finished = True
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+            if self._item or not ch.isspace():
+                self._item.append(ch)
+        return items
+
+    def close(self):
+        self._check_size()
+        self.feed(self._decoder.decode(b"", final=True))
+        if not self._finished:
+            raise JsonStreamError("Unterminated JSON array")
+
+
+# ─── LLM JSON Replies ───
+# Models wrap JSON in ``` fences, add a sentence before or after it, leave
+# trailing commas and get cut off mid-object when they hit a length limit.
+# LlmJson takes the reply as it streams: it skips anything before the first
+# { or [ (and rescans from the next one if that turns out not to be JSON, as
+# with a brace in prose), hands back each object element of the array at
+# `items_at` as soon as that object closes, and result() returns the whole
+# value, repaired if it was truncated (open strings and containers are
+# closed; if that still doesn't parse, the reply is cut back to the last
+# complete element). A repair that recovers nothing is an error, not {}.
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _strip_trailing_commas(text: str) -> str:
+    out, in_string, escape, comma = [], False, False, None
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            comma = len(out)
+        elif ch in "}]" and comma is not None:
+            del out[comma]
+        if not ch.isspace() and ch != ",":
+            comma = None
+        out.append(ch)
+    return "".join(out)
+
+
+class LlmJson:
+    def __init__(self, items_at: tuple = None):
+        """`items_at` is the key path of the array whose objects to emit: () for a top-level array."""
+        self.items_at = items_at
+        self.repaired = False
+        self._reset()
+
+    def _reset(self):
+        self._chars = []
+        self._stack = []        # [opener, key path of this container, pending key]
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._item_start = None
+        self._safe = None       # (length, closers) after the last complete element
+        self._done = False
+        self._value = None
+
+    def _restart(self) -> str:
+        # The candidate wasn't JSON (a brace in prose); rescan from just after its opener
+        rest = self.text[1:]
+        self._reset()
+        return rest
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chars)
+
+    def _path(self) -> tuple:
+        return self._stack[-1][1] if self._stack else None
+
+    def feed(self, chunk: str) -> list:
+        items = []
+        while chunk:
+            chunk = self._scan(chunk, items)
+        return items
+
+    def _scan(self, chunk: str, items: list) -> str:
+        """Consume `chunk`, adding completed items; returns text to rescan after a restart."""
+        for i, ch in enumerate(chunk):
+            if self._done:
+                return ""
+            if not self._stack and not self._chars:
+                if ch not in "{[":
+                    continue  # prose or a code fence before the JSON
+            self._chars.append(ch)
+            pos = len(self._chars) - 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._chars[self._string_start + 1:pos])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":" and self._stack and self._stack[-1][0] == "{":
+                self._stack[-1][2] = self._last_string
+            elif ch in "{[":
+                if not self._stack:
+                    path = ()
+                elif self._stack[-1][0] == "{":
+                    path = self._stack[-1][1] + (self._stack[-1][2],)
+                else:
+                    path = self._stack[-1][1] + (None,)
+                if ch == "{" and self._stack and self._stack[-1][0] == "[" and self._stack[-1][1] == self.items_at:
+                    self._item_start = pos
+                self._stack.append([ch, path, None])
+                if len(self._stack) == 1:
+                    self._safe = (len(self._chars), self._closers())
+            elif ch in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if (ch == "}" and self._item_start is not None and self._stack
+                        and self._stack[-1][0] == "[" and self._stack[-1][1] == self.items_at):
+                    item = self._load(self.text[self._item_start:])
+                    self._item_start = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                if self._stack:
+                    self._safe = (len(self._chars), self._closers())
+                else:
+                    self._value = self._load(self.text)
+                    if self._value is None:
+                        return self._restart() + chunk[i + 1:]
+                    self._done = True  # anything after the value (a closing fence, prose) is ignored
+            elif ch == "," and self._stack:
+                self._safe = (len(self._chars) - 1, self._closers())
+        return ""
+
+    def _closers(self) -> str:
+        return "".join(_CLOSERS[opener] for opener, _, _ in reversed(self._stack))
+
+    @staticmethod
+    def _load(text: str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                return json.loads(_strip_trailing_commas(text))
+            except json.JSONDecodeError:
+                return None
+
+    def _repair(self):
+        # A truncated value: close what's open, else cut back to the last complete
+        # element. An empty result means nothing was recovered, not an empty reply.
+        text = self.text
+        attempt = text + ('"' if self._in_string else "")
+        value = self._load(attempt.rstrip().rstrip(",:") + self._closers())
+        if value:
+            return value
+        if self._safe is not None and self._safe[0] > 1:
+            length, closers = self._safe
+            value = self._load(text[:length].rstrip().rstrip(",") + closers)
+            if value:
+                return value
+        return None
+
+    def result(self):
+        """The parsed value; raises JsonStreamError when there's nothing usable."""
+        if not self._chars:
+            raise JsonStreamError("No JSON value in reply")
+        while self._chars:
+            if self._done:
+                self.repaired = False
+                return self._value
+            value = self._repair()
+            if value is not None:
+                self.repaired = True
+                return value
+            self.feed(self._restart())
+        raise JsonStreamError("Unrecoverable JSON in reply")
+
+
+def parse_llm_json(reply: str, items_at: tuple = None):
+    """Parse a complete model reply with LlmJson's fence and truncation repair."""
+    parser = LlmJson(items_at)
+    parser.feed(reply)
+    return parser.result()
+
+
+class PartialReply(Exception):
+    """The reply stream failed part way; `value` is what could be recovered from it (or None)."""
+
+    def __init__(self, value, reply: str):
+        super().__init__("Reply stream ended early")
+        self.value = value
+        self.reply = reply
+
+
+async def parse_llm_stream(deltas, items_at: tuple = None, on_item=None):
+    """
+    Consume reply deltas, awaiting on_item(item) for each completed element
+    of the `items_at` array. Returns (value, raw_reply); value is None if the
+    reply held no usable JSON. If `deltas` fails, or the reply was cut off and
+    only parsed after repair, raises PartialReply with whatever was recovered;
+    its last element may be incomplete. Errors from on_item propagate as-is.
+    """
+    parser = LlmJson(items_at)
+    parts = []
+
+    def recovered():
+        try:
+            return parser.result()
+        except JsonStreamError:
+            return None
+
+    async with aclosing(deltas):
+        iterator = deltas.__aiter__()
+        while True:
+            try:
+                delta = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                raise PartialReply(recovered(), "".join(parts)) from e
+            parts.append(delta)
+            for item in parser.feed(delta):
+                if on_item is not None:
+                    await on_item(item)
+    value = recovered()
+    if value is not None and parser.repaired:
+        raise PartialReply(value, "".join(parts)) from JsonStreamError("Reply was cut off")
+    return value, "".join(parts)
@@ -0,0 +1,355 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import time
+import uuid
+from contextlib import aclosing, asynccontextmanager
+
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+from fastapi import HTTPException
+
+from fake_llm_helper import FakeChat
+from metrics_helper import LatencyWindow
+from resilience_helper import breaker, guarded, guarded_stream, hedged, retrying, retrying_stream
+from sse_helper import stream_reply
+from usage_helper import llm_usage, message_tokens, model_name
+
+logger = logging.getLogger(__name__)
+
+# ─── LLM Calls ───
+# Stateless LLM calls (content, campaigns, scoring, messages, summaries,
+# vision) go through complete(). A call is fully described by its system
+# prompt, model and user prompt (plus any attachment), so concurrent callers
+# with the same key share one in-flight request and its result or error.
+# Nothing is cached once the call finishes: the next caller starts a new one.
+# Session chats that keep their own history are not coalesced here, except
+# for a brand-new session's first message, which has no history yet.
+# Every request names the route that made it (and the contractor, when there
+# is one) so usage_helper can attribute its tokens, latency and cost, and so
+# resilience_helper can apply that route's deadline. Stateless calls are
+# retried on provider errors; interactive ones may also be hedged.
+
+# Model used by the intake, summary and vision calls; None means LlmChat's default
+INTAKE_MODEL = ("openai", "gpt-5.2")
+
+# Chat classes new_chat() can build; "fake" answers offline (fake_llm_helper)
+PROVIDERS = {"emergent": LlmChat, "fake": FakeChat}
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "emergent")
+if LLM_PROVIDER not in PROVIDERS:
+    raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}; expected one of {', '.join(PROVIDERS)}")
+
+
+def flight_key(system_message: str, model, prompt: str, *extra: str) -> str:
+    digest = hashlib.sha256()
+    for part in (system_message, repr(model), prompt, *extra):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def new_chat(api_key: str, session_id: str, system_message: str, model=None):
+    chat = PROVIDERS[LLM_PROVIDER](api_key=api_key, session_id=session_id, system_message=system_message)
+    return chat.with_model(*model) if model else chat
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}  # key -> Future of the in-flight call
+        self.started = 0
+        self.joined = 0
+        self.failed = 0
+
+    def _track(self, key: str, future: asyncio.Future):
+        self._calls[key] = future
+        self.started += 1
+
+        def done(f):
+            if self._calls.get(key) is f:
+                del self._calls[key]
+            # Mark the error retrieved even when every caller has gone away
+            if not f.cancelled() and f.exception() is not None:
+                self.failed += 1
+
+        future.add_done_callback(done)
+
+    def join(self, key: str):
+        """The in-flight call for `key`, counted as joined, or None."""
+        future = self._calls.get(key)
+        if future is not None:
+            self.joined += 1
+        return future
+
+    async def run(self, key: str, call):
+        """Await call() unless an identical one is already running; share its outcome either way."""
+        future = self.join(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._track(key, future)
+        # Shielded so one caller disconnecting doesn't cancel the call for the rest
+        return await asyncio.shield(future)
+
+    async def lead_stream(self, key: str, deltas):
+        """Pass `deltas` through while publishing the joined text to callers that join `key`."""
+        future = asyncio.get_running_loop().create_future()
+        self._track(key, future)
+        parts = []
+        try:
+            # aclosing: a reader that stops early ends the underlying request now, not at GC
+            async with aclosing(deltas):
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield delta
+            future.set_result("".join(parts))
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if not future.done():
+                future.set_exception(RuntimeError("Leading stream was abandoned"))
+
+    def stats(self) -> dict:
+        total = self.started + self.joined
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "joined": self.joined,
+            "failed": self.failed,
+            "shared_rate": round(self.joined / total, 4) if total else 0.0,
+        }
+
+
+single_flight = SingleFlight()
+
+
+# ─── Concurrency Governor ───
+# Every LLM request holds one of LLM_MAX_CONCURRENCY process-wide slots while
+# it runs. Waiters are served strictly by priority class, then arrival:
+#   interactive - homeowner intake and advisor chat (the revenue path)
+#   standard    - lead scoring and outreach messages
+#   batch       - content batches and campaign calendars
+# LLM_INTERACTIVE_RESERVE slots are only ever given to interactive calls, so
+# long batch jobs can't occupy the whole pool. A waiter that isn't served
+# within its class deadline gets a 503 with Retry-After instead of hanging.
+
+INTERACTIVE, STANDARD, BATCH = 0, 1, 2
+PRIORITY_NAMES = ("interactive", "standard", "batch")
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_INTERACTIVE_RESERVE = int(os.environ.get("LLM_INTERACTIVE_RESERVE", "2"))
+LLM_QUEUE_DEADLINES = (
+    float(os.environ.get("LLM_QUEUE_DEADLINE_INTERACTIVE", "20")),
+    float(os.environ.get("LLM_QUEUE_DEADLINE_STANDARD", "60")),
+    float(os.environ.get("LLM_QUEUE_DEADLINE_BATCH", "180")),
+)
+
+
+class LlmGovernor:
+    def __init__(self, limit: int = LLM_MAX_CONCURRENCY, reserve: int = LLM_INTERACTIVE_RESERVE,
+                 deadlines: tuple = LLM_QUEUE_DEADLINES):
+        self.limit = max(limit, 1)
+        self.reserve = min(max(reserve, 0), self.limit - 1)
+        self.deadlines = deadlines
+        self._queue = []  # heap of [priority, seq, future]
+        self._seq = itertools.count()
+        self._active = [0] * len(PRIORITY_NAMES)
+        self._queued = [0] * len(PRIORITY_NAMES)
+        self._granted = [0] * len(PRIORITY_NAMES)
+        self._expired = [0] * len(PRIORITY_NAMES)
+        self._waits = [LatencyWindow() for _ in PRIORITY_NAMES]
+
+    def _can_run(self, priority: int) -> bool:
+        if sum(self._active) >= self.limit:
+            return False
+        return priority == INTERACTIVE or sum(self._active[1:]) < self.limit - self.reserve
+
+    def _grant(self, priority: int):
+        self._active[priority] += 1
+        self._granted[priority] += 1
+
+    def _dispatch(self):
+        # The heap head is the most urgent waiter; if it can't run, nothing behind it can
+        while self._queue:
+            priority, _, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._can_run(priority):
+                break
+            heapq.heappop(self._queue)
+            self._queued[priority] -= 1
+            self._grant(priority)
+            future.set_result(None)
+
+    def idle(self, priority: int) -> bool:
+        """Whether a `priority` call would get a slot right away."""
+        return not any(self._queued[:priority + 1]) and self._can_run(priority)
+
+    async def acquire(self, priority: int):
+        started = time.perf_counter()
+        if self.idle(priority):
+            self._grant(priority)
+            self._waits[priority].observe(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [priority, next(self._seq), future])
+        self._queued[priority] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.deadlines[priority])
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done():
+                # Granted just as the wait ended
+                if isinstance(e, asyncio.CancelledError):
+                    self.release(priority)
+                    raise
+            else:
+                future.cancel()
+                self._queued[priority] -= 1
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._expired[priority] += 1
+                raise HTTPException(
+                    status_code=503, detail="AI service is busy, please try again shortly",
+                    headers={"Retry-After": str(max(int(self.deadlines[priority] // 4), 1))}
+                )
+        self._waits[priority].observe((time.perf_counter() - started) * 1000)
+
+    def release(self, priority: int):
+        self._active[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "interactive_reserve": self.reserve,
+            "active": sum(self._active),
+            "queued": sum(self._queued),
+            "classes": {
+                name: {
+                    "active": self._active[p],
+                    "queued": self._queued[p],
+                    "granted": self._granted[p],
+                    "expired": self._expired[p],
+                    "queue_deadline_seconds": self.deadlines[p],
+                    "wait": self._waits[p].summary(),
+                }
+                for p, name in enumerate(PRIORITY_NAMES)
+            },
+        }
+
+
+governor = LlmGovernor()
+
+
+async def send(chat, message, priority: int = INTERACTIVE, *, route: str, model=None, system_message: str = "",
+               contractor_id: str = None) -> str:
+    """
+    send_message on a session chat, holding a governor slot for the call.
+    `model` and `system_message` are what the chat was built with; they are
+    only used to label and estimate its usage. Raises LlmUnavailable while
+    the breaker is open and LlmTimeout past the route's deadline.
+    """
+    probe = breaker.admit()
+    try:
+        async with governor.slot(priority):
+            with llm_usage.call(route, model_name(model), message_tokens(system_message, message),
+                                contractor_id) as call:
+                reply = await guarded(chat.send_message(message), route, probe)
+                call.add(reply)
+                return reply
+    finally:
+        breaker.release(probe)
+
+
+async def send_hedged(make_chat, message, priority: int = INTERACTIVE, *, route: str, **labels) -> str:
+    """
+    send() on make_chat(). Only for chats that carry no history of their
+    own: a slow call may be hedged with a second copy on another make_chat().
+    """
+    return await hedged(lambda: send(make_chat(), message, priority, route=route, **labels), route,
+                        lambda: governor.idle(priority))
+
+
+async def stream(chat, message, priority: int = INTERACTIVE, *, route: str, model=None, system_message: str = "",
+                 contractor_id: str = None):
+    """send() as an async iterator of reply deltas; the slot is held until the stream ends."""
+    probe = breaker.admit()
+    try:
+        async with governor.slot(priority):
+            with llm_usage.call(route, model_name(model), message_tokens(system_message, message),
+                                contractor_id) as call:
+                async with aclosing(stream_reply(chat, message)) as deltas:
+                    async with aclosing(guarded_stream(deltas, route, probe)) as within_deadline:
+                        async for delta in within_deadline:
+                            call.add(delta)
+                            yield delta
+    finally:
+        breaker.release(probe)
+
+
+async def complete(api_key: str, system_message: str, prompt: str, *, route: str, priority: int = STANDARD,
+                   model=None, session_prefix: str = "llm", file_contents: list = None, attachment_key: str = "",
+                   contractor_id: str = None) -> str:
+    """
+    Send one stateless message and return the reply. `attachment_key`
+    identifies `file_contents` (e.g. a hash of the image) for coalescing.
+    Callers that join an in-flight call don't take a governor slot of their
+    own, and their usage is counted as shared; they also share its retries.
+    """
+    key = flight_key(system_message, model, prompt, attachment_key)
+    message = UserMessage(text=prompt, file_contents=file_contents) if file_contents else UserMessage(text=prompt)
+    led = False
+
+    def attempt():
+        chat = new_chat(api_key, f"{session_prefix}_{uuid.uuid4().hex[:8]}", system_message, model)
+        return send(chat, message, priority, route=route, model=model, system_message=system_message,
+                    contractor_id=contractor_id)
+
+    async def call():
+        nonlocal led
+        led = True
+        if priority == INTERACTIVE:
+            return await retrying(lambda: hedged(attempt, route, lambda: governor.idle(priority)), route)
+        return await retrying(attempt, route)
+
+    try:
+        return await single_flight.run(key, call)
+    finally:
+        if not led:
+            llm_usage.shared(route)
+
+
+async def stream_complete(api_key: str, system_message: str, prompt: str, *, route: str, priority: int = STANDARD,
+                          model=None, session_prefix: str = "llm", contractor_id: str = None):
+    """
+    complete() as an async iterator of reply deltas. A caller that joins an
+    identical in-flight call gets the whole reply as one delta when it ends.
+    A failure before the first delta is retried; after it, it's final.
+    """
+    key = flight_key(system_message, model, prompt, "")
+    pending = single_flight.join(key)
+    if pending is not None:
+        llm_usage.shared(route)
+        yield await asyncio.shield(pending)
+        return
+
+    def attempt():
+        chat = new_chat(api_key, f"{session_prefix}_{uuid.uuid4().hex[:8]}", system_message, model)
+        return stream(chat, UserMessage(text=prompt), priority, route=route, model=model,
+                      system_message=system_message, contractor_id=contractor_id)
+
+    deltas = retrying_stream(attempt, route)
+    async with aclosing(single_flight.lead_stream(key, deltas)) as leading:
+        async for delta in leading:
+            yield delta
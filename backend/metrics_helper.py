@@ -0,0 +1,70 @@
+import math
+import os
+from bisect import bisect_left
+from collections import deque
+
+# ─── In-process Metrics ───
+# Latency windows keep the most recent METRICS_WINDOW samples per series so
+# percentiles reflect current behaviour without unbounded memory. Counts and
+# totals cover the whole process lifetime. Histograms keep fixed buckets for
+# the whole lifetime too, which is what a Prometheus scrape expects.
+
+METRICS_WINDOW = int(os.environ.get("METRICS_WINDOW", "1000"))
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class LatencyWindow:
+    def __init__(self, size: int = METRICS_WINDOW):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float):
+        self._samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> float:
+        return percentile(sorted(self._samples), q)
+
+    def summary(self) -> dict:
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": round(percentile(ordered, 50), 2),
+            "p95_ms": round(percentile(ordered, 95), 2),
+            "p99_ms": round(percentile(ordered, 99), 2),
+            "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+        }
+
+
+class Histogram:
+    def __init__(self, bounds: tuple):
+        self.bounds = tuple(sorted(bounds))
+        self._counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def buckets(self) -> list:
+        """Cumulative (upper bound, count) pairs, ending with (inf, count)."""
+        running = 0
+        pairs = []
+        for bound, n in zip(self.bounds + (math.inf,), self._counts):
+            running += n
+            pairs.append((bound, running))
+        return pairs
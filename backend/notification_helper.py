@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument, UpdateOne
+
+from pagination_helper import paginate, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# ─── Broadcast Notifications (fan-out on read) ───
+# Notifications meant for every contractor (e.g. a new lead) are written once
+# to broadcast_notifications with a monotonically increasing seq. Each
+# contractor has a notification_state document:
+#   since_seq / since_at  - broadcasts at or before this point predate the account
+#   read_seq              - read watermark; every broadcast <= read_seq is read
+#   read_seqs             - seqs of broadcasts after the watermark read one at a
+#                           time; once they run on contiguously from the
+#                           watermark they are folded into read_seq
+#   unread                - unread personal notifications, kept with $inc
+# so the unread count is two point reads plus arithmetic and create_lead does
+# constant work no matter how many contractors there are.
+
+DEFAULT_STATE = {"since_seq": 0, "since_at": "", "read_seq": 0, "read_seqs": [], "unread": 0}
+UNREAD_RECONCILE_INTERVAL = float(os.environ.get("UNREAD_RECONCILE_INTERVAL", "900"))
+# Counter changes are two writes (the notification, then its $inc); a pair that
+# straddles the reconciler's count gets this long to land before a correction
+UNREAD_RECONCILE_SETTLE_SECONDS = float(os.environ.get("UNREAD_RECONCILE_SETTLE_SECONDS", "5"))
+
+
+async def current_broadcast_seq(db) -> int:
+    doc = await db.counters.find_one({"_id": "broadcast_notifications"})
+    return doc["seq"] if doc else 0
+
+
+async def insert_broadcast(db, notification: dict) -> dict:
+    counter = await db.counters.find_one_and_update(
+        {"_id": "broadcast_notifications"}, {"$inc": {"seq": 1}},
+        upsert=True, return_document=ReturnDocument.AFTER
+    )
+    doc = {
+        "id": str(uuid.uuid4()),
+        **notification,
+        "seq": counter["seq"],
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.broadcast_notifications.insert_one(doc)
+    return doc
+
+
+async def init_state(db, contractor_id: str, created_at: str):
+    """New accounts only see broadcasts sent after they signed up."""
+    seq = await current_broadcast_seq(db)
+    await db.notification_state.update_one(
+        {"_id": contractor_id},
+        {"$setOnInsert": {"since_seq": seq, "since_at": created_at, "read_seq": seq, "read_seqs": [], "unread": 0}},
+        upsert=True
+    )
+
+
+async def get_state(db, contractor_id: str) -> dict:
+    state = await db.notification_state.find_one({"_id": contractor_id})
+    return {**DEFAULT_STATE, **(state or {})}
+
+
+def _is_read(broadcast: dict, state: dict) -> bool:
+    return broadcast["seq"] <= state["read_seq"] or broadcast["seq"] in state["read_seqs"]
+
+
+def _feed_item(broadcast: dict, contractor_id: str, state: dict) -> dict:
+    item = {k: v for k, v in broadcast.items() if k != "seq"}
+    item["contractor_id"] = contractor_id
+    item["read"] = _is_read(broadcast, state)
+    item["broadcast"] = True
+    return item
+
+
+async def notification_feed(db, contractor_id: str, limit: int, cursor: str = None):
+    """One page of personal + broadcast notifications, newest first."""
+    state = await get_state(db, contractor_id)
+    (personal, personal_next), (broadcasts, broadcast_next) = await asyncio.gather(
+        paginate(db.notifications, {"contractor_id": contractor_id}, {"_id": 0},
+                 "created_at", -1, limit, cursor),
+        paginate(db.broadcast_notifications, {"created_at": {"$gt": state["since_at"]}}, {"_id": 0},
+                 "created_at", -1, limit, cursor),
+    )
+    merged = personal + [_feed_item(b, contractor_id, state) for b in broadcasts]
+    merged.sort(key=lambda n: (n.get("created_at", ""), n.get("id", "")), reverse=True)
+    page = merged[:limit]
+    next_cursor = None
+    if page and (len(merged) > limit or personal_next or broadcast_next):
+        next_cursor = encode_cursor(page[-1].get("created_at"), page[-1].get("id"))
+    return page, next_cursor
+
+
+def _broadcast_unread(seq: int, state: dict) -> int:
+    floor = max(state["since_seq"], state["read_seq"])
+    # Only reads above the watermark: anything below it is already counted as read
+    read_above = sum(1 for read in state["read_seqs"] if floor < read <= seq)
+    return max(seq - floor - read_above, 0)
+
+
+async def mark_broadcast_read(db, contractor_id: str, notification_id: str) -> bool:
+    broadcast = await db.broadcast_notifications.find_one({"id": notification_id}, {"_id": 0, "id": 1, "seq": 1})
+    if not broadcast:
+        return False
+    state = await db.notification_state.find_one({"_id": contractor_id})
+    if state is None:
+        await db.notification_state.update_one({"_id": contractor_id}, {"$setOnInsert": DEFAULT_STATE}, upsert=True)
+        state = DEFAULT_STATE
+    state = {**DEFAULT_STATE, **state}
+    if broadcast["seq"] <= state["since_seq"] or _is_read(broadcast, state):
+        return True
+    # Conditional on the watermark: a mark-all that moved past this broadcast
+    # since the read above already covers it
+    state = await db.notification_state.find_one_and_update(
+        {"_id": contractor_id, "read_seq": {"$lt": broadcast["seq"]}},
+        {"$addToSet": {"read_seqs": broadcast["seq"]}},
+        return_document=ReturnDocument.AFTER
+    )
+    if state is not None:
+        await _fold_read_seqs(db, contractor_id, {**DEFAULT_STATE, **state})
+    return True
+
+
+async def _fold_read_seqs(db, contractor_id: str, state: dict):
+    # Reads that run on from the watermark without a gap move it up, so
+    # read_seqs only holds out-of-order reads and stays short
+    floor = watermark = max(state["since_seq"], state["read_seq"])
+    read = set(state["read_seqs"])
+    while watermark + 1 in read:
+        watermark += 1
+    if watermark == floor and not any(seq <= floor for seq in read):
+        return
+    # Conditional on read_seq: if a mark-all moved it meanwhile, it did the $pull itself
+    await db.notification_state.update_one(
+        {"_id": contractor_id, "read_seq": state["read_seq"]},
+        {"$set": {"read_seq": watermark}, "$pull": {"read_seqs": {"$lte": watermark}}}
+    )
+
+
+async def mark_all_broadcasts_read(db, contractor_id: str):
+    seq = await current_broadcast_seq(db)
+    # $pull rather than clearing: a broadcast newer than `seq` may be marked read meanwhile
+    await db.notification_state.update_one(
+        {"_id": contractor_id},
+        {"$max": {"read_seq": seq}, "$pull": {"read_seqs": {"$lte": seq}}},
+        upsert=True
+    )
+
+
+# ─── Personal Notifications & Unread Counter ───
+
+async def insert_notification(db, contractor_id: str, notification: dict) -> dict:
+    doc = {
+        "id": str(uuid.uuid4()),
+        "contractor_id": contractor_id,
+        **notification,
+        "read": False,
+        "created_at": notification.get("created_at") or datetime.now(timezone.utc).isoformat()
+    }
+    # Two writes, not a transaction: if the process dies in between, the counter
+    # stays one short until reconcile_unread_counters corrects it
+    await db.notifications.insert_one(doc)
+    await db.notification_state.update_one({"_id": contractor_id}, {"$inc": {"unread": 1}}, upsert=True)
+    return doc
+
+
+async def mark_read(db, contractor_id: str, notification_id: str):
+    result = await db.notifications.update_one(
+        {"id": notification_id, "contractor_id": contractor_id, "read": False},
+        {"$set": {"read": True}}
+    )
+    if result.modified_count:
+        await db.notification_state.update_one({"_id": contractor_id}, {"$inc": {"unread": -1}}, upsert=True)
+    elif result.matched_count == 0:
+        await mark_broadcast_read(db, contractor_id, notification_id)
+
+
+async def mark_all_read(db, contractor_id: str):
+    result = await db.notifications.update_many(
+        {"contractor_id": contractor_id, "read": False},
+        {"$set": {"read": True}}
+    )
+    # Subtract exactly what we flipped so a notification inserted concurrently stays counted
+    if result.modified_count:
+        await db.notification_state.update_one(
+            {"_id": contractor_id}, {"$inc": {"unread": -result.modified_count}}, upsert=True
+        )
+    await mark_all_broadcasts_read(db, contractor_id)
+
+
+async def unread_count(db, contractor_id: str) -> int:
+    seq, state = await asyncio.gather(current_broadcast_seq(db), get_state(db, contractor_id))
+    return max(state["unread"], 0) + _broadcast_unread(seq, state)
+
+
+_MISSING = object()
+
+
+def _correction(contractor_id: str, stored, count: int) -> UpdateOne:
+    # Only applies if the counter still holds the value it was compared with
+    if stored is _MISSING:
+        return UpdateOne({"_id": contractor_id}, {"$setOnInsert": {"unread": count}}, upsert=True)
+    current = {"$exists": False} if stored is None else stored
+    return UpdateOne({"_id": contractor_id, "unread": current}, {"$set": {"unread": count}})
+
+
+async def reconcile_unread_counters(db, settle: float = UNREAD_RECONCILE_SETTLE_SECONDS) -> int:
+    """Correct personal unread counters that disagree with the true count; returns how many were fixed."""
+    # Counters are read before the count, so a notification written in between
+    # shows up as a counter that has moved, and its correction is skipped
+    stored = {
+        d["_id"]: d.get("unread")
+        for d in await db.notification_state.find({}, {"_id": 1, "unread": 1}).to_list(None)
+    }
+    actual_rows = await db.notifications.aggregate([
+        {"$match": {"read": False}},
+        {"$group": {"_id": "$contractor_id", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    actual = {r["_id"]: r["count"] for r in actual_rows if r["_id"]}
+    drifted = [cid for cid in set(actual) | set(stored) if actual.get(cid, 0) != (stored.get(cid) or 0)]
+    if not drifted:
+        return 0
+    # Let any notification write whose $inc is still on its way land first
+    await asyncio.sleep(settle)
+    result = await db.notification_state.bulk_write(
+        [_correction(cid, stored.get(cid, _MISSING), actual.get(cid, 0)) for cid in drifted], ordered=False
+    )
+    fixed = result.modified_count + result.upserted_count
+    if fixed:
+        logger.warning(f"Reconciled {fixed} drifted unread counters")
+    return fixed
+
+
+async def run_unread_reconciler(db):
+    while True:
+        try:
+            await reconcile_unread_counters(db)
+        except Exception as e:
+            logger.error(f"Unread counter reconciliation failed: {e}")
+        await asyncio.sleep(UNREAD_RECONCILE_INTERVAL)
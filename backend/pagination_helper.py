@@ -0,0 +1,66 @@
+import base64
+import json
+import os
+from typing import Optional
+
+from fastapi import HTTPException
+
+# ─── Keyset Pagination ───
+# Pages are ordered on (sort_field, id) so ties on the timestamp are broken
+# deterministically, and the next page starts strictly after the last row we
+# returned. Each page costs one indexed range scan regardless of depth.
+
+PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "500"))
+
+
+def encode_cursor(sort_value, doc_id: str) -> str:
+    raw = json.dumps([sort_value, doc_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, doc_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def clamp_limit(limit: Optional[int], default: int) -> int:
+    if limit is None:
+        return default
+    return max(1, min(limit, PAGE_SIZE_MAX))
+
+
+def keyset_filter(query: dict, sort_field: str, direction: int, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return query
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    after = {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, "id": {op: doc_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+async def paginate(collection, query: dict, projection: dict, sort_field: str, direction: int,
+                   limit: int, cursor: Optional[str] = None):
+    """Return (items, next_cursor) for one page; next_cursor is None on the last page."""
+    docs = await collection.find(
+        keyset_filter(query, sort_field, direction, cursor), projection
+    ).sort([(sort_field, direction), ("id", direction)]).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get(sort_field), last.get("id"))
+    return docs, next_cursor
+
+
+def page_response(items: list, next_cursor: Optional[str], cursor: Optional[str], limit: Optional[int]):
+    # Callers that don't ask for paging keep getting the bare list they always got
+    if cursor is None and limit is None:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,75 @@
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+
+# ─── Sparse Fieldsets ───
+# List endpoints return a per-resource "summary" projection by default so a
+# page of leads/content/campaigns doesn't drag along item arrays, generated
+# calendars or chat transcripts. Callers choose their own shape with
+# `fields=`: "summary", "full", explicit field paths, or a mix such as
+# "summary,ai_score". Full bodies are served by the per-item GET routes.
+
+FIELD_PATH = re.compile(r"^[A-Za-z][A-Za-z0-9_]*(\.[A-Za-z][A-Za-z0-9_]*)*$")
+MAX_FIELDS = 50
+
+SUMMARIES = {
+    "leads": {
+        "id": 1, "name": 1, "email": 1, "phone": 1, "city": 1, "state": 1,
+        "project_type": 1, "project_size": 1, "budget_range": 1, "timeline": 1,
+        "description": 1, "status": 1, "source": 1, "created_at": 1,
+        "ai_score.score": 1, "ai_score.grade": 1, "ai_score.urgency": 1,
+        "ai_score.estimated_value": 1, "ai_score.recommended_action": 1,
+    },
+    "content": {
+        "id": 1, "platform": 1, "content_type": 1, "topic": 1, "tone": 1, "created_at": 1,
+        "item_count": {"$cond": [{"$isArray": "$items"}, {"$size": "$items"}, 0]},
+        "preview": {"$let": {
+            "vars": {"text": {"$arrayElemAt": [{"$cond": [{"$isArray": "$items"}, "$items.text", []]}, 0]}},
+            "in": {"$cond": [{"$eq": [{"$type": "$$text"}, "string"]}, {"$substrCP": ["$$text", 0, 120]}, ""]},
+        }},
+    },
+    "campaigns": {
+        "id": 1, "name": 1, "goal": 1, "platforms": 1, "target_audience": 1,
+        "duration_days": 1, "description": 1, "status": 1, "created_at": 1,
+        "has_content": {"$gt": ["$ai_content", None]},
+        "post_count": {"$cond": [
+            {"$isArray": "$ai_content.content_calendar"}, {"$size": "$ai_content.content_calendar"}, 0
+        ]},
+        "generation.job_id": 1, "generation.state": 1, "generation.progress": 1,
+    },
+}
+
+
+def _collapse(paths: dict) -> dict:
+    # Mongo rejects a projection holding both "a" and "a.b"; the parent wins
+    kept = {}
+    for path in sorted(paths, key=lambda p: p.count(".")):
+        if not any(path.startswith(parent + ".") for parent in kept):
+            kept[path] = paths[path]
+    return kept
+
+
+def resolve_projection(resource: str, fields: Optional[str] = None, default: str = "summary",
+                       required: tuple = ("id", "created_at")) -> dict:
+    """Turn a `fields=` value into a find() projection for `resource`."""
+    spec = [f.strip() for f in (fields or default).split(",") if f.strip()]
+    if not spec:
+        spec = [default]
+    if "full" in spec:
+        return {"_id": 0}
+    if len(spec) > MAX_FIELDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_FIELDS} fields may be requested")
+
+    paths = {}
+    for name in spec:
+        if name == "summary":
+            paths.update(SUMMARIES[resource])
+        elif FIELD_PATH.match(name):
+            paths[name] = 1
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid field: {name}")
+    # Keyset cursors are built from these, so they ride along with every shape
+    for name in required:
+        paths.setdefault(name, 1)
+    return {"_id": 0, **_collapse(paths)}
@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+from usage_helper import llm_usage
+
+logger = logging.getLogger(__name__)
+
+# ─── LLM Resilience ───
+# Guards around every provider call made through llm_helper:
+#   deadlines  - each call gets its route's deadline (LLM_DEADLINES, else
+#                LLM_DEADLINE_SECONDS); a call that runs past it fails with a
+#                504 instead of holding its governor slot indefinitely.
+#   retries    - stateless generations (complete / stream_complete) are
+#                retried up to LLM_RETRIES times with full-jitter exponential
+#                backoff. Session chats are not: their history lives in the
+#                chat object, so a resend could be recorded twice. Streams are
+#                only retried before their first delta.
+#   hedging    - with LLM_HEDGE=1, interactive calls that can be re-issued on
+#                a fresh chat start a second copy once they run past the
+#                route's recent LLM_HEDGE_PERCENTILE latency; the first reply
+#                wins and the other is cancelled.
+#   breaker    - when at least LLM_BREAKER_FAILURE_RATE of the last
+#                LLM_BREAKER_WINDOW calls failed, calls are refused with a 503
+#                for LLM_BREAKER_OPEN_SECONDS. Then one probe call is let
+#                through; its outcome closes or reopens the breaker. Routes
+#                check `breaker.available()` to answer in a degraded mode
+#                (cached FAQ answers, "we'll follow up") while it's open.
+
+DEFAULT_DEADLINES = {
+    "chat": 45, "intake_chat": 45, "intake_fold": 45, "intake_summary": 60, "vision": 90,
+    "message": 60, "lead_narrative": 60, "content": 150, "campaign": 300,
+}
+LLM_DEADLINE_SECONDS = float(os.environ.get("LLM_DEADLINE_SECONDS", "90"))
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.environ.get("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.environ.get("LLM_RETRY_MAX_SECONDS", "8"))
+LLM_HEDGE = os.environ.get("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+# Latency samples a route needs before its percentile is trusted
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_SECONDS = float(os.environ.get("LLM_HEDGE_MIN_SECONDS", "2"))
+LLM_BREAKER_WINDOW = int(os.environ.get("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.environ.get("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_FAILURE_RATE = float(os.environ.get("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_OPEN_SECONDS = float(os.environ.get("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+
+def load_deadlines(spec: str) -> dict:
+    """DEFAULT_DEADLINES overridden by "route=seconds,..." entries."""
+    deadlines = dict(DEFAULT_DEADLINES)
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, seconds = entry.partition("=")
+        try:
+            deadlines[route.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring malformed LLM_DEADLINES entry {entry!r}")
+    return deadlines
+
+
+DEADLINES = load_deadlines(os.environ.get("LLM_DEADLINES", ""))
+
+counts = {"timeouts": 0, "retries": 0, "hedged": 0, "hedge_wins": 0}
+
+
+def deadline_for(route: str) -> float:
+    return DEADLINES.get(route, LLM_DEADLINE_SECONDS)
+
+
+class LlmTimeout(HTTPException):
+    def __init__(self, route: str):
+        super().__init__(status_code=504, detail="AI service timed out, please try again")
+        self.route = route
+
+
+class LlmUnavailable(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(status_code=503, detail="AI service is temporarily unavailable, please try again shortly",
+                         headers={"Retry-After": str(retry_after)})
+
+
+def retryable(error: BaseException) -> bool:
+    # Provider errors and timeouts; governor and breaker refusals are decisions, not faults
+    return isinstance(error, LlmTimeout) or (isinstance(error, Exception) and not isinstance(error, HTTPException))
+
+
+def retry_delay(attempt: int) -> float:
+    """Full jitter: uniform over [0, base * 2^attempt], capped."""
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+# ─── Circuit Breaker ───
+
+class CircuitBreaker:
+    def __init__(self, window: int = LLM_BREAKER_WINDOW, min_calls: int = LLM_BREAKER_MIN_CALLS,
+                 failure_rate: float = LLM_BREAKER_FAILURE_RATE, open_seconds: float = LLM_BREAKER_OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = "closed"  # closed -> open -> half_open -> closed | open
+        self._outcomes = deque(maxlen=max(window, 1))
+        self._opened_at = 0.0
+        self._probing = False
+        self.counts = {"opened": 0, "rejected": 0, "probes": 0}
+
+    def _refresh(self):
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = "half_open"
+
+    def _open(self):
+        if self.state == "closed":
+            failures = self._outcomes.count(False)
+            logger.warning(f"LLM circuit breaker opened: {failures}/{len(self._outcomes)} recent calls failed")
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.counts["opened"] += 1
+
+    def available(self) -> bool:
+        """Whether a call made now would be let through."""
+        self._refresh()
+        return self.state == "closed" or (self.state == "half_open" and not self._probing)
+
+    def admit(self) -> bool:
+        """Let a call through or raise LlmUnavailable; True means the call is the half-open probe."""
+        if not self.available():
+            self.counts["rejected"] += 1
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+            raise LlmUnavailable(max(int(remaining), 1))
+        if self.state == "half_open":
+            self._probing = True
+            self.counts["probes"] += 1
+            return True
+        return False
+
+    def release(self, probe: bool):
+        # A probe that ended without reaching the provider (queue expiry, client gone)
+        if probe:
+            self._probing = False
+
+    def record(self, ok: bool, probe: bool = False):
+        if probe:
+            self._probing = False
+            if ok:
+                logger.info("LLM circuit breaker closed: probe call succeeded")
+                self.state = "closed"
+            else:
+                self._open()
+            return
+        # Calls admitted before the breaker opened don't count once it has
+        if self.state != "closed":
+            return
+        self._outcomes.append(ok)
+        if len(self._outcomes) >= self.min_calls and self._outcomes.count(False) / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def stats(self) -> dict:
+        self._refresh()
+        failures = self._outcomes.count(False)
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": failures,
+            "open_seconds": self.open_seconds,
+            "open_remaining_seconds": round(max(self.open_seconds - (time.monotonic() - self._opened_at), 0), 1)
+            if self.state == "open" else 0,
+            **self.counts,
+        }
+
+
+breaker = CircuitBreaker()
+
+
+# ─── Guarded Calls ───
+
+async def guarded(call, route: str, probe: bool = False):
+    """Await the provider call `call` within the route's deadline, recording its outcome on the breaker."""
+    try:
+        result = await asyncio.wait_for(call, deadline_for(route))
+    except asyncio.TimeoutError:
+        counts["timeouts"] += 1
+        breaker.record(False, probe)
+        raise LlmTimeout(route) from None
+    except Exception:
+        breaker.record(False, probe)
+        raise
+    breaker.record(True, probe)
+    return result
+
+
+async def guarded_stream(deltas, route: str, probe: bool = False):
+    """guarded() for an async iterator of deltas: the deadline covers the whole stream."""
+    deadline = time.monotonic() + deadline_for(route)
+    iterator = deltas.__aiter__()
+    while True:
+        try:
+            delta = await asyncio.wait_for(iterator.__anext__(), max(deadline - time.monotonic(), 0))
+        except StopAsyncIteration:
+            break
+        except asyncio.TimeoutError:
+            counts["timeouts"] += 1
+            breaker.record(False, probe)
+            raise LlmTimeout(route) from None
+        except Exception:
+            breaker.record(False, probe)
+            raise
+        yield delta
+    breaker.record(True, probe)
+
+
+async def retrying(call, route: str):
+    """Await call() up to 1 + LLM_RETRIES times, backing off between retryable failures."""
+    for attempt in range(LLM_RETRIES + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == LLM_RETRIES or not retryable(e):
+                raise
+            delay = retry_delay(attempt)
+            counts["retries"] += 1
+            logger.warning(f"LLM call for {route} failed ({e!r}); retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+async def retrying_stream(make_deltas, route: str):
+    """retrying() for streams from make_deltas(); once a delta is out, a failure is final."""
+    for attempt in range(LLM_RETRIES + 1):
+        started = False
+        try:
+            deltas = make_deltas()
+            try:
+                async for delta in deltas:
+                    started = True
+                    yield delta
+            finally:
+                await deltas.aclose()
+            return
+        except Exception as e:
+            if started or attempt == LLM_RETRIES or not retryable(e):
+                raise
+            delay = retry_delay(attempt)
+            counts["retries"] += 1
+            logger.warning(f"LLM stream for {route} failed ({e!r}); retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+def hedge_delay(route: str):
+    """Seconds to wait before hedging a call on `route`, or None when it shouldn't be hedged."""
+    if not LLM_HEDGE:
+        return None
+    latency_ms = llm_usage.latency_percentile(route, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES)
+    if latency_ms is None:
+        return None
+    return max(latency_ms / 1000, LLM_HEDGE_MIN_SECONDS)
+
+
+async def hedged(start, route: str, can_hedge=lambda: True):
+    """
+    Await start(); if it's still running after the route's hedge delay and
+    can_hedge() allows the extra load, race a second start() against it.
+    The first success wins; an error only surfaces once both have failed.
+    """
+    delay = hedge_delay(route)
+    first = asyncio.ensure_future(start())
+    if delay is None:
+        return await first
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done and breaker.state == "closed" and can_hedge():
+            counts["hedged"] += 1
+            pending.add(asyncio.ensure_future(start()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        counts["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def stats() -> dict:
+    return {
+        "deadlines_seconds": {**DEADLINES, "default": LLM_DEADLINE_SECONDS},
+        "retry": {"max": LLM_RETRIES, "base_seconds": LLM_RETRY_BASE_SECONDS, "max_seconds": LLM_RETRY_MAX_SECONDS},
+        "hedging": {"enabled": LLM_HEDGE, "percentile": LLM_HEDGE_PERCENTILE, "min_seconds": LLM_HEDGE_MIN_SECONDS,
+                    "min_samples": LLM_HEDGE_MIN_SAMPLES},
+        "breaker": breaker.stats(),
+        **counts,
+    }
@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment image
+    orjson = None
+
+# ─── Fast JSON Responses ───
+# Routes that return big lists of Motor documents opt in by returning
+# fast_json(...). That skips FastAPI's jsonable_encoder walk and encodes the
+# documents once with orjson, falling back to the stdlib encoder when orjson
+# isn't installed or FAST_JSON_RESPONSES=0. Both paths share _default, so
+# ObjectIds and datetimes come out identically either way.
+
+FAST_JSON_ENABLED = os.environ.get("FAST_JSON_RESPONSES", "1") != "0" and orjson is not None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "tolist"):
+        # numpy scalars/arrays on the stdlib path
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(content) -> bytes:
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(content, fast: bool = None) -> bytes:
+    if fast is None:
+        fast = FAST_JSON_ENABLED
+    if fast:
+        try:
+            return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+        except TypeError as e:
+            # e.g. ints beyond 64 bits, which the stdlib encoder handles
+            logger.warning(f"orjson could not encode response, using stdlib: {e}")
+    return _stdlib_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def fast_json(content, status_code: int = 200, headers: dict = None) -> FastJSONResponse:
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,282 @@
+"""
+Materialized analytics counters.
+
+analytics_rollups holds one "global" document (lead counters) and one
+"contractor:<id>" document per contractor (content, campaigns and schedule).
+Unread notification counts live with the rest of the notification state in
+notification_helper. Write endpoints $inc them as they go so /analytics is
+a single read. `python -m rollup_helper --rebuild` recomputes everything from
+the raw collections to repair drift.
+
+A rebuild $sets absolute values computed from aggregations that ran a moment
+earlier, so a write whose row the aggregation missed but whose $inc landed
+before the $set is dropped (the counter ends up one short until the next
+rebuild). Run --rebuild when write traffic is quiet.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ID = "global"
+
+
+def contractor_key(contractor_id: str) -> str:
+    return f"contractor:{contractor_id}"
+
+
+def _k(value) -> str:
+    # Counter names become update paths, so dots and dollars can't survive
+    return str(value).replace(".", "_").replace("$", "_")
+
+
+def item_count(items) -> int:
+    return len(items) if isinstance(items, (list, dict, str)) else 0
+
+
+async def _inc(db, doc_id: str, inc: dict):
+    inc = {k: v for k, v in inc.items() if v}
+    if not inc:
+        return
+    try:
+        await db.analytics_rollups.update_one({"_id": doc_id}, {"$inc": inc}, upsert=True)
+    except PyMongoError as e:
+        # Counters are repairable with --rebuild; never fail the request over them
+        logger.error(f"Rollup update failed for {doc_id}: {e}")
+
+
+# ─── Write Hooks ───
+
+async def record_lead(db, status: str, created_at: str, delta: int = 1):
+    inc = {"leads.total": delta, f"leads.by_status.{_k(status)}": delta}
+    if created_at:
+        inc[f"leads.by_date.{created_at[:10]}"] = delta
+    await _inc(db, GLOBAL_ID, inc)
+
+
+async def record_lead_status_change(db, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    await _inc(db, GLOBAL_ID, {
+        f"leads.by_status.{_k(old_status)}": -1,
+        f"leads.by_status.{_k(new_status)}": 1,
+    })
+
+
+async def record_content(db, contractor_id: str, platform: str, items, delta: int = 1):
+    posts = item_count(items) * delta
+    await _inc(db, contractor_key(contractor_id), {
+        "content.total_batches": delta,
+        "content.total_posts": posts,
+        f"content.by_platform.{_k(platform)}": posts,
+    })
+
+
+async def record_campaign(db, contractor_id: str, status: str, delta: int = 1):
+    await _inc(db, contractor_key(contractor_id), {
+        "campaigns.total": delta,
+        f"campaigns.by_status.{_k(status)}": delta,
+    })
+
+
+async def record_campaign_status_change(db, contractor_id: str, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    await _inc(db, contractor_key(contractor_id), {
+        f"campaigns.by_status.{_k(old_status)}": -1,
+        f"campaigns.by_status.{_k(new_status)}": 1,
+    })
+
+
+async def record_scheduled_posts(db, contractor_id: str, posts: list, delta: int = 1):
+    inc = {"schedule.total": delta * len(posts)}
+    for post in posts:
+        for path in (f"schedule.by_status.{_k(post.get('status', 'scheduled'))}",
+                     f"schedule.by_platform.{_k(post.get('platform', 'unknown'))}"):
+            inc[path] = inc.get(path, 0) + delta
+    await _inc(db, contractor_key(contractor_id), inc)
+
+
+async def record_post_status_change(db, contractor_id: str, old_status: str, new_status: str):
+    if old_status == new_status:
+        return
+    await _inc(db, contractor_key(contractor_id), {
+        f"schedule.by_status.{_k(old_status)}": -1,
+        f"schedule.by_status.{_k(new_status)}": 1,
+    })
+
+
+# ─── Read ───
+
+def _nonzero(counts: dict) -> dict:
+    return {k: v for k, v in (counts or {}).items() if v}
+
+
+async def read_analytics(db, contractor_id: str):
+    """Build the /analytics payload (minus notifications) from rollups; None until seeded."""
+    docs = await db.analytics_rollups.find(
+        {"_id": {"$in": [GLOBAL_ID, contractor_key(contractor_id)]}}
+    ).to_list(2)
+    by_id = {d["_id"]: d for d in docs}
+    global_doc = by_id.get(GLOBAL_ID)
+    if not global_doc or not global_doc.get("rebuilt_at"):
+        return None
+    mine = by_id.get(contractor_key(contractor_id), {})
+
+    leads = global_doc.get("leads", {})
+    lead_status = _nonzero(leads.get("by_status"))
+    lead_total = leads.get("total", 0)
+    content = mine.get("content", {})
+    campaigns = mine.get("campaigns", {})
+    schedule = mine.get("schedule", {})
+    return {
+        "leads": {
+            "total": lead_total,
+            "by_status": lead_status,
+            "by_date": dict(sorted(_nonzero(leads.get("by_date")).items())[-30:]),
+            "conversion_rate": round((lead_status.get("qualified", 0) / max(lead_total, 1)) * 100, 1)
+        },
+        "content": {
+            "total_batches": content.get("total_batches", 0),
+            "total_posts": content.get("total_posts", 0),
+            "by_platform": _nonzero(content.get("by_platform"))
+        },
+        "campaigns": {
+            "total": campaigns.get("total", 0),
+            "by_status": _nonzero(campaigns.get("by_status"))
+        },
+        "schedule": {
+            "total": schedule.get("total", 0),
+            "by_status": _nonzero(schedule.get("by_status")),
+            "by_platform": _nonzero(schedule.get("by_platform"))
+        }
+    }
+
+
+# ─── Rebuild ───
+
+def _missing_default(field: str, fallback: str) -> dict:
+    return {"$cond": [{"$eq": [{"$type": f"${field}"}, "missing"]}, fallback, f"${field}"]}
+
+
+async def _group(collection, pipeline):
+    return await collection.aggregate(pipeline).to_list(None)
+
+
+async def rebuild_rollups(db):
+    """Recompute every rollup document from the raw collections (see the module docstring on concurrent writes)."""
+    now = datetime.now(timezone.utc).isoformat()
+
+    lead_status, lead_dates = await asyncio.gather(
+        _group(db.leads, [{"$group": {"_id": _missing_default("status", "new"), "count": {"$sum": 1}}}]),
+        _group(db.leads, [
+            {"$match": {"created_at": {"$type": "string", "$ne": ""}}},
+            {"$group": {"_id": {"$substrCP": ["$created_at", 0, 10]}, "count": {"$sum": 1}}},
+        ]),
+    )
+    global_doc = {
+        "leads": {
+            "total": sum(r["count"] for r in lead_status),
+            "by_status": {_k(r["_id"]): r["count"] for r in lead_status},
+            "by_date": {r["_id"]: r["count"] for r in lead_dates},
+        },
+        "rebuilt_at": now,
+    }
+
+    content, campaigns, schedule = await asyncio.gather(
+        _group(db.generated_content, [{"$group": {
+            "_id": {"c": "$contractor_id", "p": _missing_default("platform", "unknown")},
+            "batches": {"$sum": 1},
+            "posts": {"$sum": {"$switch": {
+                "branches": [
+                    {"case": {"$isArray": "$items"}, "then": {"$size": "$items"}},
+                    {"case": {"$eq": [{"$type": "$items"}, "object"]}, "then": {"$size": {"$objectToArray": "$items"}}},
+                    {"case": {"$eq": [{"$type": "$items"}, "string"]}, "then": {"$strLenCP": "$items"}},
+                ],
+                "default": 0,
+            }}},
+        }}]),
+        _group(db.campaigns, [{"$group": {
+            "_id": {"c": "$contractor_id", "s": _missing_default("status", "draft")}, "count": {"$sum": 1},
+        }}]),
+        _group(db.scheduled_posts, [{"$group": {
+            "_id": {"c": "$contractor_id", "s": _missing_default("status", "scheduled"),
+                    "p": _missing_default("platform", "unknown")},
+            "count": {"$sum": 1},
+        }}]),
+    )
+
+    per_contractor = {}
+
+    def doc_for(cid):
+        return per_contractor.setdefault(cid, {
+            "content": {"total_batches": 0, "total_posts": 0, "by_platform": {}},
+            "campaigns": {"total": 0, "by_status": {}},
+            "schedule": {"total": 0, "by_status": {}, "by_platform": {}},
+        })
+
+    for r in content:
+        d = doc_for(r["_id"]["c"])["content"]
+        d["total_batches"] += r["batches"]
+        d["total_posts"] += r["posts"]
+        key = _k(r["_id"]["p"])
+        d["by_platform"][key] = d["by_platform"].get(key, 0) + r["posts"]
+    for r in campaigns:
+        d = doc_for(r["_id"]["c"])["campaigns"]
+        d["total"] += r["count"]
+        d["by_status"][_k(r["_id"]["s"])] = r["count"]
+    for r in schedule:
+        d = doc_for(r["_id"]["c"])["schedule"]
+        d["total"] += r["count"]
+        for field, key in (("by_status", _k(r["_id"]["s"])), ("by_platform", _k(r["_id"]["p"]))):
+            d[field][key] = d[field].get(key, 0) + r["count"]
+
+    ops = [UpdateOne({"_id": GLOBAL_ID}, {"$set": global_doc}, upsert=True)]
+    ops += [
+        UpdateOne({"_id": contractor_key(cid)}, {"$set": {**doc, "rebuilt_at": now}}, upsert=True)
+        for cid, doc in per_contractor.items() if cid
+    ]
+    await db.analytics_rollups.bulk_write(ops, ordered=False)
+    # Contractors that no longer have any rows keep stale counters otherwise
+    await db.analytics_rollups.delete_many({
+        "_id": {"$nin": [GLOBAL_ID] + [contractor_key(cid) for cid in per_contractor if cid]}
+    })
+    return len(ops)
+
+
+async def ensure_rollups(db):
+    """Seed the rollups on first boot; later drift is repaired with --rebuild."""
+    existing = await db.analytics_rollups.find_one({"_id": GLOBAL_ID}, {"rebuilt_at": 1})
+    if not existing or not existing.get("rebuilt_at"):
+        count = await rebuild_rollups(db)
+        logger.info(f"Seeded {count} analytics rollup documents")
+
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.rebuild:
+            count = await rebuild_rollups(db)
+            print(f"Rebuilt {count} rollup documents")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain materialized analytics rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollups from raw collections")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
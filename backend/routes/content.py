@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from llm_helper import complete, STANDARD
+from json_stream_helper import parse_llm_json, JsonStreamError
 import os
 from pathlib import Path
-import uuid
 
 router = APIRouter(prefix="/content", tags=["content"])
 
@@ -44,14 +44,7 @@ async def generate_message(data: MessageGenerateRequest):
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=500, detail="AI service not configured")
 
-    session_id = str(uuid.uuid4())
     system_prompt = SYSTEM_PROMPT_EMAIL if data.type == "email" else SYSTEM_PROMPT_SMS
-    
-    chat = LlmChat(
-        api_key=EMERGENT_LLM_KEY,
-        session_id=session_id,
-        system_message=system_prompt
-    )
 
     user_prompt = f"""
     Write a {data.tone} {data.type} to {data.recipient_name}.
@@ -63,14 +56,13 @@ async def generate_message(data: MessageGenerateRequest):
     """
 
     try:
-        response = await chat.send_message(UserMessage(text=user_prompt))
-        import json
-        clean = response.strip()
-        if clean.startswith("```"):
-            clean = clean.split("\n", 1)[1] if "\n" in clean else clean[3:]
-            clean = clean.rsplit("```", 1)[0]
-        
-        result = json.loads(clean)
+        response = await complete(EMERGENT_LLM_KEY, system_prompt, user_prompt, route="message", priority=STANDARD,
+                                  session_prefix="message")
+        result = parse_llm_json(response)
+        if not isinstance(result, dict) or "body" not in result:
+            raise JsonStreamError("Reply has no message body")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
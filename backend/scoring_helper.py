@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# ─── Rule-based Lead Scoring ───
+# score, grade, urgency, estimated_value and recommended_action come from the
+# rubric below rather than an LLM call. Each lead is reduced to five factors
+# in [0, 1] (budget, timeline, project type, project size, description
+# quality); the score is their weighted sum. Lead fields are free text
+# ("300k_500k", "3-6 months", "2,500 sq ft"), so parsing is cached per
+# distinct string and the arithmetic runs on whole NumPy columns, which lets
+# a full lead table be rescored at once. Missing or unparseable fields get
+# NEUTRAL_FACTOR instead of zero.
+
+FACTORS = ("budget", "timeline", "project_type", "project_size", "description")
+DEFAULT_WEIGHTS = {"budget": 0.30, "timeline": 0.25, "project_type": 0.20, "project_size": 0.15, "description": 0.10}
+NEUTRAL_FACTOR = 0.3
+
+# Minimum score for grades A, B, C; anything lower is D
+GRADE_THRESHOLDS = (80, 65, 45)
+GRADES = np.array(["A", "B", "C", "D"])
+RECOMMENDED_ACTIONS = {
+    "A": "Call within 24 hours and offer a site visit",
+    "B": "Reach out this week with an ICF cost comparison for their project",
+    "C": "Send ICF information and follow up in two weeks",
+    "D": "Add to the nurture list and check back next quarter",
+}
+# Months until the project starts: <= first is high urgency, <= second medium
+URGENCY_MONTHS = (3, 9)
+
+BUDGET_RANGE = (50_000, 1_000_000)     # log-scaled onto [0, 1]
+SIZE_RANGE = (500, 5_000)              # square feet, linear
+TIMELINE_HORIZON_MONTHS = 18           # starting this far out or later scores 0
+DESCRIPTION_WORDS = 40                 # word count that earns the full length credit
+ICF_COST_PER_SQFT = (
+    float(os.environ.get("ICF_COST_PER_SQFT_LOW", "175")),
+    float(os.environ.get("ICF_COST_PER_SQFT_HIGH", "250")),
+)
+
+# Checked in order; the first keyword found in project_type wins
+PROJECT_TYPES = (
+    ("commercial", 0.9), ("multi", 0.9), ("new", 1.0), ("custom", 1.0), ("home", 0.9), ("house", 0.9),
+    ("addition", 0.65), ("basement", 0.55), ("foundation", 0.55), ("garage", 0.45), ("remodel", 0.45),
+    ("renovation", 0.45), ("pool", 0.4), ("wall", 0.35), ("other", 0.3),
+)
+DETAIL_TERMS = re.compile(r"\b(acre|lot|sq|sqft|square|bed|bath|stor(?:y|ies)|basement|budget|permit|plans?|"
+                          r"blueprints?|architect|hurricane|tornado|energy|insulat\w*)\b")
+
+_NUMBER = re.compile(r"(\d+(?:\.\d+)?)\s*([km])?(?![a-z])|(\d+(?:\.\d+)?)")
+_UNKNOWN = {"", "n/a", "na", "none", "unknown", "not sure", "unsure", "tbd"}
+# A bare 4-digit number in this range is a calendar year ("spring 2027"), not an amount
+_YEAR = re.compile(r"\b(19\d\d|20\d\d|2100)\b(?!\s*[km]\b)")
+_ASAP = re.compile(r"\b(asap|immediate\w*|right away|right now|now|urgent\w*)\b")
+# "not right now", "no rush, not urgent", "isn't urgent": a negation up to one word before the match
+_NEGATED = re.compile(r"(\b(not|no|never)|n't)\s+(\w+\s+)?$")
+# Month a season or month name points at, for "spring 2027" / "march 2027"
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10,
+    "nov": 11, "dec": 12, "spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 12,
+}
+_MONTH_NAME = re.compile(r"\b(" + "|".join(_MONTHS) + r")[a-z]*\b")
+
+
+def load_weights(spec: str = None) -> dict:
+    """Parse "budget=0.3,timeline=0.25,..." (missing factors keep their default) and normalize to sum 1."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            if name.strip() not in weights:
+                raise ValueError(f"Unknown scoring factor: {name.strip()}")
+            weights[name.strip()] = max(float(value), 0.0)
+    total = sum(weights.values()) or 1.0
+    return {name: weight / total for name, weight in weights.items()}
+
+
+LEAD_SCORE_WEIGHTS = load_weights(os.environ.get("LEAD_SCORE_WEIGHTS"))
+
+
+def _text(value) -> str:
+    text = str(value or "").strip().casefold().replace("_", " ").replace(",", "").replace("$", "")
+    return "" if text in _UNKNOWN else text
+
+
+def _amounts(text: str) -> list:
+    # "300k 500k", "300-500k", "1.2m": a suffix applies to bare numbers before it
+    values, suffix = [], None
+    for number, unit, bare in reversed(_NUMBER.findall(text)):
+        unit = unit or suffix
+        suffix = unit or suffix
+        value = float(number or bare)
+        values.append(value * {"k": 1e3, "m": 1e6}.get(unit, 1))
+    return values[::-1]
+
+
+@lru_cache(maxsize=4096)
+def parse_budget(value) -> tuple:
+    """(low, high) dollars, or None."""
+    text = _YEAR.sub(" ", _text(value))
+    amounts = [a for a in _amounts(text) if a >= 1_000]
+    if not amounts:
+        return None
+    low, high = min(amounts), max(amounts)
+    if len(amounts) == 1:
+        if re.search(r"under|less|below|up to|max", text):
+            low = high / 2
+        elif re.search(r"over|more|above|plus|\+", text):
+            high = low * 1.5
+    return low, high
+
+
+def _months_until(year: int, text: str, today: tuple) -> float:
+    month = _MONTH_NAME.search(text)
+    target = (year, _MONTHS[month.group(1)] if month else 1)
+    return float(max((target[0] - today[0]) * 12 + target[1] - today[1], 0))
+
+
+def parse_timeline_months(value) -> float:
+    """Months until the project starts (the earliest mentioned), or NaN."""
+    today = date.today()
+    # The month is part of the cache key: "spring 2027" gets closer every month
+    return _timeline_months(value, (today.year, today.month))
+
+
+@lru_cache(maxsize=4096)
+def _timeline_months(value, today: tuple) -> float:
+    text = _text(value)
+    if not text:
+        return math.nan
+    if any(not _NEGATED.search(text[:m.start()]) for m in _ASAP.finditer(text)):
+        return 0.0
+    years = [int(y) for y in _YEAR.findall(text)]
+    if years:
+        return _months_until(min(years), text, today)
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", text)]
+    if not numbers:
+        for phrase, months in (("few months", 3.0), ("month", 1.0), ("year", 12.0)):
+            if phrase in text:
+                return months
+        return 24.0 if re.search(r"flexible|no rush|someday|exploring|planning|research", text) else math.nan
+    months = min(numbers)
+    if "week" in text:
+        months /= 4.345
+    elif "year" in text or "yr" in text:
+        months *= 12
+    return months
+
+
+parse_timeline_months.cache_clear = _timeline_months.cache_clear
+
+
+@lru_cache(maxsize=4096)
+def parse_square_feet(value) -> float:
+    text = _text(value)
+    numbers = [a for a in _amounts(text) if a >= 100]
+    if numbers:
+        return sum(numbers) / len(numbers)
+    for word, sqft in (("small", 1_200), ("medium", 2_200), ("large", 3_500)):
+        if word in text:
+            return float(sqft)
+    return math.nan
+
+
+@lru_cache(maxsize=4096)
+def project_type_factor(value) -> float:
+    text = _text(value)
+    for keyword, factor in PROJECT_TYPES:
+        if keyword in text:
+            return factor
+    return NEUTRAL_FACTOR
+
+
+@lru_cache(maxsize=4096)
+def description_factor(value) -> float:
+    text = _text(value)
+    if not text:
+        return 0.0
+    length = min(len(text.split()) / DESCRIPTION_WORDS, 1.0)
+    details = len(DETAIL_TERMS.findall(text)) + len(re.findall(r"\d+", text))
+    return 0.7 * length + 0.3 * min(details / 3, 1.0)
+
+
+def lead_factors(leads: list) -> tuple:
+    """(factors, months, budgets, sqft): an (n, 5) factor matrix plus the parsed inputs it came from."""
+    budgets = [parse_budget(lead.get("budget_range")) for lead in leads]
+    months = np.array([parse_timeline_months(lead.get("timeline")) for lead in leads], dtype=float)
+    sqft = np.array([parse_square_feet(lead.get("project_size")) for lead in leads], dtype=float)
+    midpoints = np.array([(b[0] + b[1]) / 2 if b else math.nan for b in budgets], dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        budget = np.log(midpoints / BUDGET_RANGE[0]) / math.log(BUDGET_RANGE[1] / BUDGET_RANGE[0])
+        timeline = 1.0 - months / TIMELINE_HORIZON_MONTHS
+        size = (sqft - SIZE_RANGE[0]) / (SIZE_RANGE[1] - SIZE_RANGE[0])
+    factors = np.column_stack([
+        budget,
+        timeline,
+        np.array([project_type_factor(lead.get("project_type")) for lead in leads], dtype=float),
+        size,
+        np.array([description_factor(lead.get("description")) for lead in leads], dtype=float),
+    ]) if leads else np.empty((0, len(FACTORS)))
+    factors = np.clip(np.nan_to_num(factors, nan=NEUTRAL_FACTOR), 0.0, 1.0)
+    return factors, months, budgets, sqft
+
+
+def score_factors(factors: np.ndarray, weights: dict = None) -> np.ndarray:
+    weights = weights or LEAD_SCORE_WEIGHTS
+    vector = np.array([weights[name] for name in FACTORS])
+    return np.rint(factors @ vector * 100).astype(int)
+
+
+def grades_for(scores: np.ndarray) -> np.ndarray:
+    # Count of thresholds the score misses: 0 -> A ... 3 -> D
+    return GRADES[(scores[:, None] < np.array(GRADE_THRESHOLDS)).sum(axis=1)]
+
+
+def urgency_for(months: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(months), "medium",
+                    np.where(months <= URGENCY_MONTHS[0], "high",
+                             np.where(months <= URGENCY_MONTHS[1], "medium", "low")))
+
+
+def _money(value: float) -> str:
+    return f"${round(value, -3):,.0f}"
+
+
+def estimated_value(budget, sqft: float) -> str:
+    if budget:
+        low, high = budget
+        return _money(low) if low == high else f"{_money(low)} - {_money(high)}"
+    if not math.isnan(sqft):
+        return f"{_money(sqft * ICF_COST_PER_SQFT[0])} - {_money(sqft * ICF_COST_PER_SQFT[1])}"
+    return "Unknown"
+
+
+def rule_scores(leads: list, weights: dict = None) -> list:
+    """ai_score dicts for `leads` (insights and follow_up_message left empty for the LLM)."""
+    factors, months, budgets, sqft = lead_factors(leads)
+    scores = score_factors(factors, weights)
+    grades = grades_for(scores)
+    urgency = urgency_for(months)
+    return [
+        {
+            "score": int(scores[i]),
+            "grade": str(grades[i]),
+            "urgency": str(urgency[i]),
+            "estimated_value": estimated_value(budgets[i], sqft[i]),
+            "recommended_action": RECOMMENDED_ACTIONS[str(grades[i])],
+            "insights": "",
+            "follow_up_message": "",
+            "factors": {name: round(float(factors[i, j]), 2) for j, name in enumerate(FACTORS)},
+            "method": "rules",
+        }
+        for i in range(len(leads))
+    ]
+
+
+# ─── Batch Lead Scoring ───
+# Scores many leads in one request: the leads are loaded with one query,
+# scored together by the rule engine and written back with one bulk_write.
+# The optional LLM narrative (insights, follow_up_message) runs with at most
+# LEAD_SCORE_CONCURRENCY calls in flight, each behind the LLM governor. Each
+# score is stored with ai_score_hash, a hash of the inputs and weights it
+# was computed from, so leads whose inputs haven't changed are skipped.
+
+LEAD_SCORE_BATCH_MAX = int(os.environ.get("LEAD_SCORE_BATCH_MAX", "200"))
+LEAD_SCORE_CONCURRENCY = int(os.environ.get("LEAD_SCORE_CONCURRENCY", "4"))
+
+# Lead fields the scoring rubric reads
+SCORING_FIELDS = ("name", "city", "state", "project_type", "project_size", "budget_range", "timeline", "description")
+SCORING_PROJECTION = {"_id": 0, "id": 1, "ai_score_hash": 1, "ai_score": 1, **{f: 1 for f in SCORING_FIELDS}}
+
+# Bump to rescore everything after changing the rubric
+SCORING_VERSION = "4"
+
+
+def scoring_input_hash(lead: dict) -> str:
+    weights = [round(LEAD_SCORE_WEIGHTS[name], 6) for name in FACTORS]
+    inputs = json.dumps([SCORING_VERSION, weights, *(lead.get(f) for f in SCORING_FIELDS)], separators=(",", ":"))
+    return hashlib.sha256(inputs.encode("utf-8")).hexdigest()[:32]
+
+
+def needs_scoring(lead: dict) -> bool:
+    return lead.get("ai_score_hash") != scoring_input_hash(lead)
+
+
+def has_narrative(lead: dict) -> bool:
+    return bool((lead.get("ai_score") or {}).get("narrative"))
+
+
+def score_update(lead: dict, score_data: dict) -> dict:
+    return {"$set": {"ai_score": score_data, "ai_score_hash": scoring_input_hash(lead)}}
+
+
+async def score_leads(collection, leads: list, emit, narrate=None, force: bool = False,
+                      concurrency: int = LEAD_SCORE_CONCURRENCY) -> dict:
+    """
+    Rule-score `leads` and persist the results. With `narrate(lead, score)
+    -> {"insights", "follow_up_message"}`, leads without a narrative also
+    get one from the LLM. `emit(event, data)` receives "start", one
+    "progress" per lead and "done".
+    """
+    pending = [lead for lead in leads if force or needs_scoring(lead) or (narrate and not has_narrative(lead))]
+    summary = {"total": len(leads), "skipped": len(leads) - len(pending), "scored": 0, "narrated": 0,
+               "narrative_failed": 0}
+    await emit("start", {"total": summary["total"], "skipped": summary["skipped"], "to_score": len(pending)})
+
+    slots = asyncio.Semaphore(max(concurrency, 1))
+    ops = []
+
+    async def one(lead: dict, score_data: dict):
+        if narrate is not None:
+            async with slots:
+                try:
+                    score_data.update(await narrate(lead, score_data), narrative=True)
+                    summary["narrated"] += 1
+                except Exception as e:
+                    # The rule-based score still stands without the narrative
+                    logger.error(f"Lead narrative failed for {lead['id']}: {e}")
+                    summary["narrative_failed"] += 1
+        ops.append(UpdateOne({"id": lead["id"]}, score_update(lead, score_data)))
+        summary["scored"] += 1
+        await emit("progress", {"lead_id": lead["id"], "ai_score": score_data, "completed": summary["scored"]})
+
+    await asyncio.gather(*(one(lead, score) for lead, score in zip(pending, rule_scores(pending))))
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+    await emit("done", summary)
+    return summary
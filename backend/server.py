@@ -1,10 +1,13 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Request, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+from contextlib import aclosing
+import html
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -12,15 +15,49 @@ from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
 import httpx
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from emergentintegrations.llm.chat import UserMessage
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionRequest, CheckoutStatusResponse
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
 from routes import content
+from models.schedule import SchedulePostCreate, SchedulePostUpdate
+from bulk_helper import stream_bulk_insert, scheduled_post_doc
 from vision_helper import analyze_image_with_gpt4o
+from index_helper import ensure_indexes
+from pagination_helper import paginate, clamp_limit, page_response
+from projection_helper import resolve_projection
+from response_helper import fast_json
+from session_helper import chat_sessions, open_chat_session
+from sse_helper import (
+    sse_response, stream_metrics, sse_event, event_response, task_response, SSE_HEARTBEAT_SECONDS
+)
+from llm_helper import (
+    complete, stream_complete, flight_key, new_chat, send, send_hedged, stream, single_flight, governor,
+    INTAKE_MODEL, INTERACTIVE, STANDARD, BATCH
+)
+import resilience_helper
+from resilience_helper import breaker, LlmUnavailable
+from scoring_helper import (
+    rule_scores, score_leads, score_update, scoring_input_hash, needs_scoring, has_narrative,
+    SCORING_PROJECTION, LEAD_SCORE_BATCH_MAX
+)
+from job_helper import JobQueue, public_job, FINISHED_STATES, JOB_WATCH_SECONDS, JOB_MAX_ATTEMPTS
+from usage_helper import llm_usage, read_usage, run_usage_flusher
+from json_stream_helper import parse_llm_json, parse_llm_stream, PartialReply, JsonStreamError
+from answer_cache_helper import answer_cache, normalize_question
+from context_helper import build_intake_context, FOLD_SYSTEM_PROMPT
+from etag_helper import collection_version, bump_version, make_etag, etag_matches, cache_headers, not_modified
+from analytics_helper import compute_analytics
+import rollup_helper as rollups
+from notification_helper import (
+    insert_broadcast, insert_notification, init_state, notification_feed, unread_count,
+    mark_read, mark_all_read as mark_all_notifications_read, run_unread_reconciler
+)
+from auth_helper import (
+    hash_password, verify_password, needs_rehash, shutdown_hash_pool, token_cache, revoke_token, is_revoked
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -34,6 +71,7 @@ db = client[os.environ['DB_NAME']]
 
 JWT_SECRET = "icf-hub-jwt-secret-2024-xK9mP2vL"
 JWT_ALGORITHM = "HS256"
+JWT_TOKEN_TTL_HOURS = float(os.environ.get("JWT_TOKEN_TTL_HOURS", "168"))
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY', 'sk_test_emergent')
 SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
@@ -54,10 +92,22 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 stripe_checkout = None
+background_tasks = []
 
 @app.on_event("startup")
 async def startup_event():
-    pass 
+    await ensure_indexes(db)
+    background_tasks.append(asyncio.create_task(_seed_rollups()))
+    background_tasks.append(asyncio.create_task(run_unread_reconciler(db)))
+    # Also picks up jobs left unfinished by a previous process once their lease expires
+    background_tasks.append(asyncio.create_task(campaign_jobs.run_worker()))
+    background_tasks.append(asyncio.create_task(run_usage_flusher(db)))
+
+async def _seed_rollups():
+    try:
+        await rollups.ensure_rollups(db)
+    except Exception as e:
+        logger.error(f"Rollup seeding failed: {e}")
 
 # ─── Models ───
 
@@ -129,27 +179,18 @@ class CampaignContentRequest(BaseModel):
 
 class LeadScoreRequest(BaseModel):
     lead_id: str
+
+class LeadScoreBatchRequest(BaseModel):
+    lead_ids: Optional[List[str]] = None
+    status: Optional[str] = None
+    force: bool = False
+    narrative: bool = False
+    stream: bool = True
     
 class MatchRequest(BaseModel):
     lead_id: str
     contractor_id: str
 
-class SchedulePostCreate(BaseModel):
-    platform: str
-    content: str
-    hashtags: List[str] = []
-    cta: str = ""
-    scheduled_date: str
-    scheduled_time: str = "10:00"
-    campaign_id: Optional[str] = None
-    content_type: str = "educational"
-
-class SchedulePostUpdate(BaseModel):
-    content: Optional[str] = None
-    scheduled_date: Optional[str] = None
-    scheduled_time: Optional[str] = None
-    status: Optional[str] = None
-
 class SocialAccountConnect(BaseModel):
     platform: str
     account_name: str = ""
@@ -178,19 +219,26 @@ class HubSpotSendRequest(BaseModel):
 # ─── Auth Helper ───
 
 def create_token(contractor_id: str, email: str):
-    return jwt.encode({"id": contractor_id, "email": email}, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    exp = datetime.now(timezone.utc) + timedelta(hours=JWT_TOKEN_TTL_HOURS)
+    return jwt.encode({"id": contractor_id, "email": email, "exp": exp}, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 async def get_current_contractor(authorization: str = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
     token = authorization.split(" ")[1]
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if await is_revoked(db, token):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    token_cache.put(token, payload)
+    return payload
 
 # ─── Email Helper ───
 
@@ -220,7 +268,7 @@ async def register(data: ContractorRegister):
     existing = await db.contractors.find_one({"email": data.email}, {"_id": 0})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+    hashed = await hash_password(data.password)
     contractor_id = str(uuid.uuid4())
     doc = {
         "id": contractor_id,
@@ -237,6 +285,8 @@ async def register(data: ContractorRegister):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.contractors.insert_one(doc)
+    await bump_version(db, "contractors")
+    await init_state(db, contractor_id, doc["created_at"])
     token = create_token(contractor_id, data.email)
     safe_doc = {k: v for k, v in doc.items() if k not in ["password", "_id"]}
     return {"token": token, "contractor": safe_doc}
@@ -246,12 +296,61 @@ async def login(data: ContractorLogin):
     contractor = await db.contractors.find_one({"email": data.email})
     if not contractor:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not bcrypt.checkpw(data.password.encode(), contractor["password"].encode()):
+    if not await verify_password(data.password, contractor["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    # Transparently upgrade hashes created with an older cost factor
+    if needs_rehash(contractor["password"]):
+        new_hash = await hash_password(data.password)
+        await db.contractors.update_one({"id": contractor["id"]}, {"$set": {"password": new_hash}})
     token = create_token(contractor["id"], contractor["email"])
     safe_doc = {k: v for k, v in contractor.items() if k not in ["password", "_id"]}
     return {"token": token, "contractor": safe_doc}
 
+@api_router.post("/auth/logout")
+async def logout(authorization: str = Header(None), user=Depends(get_current_contractor)):
+    await revoke_token(db, authorization.split(" ")[1], user.get("exp"))
+    return {"message": "Logged out"}
+
+@api_router.get("/admin/token-cache")
+async def get_token_cache_stats():
+    return token_cache.stats()
+
+@api_router.get("/admin/llm-coalescing")
+async def get_llm_coalescing_stats():
+    return single_flight.stats()
+
+@api_router.get("/admin/llm-governor")
+async def get_llm_governor_stats():
+    return governor.stats()
+
+@api_router.get("/admin/llm-resilience")
+async def get_llm_resilience_stats():
+    return resilience_helper.stats()
+
+@api_router.get("/admin/llm-usage")
+async def get_llm_usage(limit: int = 20):
+    """In-process series plus the stored rollup: overall and the highest-spending contractors."""
+    return {**llm_usage.stats(), "rollup": await read_usage(db, max(1, min(limit, 100)))}
+
+@api_router.get("/metrics")
+async def get_metrics():
+    # Prometheus scrape target for LLM request metrics
+    return PlainTextResponse(llm_usage.prometheus(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/admin/chat-sessions")
+async def get_chat_session_stats():
+    return chat_sessions.stats()
+
+@api_router.get("/admin/answer-cache")
+async def get_answer_cache(limit: int = 100):
+    return {**answer_cache.stats(), "entries": answer_cache.entries(max(1, min(limit, 500)))}
+
+@api_router.delete("/admin/answer-cache")
+async def purge_answer_cache(key: Optional[str] = None):
+    # Accepts either the normalized key or the original question
+    purged = answer_cache.purge(normalize_question(key) or key if key else None)
+    return {"purged": purged}
+
 # ─── HubSpot OAuth ───
 
 @api_router.get("/auth/hubspot/authorize")
@@ -411,7 +510,10 @@ HOMEOWNER_MONTHLY_PRICE = 19.00
 HOMEOWNER_PASS_PRICE = 49.00
 
 @api_router.get("/contractors")
-async def list_contractors():
+async def list_contractors(request: Request):
+    etag = make_etag("contractors", await collection_version(db, "contractors"))
+    if etag_matches(request, etag):
+        return not_modified(etag, "contractors")
     contractors = await db.contractors.find(
         {"plan": {"$ne": "free"}},
         {"_id": 0, "password": 0}
@@ -420,14 +522,18 @@ async def list_contractors():
         {},
         {"_id": 0, "password": 0}
     ).to_list(100)
-    return all_contractors if len(contractors) == 0 else contractors
+    body = all_contractors if len(contractors) == 0 else contractors
+    return fast_json(body, headers=cache_headers(etag, "contractors"))
 
 @api_router.get("/contractors/{contractor_id}")
-async def get_contractor(contractor_id: str):
+async def get_contractor(contractor_id: str, request: Request):
+    etag = make_etag("contractor", contractor_id, await collection_version(db, "contractors"))
+    if etag_matches(request, etag):
+        return not_modified(etag, "contractors")
     contractor = await db.contractors.find_one({"id": contractor_id}, {"_id": 0, "password": 0})
     if not contractor:
         raise HTTPException(status_code=404, detail="Contractor not found")
-    return contractor
+    return fast_json(contractor, headers=cache_headers(etag, "contractors"))
 
 @api_router.put("/contractors/profile")
 async def update_profile(data: ContractorUpdate, user=Depends(get_current_contractor)):
@@ -435,6 +541,7 @@ async def update_profile(data: ContractorUpdate, user=Depends(get_current_contra
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     await db.contractors.update_one({"id": user["id"]}, {"$set": update_data})
+    await bump_version(db, "contractors")
     updated = await db.contractors.find_one({"id": user["id"]}, {"_id": 0, "password": 0})
     return updated
 
@@ -584,6 +691,7 @@ async def check_payment_status(session_id: str, request: Request, user=Depends(g
                 {"id": user["id"]},
                 {"$set": {"plan": "pro", "plan_updated_at": datetime.now(timezone.utc).isoformat()}}
             )
+            await bump_version(db, "contractors")
 
         return status_response
     except Exception as e:
@@ -612,6 +720,7 @@ async def stripe_webhook(request: Request):
                     {"id": txn["user_id"]},
                     {"$set": {"plan": "pro", "plan_updated_at": datetime.now(timezone.utc).isoformat()}}
                  )
+                 await bump_version(db, "contractors")
                  await db.payment_transactions.update_one(
                      {"session_id": event.session_id},
                      {"$set": {"payment_status": "paid", "status": "complete"}}
@@ -636,38 +745,43 @@ async def create_lead(data: LeadCreate):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.leads.insert_one(doc)
+    await rollups.record_lead(db, doc["status"], doc["created_at"])
     safe_doc = {k: v for k, v in doc.items() if k != "_id"}
 
-    # Notify all contractors about new lead
-    contractors = await db.contractors.find({}, {"_id": 0, "id": 1, "email": 1}).to_list(500)
-    notifications = []
-    for c in contractors:
-        notifications.append({
-            "id": str(uuid.uuid4()),
-            "contractor_id": c["id"],
-            "type": "new_lead",
-            "title": f"New Lead: {data.name}",
-            "message": f"{data.name} from {data.city}, {data.state} is looking for {data.project_type.replace('_', ' ')} ({data.budget_range.replace('_', ' ')})",
-            "lead_id": lead_id,
-            "read": False,
-            "emailed": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        })
-    if notifications:
-        await db.notifications.insert_many(notifications)
+    # Notify all contractors about new lead (stored once, merged into each feed on read)
+    await insert_broadcast(db, {
+        "type": "new_lead",
+        "title": f"New Lead: {data.name}",
+        "message": f"{data.name} from {data.city}, {data.state} is looking for {data.project_type.replace('_', ' ')} ({data.budget_range.replace('_', ' ')})",
+        "lead_id": lead_id,
+        "emailed": False
+    })
 
     return safe_doc
 
 @api_router.get("/leads")
-async def get_leads(user=Depends(get_current_contractor)):
-    leads = await db.leads.find({}, {"_id": 0}).sort("created_at", -1).to_list(200)
-    return leads
+async def get_leads(cursor: Optional[str] = None, limit: Optional[int] = None, fields: Optional[str] = None,
+                    user=Depends(get_current_contractor)):
+    leads, next_cursor = await paginate(
+        db.leads, {}, resolve_projection("leads", fields), "created_at", -1, clamp_limit(limit, 200), cursor
+    )
+    return fast_json(page_response(leads, next_cursor, cursor, limit))
+
+@api_router.get("/leads/{lead_id}")
+async def get_lead(lead_id: str, fields: Optional[str] = None, user=Depends(get_current_contractor)):
+    lead = await db.leads.find_one({"id": lead_id}, resolve_projection("leads", fields, default="full"))
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return lead
 
 @api_router.put("/leads/{lead_id}/status")
 async def update_lead_status(lead_id: str, data: LeadStatusUpdate, user=Depends(get_current_contractor)):
-    result = await db.leads.update_one({"id": lead_id}, {"$set": {"status": data.status}})
-    if result.matched_count == 0:
+    before = await db.leads.find_one_and_update(
+        {"id": lead_id}, {"$set": {"status": data.status}}, projection={"_id": 0, "status": 1}
+    )
+    if before is None:
         raise HTTPException(status_code=404, detail="Lead not found")
+    await rollups.record_lead_status_change(db, before.get("status", "new"), data.status)
     return {"message": "Status updated"}
 
 # ─── AI Intake & Matching ───
@@ -726,54 +840,48 @@ async def generate_intake_summary(session_id: str) -> str:
     )
 
     try:
-        summary_chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"summary_{session_id}",
-            system_message="You summarize homeowner intake chats for ICF Hub."
-        ).with_model("openai", "gpt-5.2")
-        summary_response = await summary_chat.send_message(UserMessage(text=summary_prompt))
-        return summary_response
+        return await complete(
+            EMERGENT_LLM_KEY, "You summarize homeowner intake chats for ICF Hub.", summary_prompt,
+            route="intake_summary", priority=INTERACTIVE, model=INTAKE_MODEL, session_prefix=f"summary_{session_id}"
+        )
     except Exception as e:
         logger.error(f"Summary generation failed for session {session_id}: {e}")
         return ""
 
+async def summarize_intake_turns(prompt: str) -> str:
+    return await complete(EMERGENT_LLM_KEY, FOLD_SYSTEM_PROMPT, prompt, route="intake_fold", priority=INTERACTIVE,
+                          model=INTAKE_MODEL, session_prefix="fold")
+
 @api_router.get("/admin/users")
-async def get_admin_users():
+async def get_admin_users(cursor: Optional[str] = None, limit: Optional[int] = None):
     # Fetch all contractors
-    contractors = await db.contractors.find({}, {"_id": 0, "password": 0}).sort("created_at", -1).to_list(100)
-    return contractors
+    contractors, next_cursor = await paginate(
+        db.contractors, {}, {"_id": 0, "password": 0}, "created_at", -1, clamp_limit(limit, 100), cursor
+    )
+    return fast_json(page_response(contractors, next_cursor, cursor, limit))
 
 @api_router.get("/admin/payments")
-async def get_admin_payments():
+async def get_admin_payments(cursor: Optional[str] = None, limit: Optional[int] = None):
     # Fetch all transactions
-    payments = await db.payment_transactions.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return payments
+    payments, next_cursor = await paginate(
+        db.payment_transactions, {}, {"_id": 0}, "created_at", -1, clamp_limit(limit, 100), cursor
+    )
+    return fast_json(page_response(payments, next_cursor, cursor, limit))
 
-@api_router.post("/intake/chat")
-async def intake_chat(data: ChatRequest):
+async def start_intake_turn(data: ChatRequest):
+    """Build the context, store the homeowner's message and return (make_chat, prompt)."""
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=500, detail="AI service not configured")
     
     session_id = data.session_id
     
-    # 1. Fetch History from DB (Stateless Context)
-    history = await db.intake_chats.find({"session_id": session_id}).sort("created_at", 1).to_list(20)
-    
-    # Format History for Context
-    context_str = "Conversation History:\n"
-    for msg in history:
-        role = "AI" if msg["role"] == "assistant" else "Homeowner"
-        context_str += f"{role}: {msg['content']}\n"
-    
-    # 2. Initialize/Get Chat Instance
-    if session_id not in chat_instances:
-        chat_instances[session_id] = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=INTAKE_SYSTEM_PROMPT
-        ).with_model("openai", "gpt-5.2")
+    # 1. Build a token-budgeted context (rolling summary + newest turns) from the DB
+    context_str = await build_intake_context(db, session_id, summarize_intake_turns)
     
-    chat = chat_instances[session_id]
+    # 2. Fresh chat per turn: the context above is the only history it sees,
+    #    so any number of them (e.g. a hedged copy) can answer it
+    def make_chat():
+        return new_chat(EMERGENT_LLM_KEY, session_id, INTAKE_SYSTEM_PROMPT, INTAKE_MODEL)
     
     # Store user msg
     await db.intake_chats.insert_one({
@@ -784,17 +892,28 @@ async def intake_chat(data: ChatRequest):
         "created_at": datetime.now(timezone.utc).isoformat()
     })
     
-    try:
-        # 3. Send Message with FULL CONTEXT
-        full_prompt = f"{context_str}\nHomeowner (Current): {data.message}\n(Respond naturally as the Intake Coordinator based on the history)"
-        
-        logger.info(f"Sending chat message for session {session_id}")
-        response = await chat.send_message(UserMessage(text=full_prompt))
-        logger.info("Chat response received")
-    except Exception as e:
-        logger.error(f"Chat error details: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
-    
+    full_prompt = f"{context_str}\nHomeowner (Current): {data.message}\n(Respond naturally as the Intake Coordinator based on the history)"
+    return make_chat, full_prompt
+
+DEGRADED_INTAKE_REPLY = (
+    "Thanks, I've saved your message. Our assistant is briefly unavailable, so a member of our team will "
+    "follow up with you. You're also welcome to send your next message in a minute or two."
+)
+
+async def degraded_intake_turn(data: ChatRequest) -> dict:
+    """Answer an intake turn while the LLM breaker is open; the message is already stored."""
+    # Not stored as an AI turn: the next real turn should see the homeowner's message, not this
+    await asyncio.to_thread(
+        send_email_notification,
+        subject=f"Intake needs follow-up - Session {data.session_id[:8]}",
+        content=f"The AI intake assistant was unavailable for this message.<br><strong>Message:</strong> "
+                f"{html.escape(data.message)}<br><strong>Session ID:</strong> {data.session_id}"
+    )
+    return {"response": DEGRADED_INTAKE_REPLY, "session_id": data.session_id, "is_complete": False,
+            "lead_id": None, "summary": None, "degraded": True}
+
+async def finish_intake_turn(session_id: str, response: str) -> dict:
+    """Store the reply and, on COMPLETE:, turn the intake into a lead."""
     # Store assistant msg
     await db.intake_chats.insert_one({
         "id": str(uuid.uuid4()),
@@ -814,16 +933,18 @@ async def intake_chat(data: ChatRequest):
             summary = response.replace("COMPLETE:", "").strip()
         
         lead_id = str(uuid.uuid4())
+        lead_created_at = datetime.now(timezone.utc).isoformat()
         await db.leads.insert_one({
             "id": lead_id,
             "session_id": session_id,
             "status": "pending_match",
             "source": "ai_intake",
             "chat_summary": summary,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": lead_created_at,
             "name": "Homeowner (AI Intake)", 
             "city": "Unknown", "state": "Unknown", "project_type": "Unknown"
         })
+        await rollups.record_lead(db, "pending_match", lead_created_at)
         
         matches = await db.contractors.find({"plan": "pro"}, {"_id": 0, "id": 1, "company_name": 1, "city": 1, "state": 1}).to_list(3)
         if not matches:
@@ -836,6 +957,41 @@ async def intake_chat(data: ChatRequest):
 
     return {"response": response, "session_id": session_id, "is_complete": is_complete, "lead_id": lead_id, "summary": summary}
 
+@api_router.post("/intake/chat")
+async def intake_chat(data: ChatRequest):
+    make_chat, full_prompt = await start_intake_turn(data)
+    if not breaker.available():
+        return await degraded_intake_turn(data)
+    try:
+        # 3. Send Message with FULL CONTEXT
+        logger.info(f"Sending chat message for session {data.session_id}")
+        response = await send_hedged(make_chat, UserMessage(text=full_prompt), INTERACTIVE, route="intake_chat",
+                                     model=INTAKE_MODEL, system_message=INTAKE_SYSTEM_PROMPT)
+        logger.info("Chat response received")
+    except LlmUnavailable:
+        return await degraded_intake_turn(data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chat error details: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+    
+    return await finish_intake_turn(data.session_id, response)
+
+@api_router.post("/intake/chat/stream")
+async def intake_chat_stream(data: ChatRequest):
+    make_chat, full_prompt = await start_intake_turn(data)
+    if not breaker.available():
+        degraded = await degraded_intake_turn(data)
+        return sse_response("intake_chat", {"session_id": data.session_id}, _replay(degraded["response"]),
+                            lambda response: _done(degraded))
+    return sse_response(
+        "intake_chat", {"session_id": data.session_id},
+        stream(make_chat(), UserMessage(text=full_prompt), INTERACTIVE, route="intake_chat",
+               model=INTAKE_MODEL, system_message=INTAKE_SYSTEM_PROMPT),
+        lambda response: finish_intake_turn(data.session_id, response)
+    )
+
 @api_router.post("/intake/upload")
 async def upload_file(session_id: str = Form(...), file: UploadFile = File(...)):
     filename = f"{uuid.uuid4().hex}_{file.filename}"
@@ -862,20 +1018,8 @@ async def upload_file(session_id: str = Form(...), file: UploadFile = File(...))
             "created_at": datetime.now(timezone.utc).isoformat()
         })
 
-        # Inject file info into active chat instance if exists
-        if session_id in chat_instances:
-            chat = chat_instances[session_id]
-            # Send context silently or as system prompt update if possible, 
-            # but LlmChat is session based. Sending a user message with system info is a workaround.
-            # Ideally, we just append to history and let the NEXT user message trigger the response.
-            # But the user expects a reply to the upload.
-            
-            # Let's trigger an IMMEDIATE AI response to the upload!
-            # The AI should see the analysis and comment on it.
-            
-            # Update: We want the AI to "continue answering questions".
-            # So we just log it. When the user says "What do you think?", the AI reads history.
-            pass
+        # No live chat to update: the next /intake/chat turn reads this upload
+        # from intake_chats along with the rest of the history.
 
         # Send Email Notification
         email_sent = send_email_notification(
@@ -890,10 +1034,12 @@ async def upload_file(session_id: str = Form(...), file: UploadFile = File(...))
         raise HTTPException(500, "Upload failed")
 
 @api_router.get("/admin/leads")
-async def get_admin_leads():
+async def get_admin_leads(cursor: Optional[str] = None, limit: Optional[int] = None):
     # Helper endpoint for the "Connection Control Center"
-    leads = await db.leads.find({"status": "pending_match"}, {"_id": 0}).sort("created_at", -1).to_list(50)
-    return leads
+    leads, next_cursor = await paginate(
+        db.leads, {"status": "pending_match"}, {"_id": 0}, "created_at", -1, clamp_limit(limit, 50), cursor
+    )
+    return fast_json(page_response(leads, next_cursor, cursor, limit))
 
 @api_router.post("/admin/connect")
 async def connect_lead(data: MatchRequest):
@@ -906,18 +1052,16 @@ async def connect_lead(data: MatchRequest):
         
     # 1. Update Lead Status
     await db.leads.update_one({"id": data.lead_id}, {"$set": {"status": "connected", "matched_contractor_id": data.contractor_id}})
+    await rollups.record_lead_status_change(db, lead.get("status", "new"), "connected")
     
     # 2. Create Notifications (Mock Email)
     now = datetime.now(timezone.utc).isoformat()
     
     # Notify Contractor
-    await db.notifications.insert_one({
-        "id": str(uuid.uuid4()),
-        "contractor_id": data.contractor_id,
+    await insert_notification(db, data.contractor_id, {
         "type": "new_lead_connection",
         "title": "New Lead Connected!",
         "message": f"You have been connected with a new lead! Check your dashboard for details.",
-        "read": False,
         "created_at": now
     })
     
@@ -926,8 +1070,6 @@ async def connect_lead(data: MatchRequest):
 
 # ─── Chat Endpoint ───
 
-chat_instances = {}
-
 ICF_SYSTEM_PROMPT = """You are ICF Hub's AI construction advisor, an expert on Insulated Concrete Forms (ICF) construction. Help users understand:
 - What ICF construction is and how it works
 - Benefits: energy efficiency (50-70% savings), disaster resistance (wind up to 250mph, fire-resistant, earthquake-resistant), superior sound insulation, 100+ year durability
@@ -937,20 +1079,50 @@ ICF_SYSTEM_PROMPT = """You are ICF Hub's AI construction advisor, an expert on I
 
 Be helpful, concise, and professional. For specific project costs, provide rough ranges and recommend getting a proper quote through our platform. Keep responses under 200 words unless more detail is explicitly requested."""
 
-@api_router.post("/chat")
-async def chat_endpoint(data: ChatRequest):
+DEGRADED_CHAT_REPLY = (
+    "Our AI advisor is briefly unavailable. In short: ICF homes typically cost 5-10% more to build than wood "
+    "framing and save 50-70% on heating and cooling. Please ask again in a minute, or request a quote and an "
+    "ICF contractor will follow up with you."
+)
+
+def degraded_chat_reply(data: ChatRequest) -> dict:
+    """What the advisor answers while the LLM breaker is open: a cached answer to the question, or a holding reply."""
+    # Nothing is stored; the conversation carries on normally once the provider is back
+    question_key = normalize_question(data.message)
+    answer = answer_cache.get(question_key) if question_key else None
+    return {"response": answer or DEGRADED_CHAT_REPLY, "session_id": data.session_id, "degraded": True}
+
+async def cached_first_answer(data: ChatRequest) -> Optional[str]:
+    """Replay a cached answer when this message opens a new conversation."""
+    question_key = normalize_question(data.message)
+    if not question_key or f"chat:{data.session_id}" in chat_sessions:
+        return None
+    if await db.chat_messages.find_one({"session_id": data.session_id}, {"_id": 1}):
+        return None
+    answer = answer_cache.get(question_key)
+    if answer is None:
+        return None
+    # Write both turns so history and session rebuilds look like any other chat
+    now = datetime.now(timezone.utc).isoformat()
+    await db.chat_messages.insert_many([
+        {"id": str(uuid.uuid4()), "session_id": data.session_id, "role": "user",
+         "content": data.message, "created_at": now},
+        {"id": str(uuid.uuid4()), "session_id": data.session_id, "role": "assistant",
+         "content": answer, "created_at": datetime.now(timezone.utc).isoformat(), "cached": True},
+    ])
+    return answer
+
+async def start_chat_turn(data: ChatRequest):
+    """Open the advisor session, store the user's message and return (session_key, chat, first_turn)."""
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=500, detail="AI service not configured")
     
     session_id = data.session_id
-    if session_id not in chat_instances:
-        chat_instances[session_id] = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=ICF_SYSTEM_PROMPT
-        )
-    
-    chat = chat_instances[session_id]
+    session_key = f"chat:{session_id}"
+    chat, restored = await open_chat_session(
+        session_key, db.chat_messages, session_id, ICF_SYSTEM_PROMPT,
+        lambda system_message: new_chat(EMERGENT_LLM_KEY, session_id, system_message)
+    )
     
     await db.chat_messages.insert_one({
         "id": str(uuid.uuid4()),
@@ -959,30 +1131,129 @@ async def chat_endpoint(data: ChatRequest):
         "content": data.message,
         "created_at": datetime.now(timezone.utc).isoformat()
     })
-    
-    try:
-        response = await chat.send_message(UserMessage(text=data.message))
-    except Exception as e:
-        logger.error(f"Chat error: {e}")
-        raise HTTPException(status_code=500, detail="AI service temporarily unavailable")
-    
+    return session_key, chat, restored == 0
+
+async def finish_chat_turn(data: ChatRequest, session_key: str, response: str, first_turn: bool = False) -> dict:
+    chat_sessions.record(session_key, data.message, response)
+    if first_turn:
+        question_key = normalize_question(data.message)
+        if question_key:
+            answer_cache.put(question_key, data.message, response)
     await db.chat_messages.insert_one({
         "id": str(uuid.uuid4()),
-        "session_id": session_id,
+        "session_id": data.session_id,
         "role": "assistant",
         "content": response,
         "created_at": datetime.now(timezone.utc).isoformat()
     })
     
-    return {"response": response, "session_id": session_id}
+    return {"response": response, "session_id": data.session_id}
+
+async def first_chat_reply(session_key: str, chat, message: str) -> str:
+    """A new session has no history yet, so identical opening questions share one LLM call."""
+    led = False
+
+    async def call():
+        nonlocal led
+        led = True
+        return await send(chat, UserMessage(text=message), INTERACTIVE, route="chat", system_message=ICF_SYSTEM_PROMPT)
+
+    try:
+        response = await single_flight.run(flight_key(ICF_SYSTEM_PROMPT, None, message), call)
+    finally:
+        if not led:
+            llm_usage.shared("chat")
+    if not led:
+        # This session's LlmChat never saw the exchange; rebuild it from chat_messages next turn
+        chat_sessions.discard(session_key)
+    return response
+
+async def first_chat_deltas(session_key: str, chat, message: str):
+    key = flight_key(ICF_SYSTEM_PROMPT, None, message)
+    pending = single_flight.join(key)
+    if pending is not None:
+        chat_sessions.discard(session_key)
+        llm_usage.shared("chat")
+        yield await asyncio.shield(pending)
+        return
+    deltas = stream(chat, UserMessage(text=message), INTERACTIVE, route="chat", system_message=ICF_SYSTEM_PROMPT)
+    async with aclosing(single_flight.lead_stream(key, deltas)) as leading:
+        async for delta in leading:
+            yield delta
+
+@api_router.post("/chat")
+async def chat_endpoint(data: ChatRequest):
+    cached = await cached_first_answer(data)
+    if cached is not None:
+        return {"response": cached, "session_id": data.session_id}
+    if not breaker.available():
+        return degraded_chat_reply(data)
+    
+    session_key, chat, first_turn = await start_chat_turn(data)
+    try:
+        if first_turn:
+            response = await first_chat_reply(session_key, chat, data.message)
+        else:
+            response = await send(chat, UserMessage(text=data.message), INTERACTIVE, route="chat",
+                                  system_message=ICF_SYSTEM_PROMPT)
+    except LlmUnavailable:
+        return degraded_chat_reply(data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Chat error: {e}")
+        raise HTTPException(status_code=500, detail="AI service temporarily unavailable")
+    
+    return await finish_chat_turn(data, session_key, response, first_turn)
+
+async def _replay(text: str):
+    yield text
+
+async def _replayed(data: ChatRequest, response: str) -> dict:
+    return {"response": response, "session_id": data.session_id}
+
+async def _done(payload: dict) -> dict:
+    return payload
+
+@api_router.post("/chat/stream")
+async def chat_stream(data: ChatRequest):
+    cached = await cached_first_answer(data)
+    if cached is not None:
+        return sse_response("chat", {"session_id": data.session_id}, _replay(cached),
+                            lambda response: _replayed(data, response))
+    if not breaker.available():
+        degraded = degraded_chat_reply(data)
+        return sse_response("chat", {"session_id": data.session_id}, _replay(degraded["response"]),
+                            lambda response: _done(degraded))
+    
+    session_key, chat, first_turn = await start_chat_turn(data)
+    if first_turn:
+        deltas = first_chat_deltas(session_key, chat, data.message)
+    else:
+        deltas = stream(chat, UserMessage(text=data.message), INTERACTIVE, route="chat",
+                        system_message=ICF_SYSTEM_PROMPT)
+    return sse_response(
+        "chat", {"session_id": data.session_id},
+        deltas,
+        lambda response: finish_chat_turn(data, session_key, response, first_turn)
+    )
+
+@api_router.get("/admin/stream-metrics")
+async def get_stream_metrics():
+    return stream_metrics.stats()
 
 @api_router.get("/chat/{session_id}/history")
-async def get_chat_history(session_id: str):
+async def get_chat_history(session_id: str, request: Request):
+    # Messages are append-only and we serve the first 100, so the count pins the body
+    count = await db.chat_messages.count_documents({"session_id": session_id}, limit=100)
+    etag = make_etag("chat_history", session_id, count)
+    if etag_matches(request, etag):
+        return not_modified(etag, "chat_history")
     messages = await db.chat_messages.find(
         {"session_id": session_id},
         {"_id": 0}
     ).sort("created_at", 1).to_list(100)
-    return messages
+    return fast_json(messages, headers=cache_headers(etag, "chat_history"))
 
 # ─── Contact Endpoint ───
 
@@ -1014,8 +1285,13 @@ Platform guidelines:
 
 Always return valid JSON array of content objects with keys: text, hashtags, cta, seo_keywords"""
 
-@api_router.post("/content/generate")
-async def generate_content(data: ContentGenerateRequest, user=Depends(get_current_contractor)):
+async def generate_content_batch(data: ContentGenerateRequest, user: dict, emit=None) -> dict:
+    """
+    Generate a content batch, saving each post as soon as the model finishes
+    writing it. If the reply is cut off, the posts completed so far are kept
+    and the batch is marked partial. `emit(event, data)` gets "start", one
+    "item" per post and nothing else; the caller sends the result.
+    """
     # Check if user is PRO
     contractor = await db.contractors.find_one({"id": user["id"]})
     if contractor.get("plan") != "pro":
@@ -1027,32 +1303,11 @@ async def generate_content(data: ContentGenerateRequest, user=Depends(get_curren
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=500, detail="AI service not configured")
 
-    session_id = f"content_{user['id']}_{uuid.uuid4().hex[:8]}"
-    chat = LlmChat(
-        api_key=EMERGENT_LLM_KEY,
-        session_id=session_id,
-        system_message=CONTENT_SYSTEM_PROMPT
-    )
-
     prompt = f"""Generate {data.count} unique {data.content_type} social media posts for {data.platform}.
 Topic focus: {data.topic if data.topic else 'ICF construction benefits and lead generation'}
 Tone: {data.tone}
 Return ONLY a valid JSON array with objects containing: text, hashtags (array), cta, seo_keywords (array)"""
 
-    try:
-        response = await chat.send_message(UserMessage(text=prompt))
-        import json
-        clean = response.strip()
-        if clean.startswith("```"):
-            clean = clean.split("\n", 1)[1] if "\n" in clean else clean[3:]
-            clean = clean.rsplit("```", 1)[0]
-        content_items = json.loads(clean)
-    except json.JSONDecodeError:
-        content_items = [{"text": response, "hashtags": [], "cta": "Learn more about ICF", "seo_keywords": ["ICF construction"]}]
-    except Exception as e:
-        logger.error(f"Content generation error: {e}")
-        raise HTTPException(status_code=500, detail="AI content generation failed")
-
     doc = {
         "id": str(uuid.uuid4()),
         "contractor_id": user["id"],
@@ -1060,24 +1315,97 @@ Return ONLY a valid JSON array with objects containing: text, hashtags (array),
         "content_type": data.content_type,
         "topic": data.topic,
         "tone": data.tone,
-        "items": content_items,
+        "items": [],
+        "generating": True,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.generated_content.insert_one(doc)
+    if emit is not None:
+        await emit("start", {"id": doc["id"]})
+    saved = []
+
+    async def save_item(item):
+        if not saved:
+            await db.generated_content.insert_one({**doc, "items": [item]})
+        else:
+            await db.generated_content.update_one({"id": doc["id"]}, {"$push": {"items": item}})
+        saved.append(item)
+        if emit is not None:
+            await emit("item", {"index": len(saved) - 1, "item": item})
+
+    partial = False
+    try:
+        value, response = await parse_llm_stream(
+            stream_complete(EMERGENT_LLM_KEY, CONTENT_SYSTEM_PROMPT, prompt, route="content", priority=BATCH,
+                            session_prefix=f"content_{user['id']}", contractor_id=user["id"]),
+            (), save_item
+        )
+    except PartialReply as e:
+        if not saved:
+            if isinstance(e.__cause__, HTTPException):
+                raise e.__cause__
+            logger.error(f"Content generation error: {e.__cause__}")
+            raise HTTPException(status_code=500, detail="AI content generation failed")
+        logger.warning(f"Content generation cut off after {len(saved)} items: {e.__cause__}")
+        value, response, partial = e.value, e.reply, True
+
+    if partial:
+        # The recovered value may end in a cut-off post; keep only the completed ones
+        content_items = saved
+    elif isinstance(value, list) and value:
+        content_items = [item for item in value if isinstance(item, dict)] or saved
+    elif saved:
+        content_items = saved
+    else:
+        content_items = [{"text": response, "hashtags": [], "cta": "Learn more about ICF", "seo_keywords": ["ICF construction"]}]
+
+    doc["items"] = content_items
+    del doc["generating"]
+    if partial:
+        doc["partial"] = True
+    if saved:
+        await db.generated_content.replace_one({"id": doc["id"]}, doc)
+    else:
+        await db.generated_content.insert_one(doc)
+    await rollups.record_content(db, user["id"], data.platform, content_items)
     return {k: v for k, v in doc.items() if k != "_id"}
 
+@api_router.post("/content/generate")
+async def generate_content(data: ContentGenerateRequest, user=Depends(get_current_contractor)):
+    return await generate_content_batch(data, user)
+
+@api_router.post("/content/generate/stream")
+async def generate_content_stream(data: ContentGenerateRequest, user=Depends(get_current_contractor)):
+    """SSE: "start" {id}, "item" {index, item} as each post completes, then "done" with the saved batch."""
+    async def run(emit):
+        await emit("done", await generate_content_batch(data, user, emit))
+    return task_response(run)
+
 @api_router.get("/content")
-async def get_content(user=Depends(get_current_contractor)):
-    content = await db.generated_content.find(
-        {"contractor_id": user["id"]}, {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    return content
+async def get_content(cursor: Optional[str] = None, limit: Optional[int] = None, fields: Optional[str] = None,
+                      user=Depends(get_current_contractor)):
+    content, next_cursor = await paginate(
+        db.generated_content, {"contractor_id": user["id"]}, resolve_projection("content", fields),
+        "created_at", -1, clamp_limit(limit, 50), cursor
+    )
+    return fast_json(page_response(content, next_cursor, cursor, limit))
+
+@api_router.get("/content/{content_id}")
+async def get_content_batch(content_id: str, fields: Optional[str] = None, user=Depends(get_current_contractor)):
+    batch = await db.generated_content.find_one(
+        {"id": content_id, "contractor_id": user["id"]}, resolve_projection("content", fields, default="full")
+    )
+    if not batch:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return batch
 
 @api_router.delete("/content/{content_id}")
 async def delete_content(content_id: str, user=Depends(get_current_contractor)):
-    result = await db.generated_content.delete_one({"id": content_id, "contractor_id": user["id"]})
-    if result.deleted_count == 0:
+    deleted = await db.generated_content.find_one_and_delete(
+        {"id": content_id, "contractor_id": user["id"]}, projection={"_id": 0, "platform": 1, "items": 1}
+    )
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Content not found")
+    await rollups.record_content(db, user["id"], deleted.get("platform", "unknown"), deleted.get("items", []), delta=-1)
     return {"message": "Deleted"}
 
 # ─── AI Campaign Agent ───
@@ -1119,33 +1447,33 @@ async def create_campaign(data: CampaignCreate, user=Depends(get_current_contrac
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.campaigns.insert_one(doc)
+    await rollups.record_campaign(db, user["id"], doc["status"])
     return {k: v for k, v in doc.items() if k != "_id"}
 
 @api_router.get("/campaigns")
-async def get_campaigns(user=Depends(get_current_contractor)):
-    campaigns = await db.campaigns.find(
-        {"contractor_id": user["id"]}, {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    return campaigns
-
-@api_router.post("/campaigns/{campaign_id}/generate")
-async def generate_campaign_content(campaign_id: str, user=Depends(get_current_contractor)):
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=500, detail="AI service not configured")
+async def get_campaigns(cursor: Optional[str] = None, limit: Optional[int] = None, fields: Optional[str] = None,
+                        user=Depends(get_current_contractor)):
+    campaigns, next_cursor = await paginate(
+        db.campaigns, {"contractor_id": user["id"]}, resolve_projection("campaigns", fields),
+        "created_at", -1, clamp_limit(limit, 50), cursor
+    )
+    return fast_json(page_response(campaigns, next_cursor, cursor, limit))
 
+@api_router.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, fields: Optional[str] = None, user=Depends(get_current_contractor)):
     campaign = await db.campaigns.find_one(
-        {"id": campaign_id, "contractor_id": user["id"]}, {"_id": 0}
+        {"id": campaign_id, "contractor_id": user["id"]}, resolve_projection("campaigns", fields, default="full")
     )
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign
 
-    session_id = f"campaign_{campaign_id}_{uuid.uuid4().hex[:8]}"
-    chat = LlmChat(
-        api_key=EMERGENT_LLM_KEY,
-        session_id=session_id,
-        system_message=CAMPAIGN_SYSTEM_PROMPT
-    )
+def campaign_post_target(campaign: dict) -> int:
+    return min(campaign['duration_days'], 14)
 
+async def run_campaign_generation(campaign: dict, report) -> dict:
+    """Job runner: generate the campaign calendar and return the fields to store."""
+    await report(stage="generating")
     platforms_str = ", ".join(campaign["platforms"])
     prompt = f"""Create a {campaign['duration_days']}-day ICF construction marketing campaign.
 Campaign name: {campaign['name']}
@@ -1154,85 +1482,167 @@ Platforms: {platforms_str}
 Target audience: {campaign['target_audience']}
 Additional context: {campaign.get('description', 'N/A')}
 
-Generate a content calendar with {min(campaign['duration_days'], 14)} posts spread across the platforms.
+Generate a content calendar with {campaign_post_target(campaign)} posts spread across the platforms.
 Return ONLY valid JSON with keys: strategy, content_calendar (array of objects with day, platform, content_type, post_text, hashtags, best_time, cta), seo_keywords (array), target_metrics (object)."""
 
+    posts = []
+
+    async def post_ready(post):
+        # Pollers see each post as soon as the model finishes writing it
+        posts.append(post)
+        await report(append={"calendar": post}, posts_generated=len(posts))
+
     try:
-        response = await chat.send_message(UserMessage(text=prompt))
-        import json
-        clean = response.strip()
-        if clean.startswith("```"):
-            clean = clean.split("\n", 1)[1] if "\n" in clean else clean[3:]
-            clean = clean.rsplit("```", 1)[0]
-        ai_content = json.loads(clean)
-    except json.JSONDecodeError:
+        ai_content, response = await parse_llm_stream(
+            stream_complete(EMERGENT_LLM_KEY, CAMPAIGN_SYSTEM_PROMPT, prompt, route="campaign", priority=BATCH,
+                            session_prefix=f"campaign_{campaign['id']}", contractor_id=campaign["contractor_id"]),
+            ("content_calendar",), post_ready
+        )
+    except PartialReply as e:
+        # Retry for the full calendar; on the last attempt keep what arrived
+        if not posts or campaign["generation"]["attempts"] < JOB_MAX_ATTEMPTS:
+            raise e.__cause__
+        logger.warning(f"Campaign {campaign['id']} generation cut off after {len(posts)} posts: {e.__cause__}")
+        ai_content, response = e.value, e.reply
+        if not isinstance(ai_content, dict):
+            # Nothing recoverable around the posts; the raw reply is JSON fragments, not a strategy
+            ai_content = {"strategy": "", "seo_keywords": [], "target_metrics": {}}
+        # Only the posts that finished; the recovered calendar may end in a cut-off one
+        ai_content["content_calendar"] = posts
+        ai_content["partial"] = True
+
+    if not isinstance(ai_content, dict):
         ai_content = {"strategy": response, "content_calendar": [], "seo_keywords": [], "target_metrics": {}}
-    except Exception as e:
-        logger.error(f"Campaign generation error: {e}")
-        raise HTTPException(status_code=500, detail="AI campaign generation failed")
 
-    await db.campaigns.update_one(
-        {"id": campaign_id},
-        {"$set": {"ai_content": ai_content, "status": "generated"}}
+    calendar = ai_content.get("content_calendar")
+    return {
+        "ai_content": ai_content,
+        "status": "generated",
+        "generation.progress.stage": "complete",
+        "generation.progress.posts_generated": len(calendar) if isinstance(calendar, list) else 0,
+        # The finished calendar is in ai_content now
+        "generation.progress.calendar": [],
+    }
+
+async def campaign_generated(before: dict, updates: dict):
+    await rollups.record_campaign_status_change(db, before["contractor_id"], before.get("status", "draft"), "generated")
+
+campaign_jobs = JobQueue("campaign_generation", db.campaigns, "generation", run_campaign_generation, campaign_generated,
+                         reset_progress={"calendar": [], "posts_generated": 0})
+
+def campaign_generation_body(campaign: dict) -> dict:
+    job = public_job(campaign["generation"])
+    body = {"campaign_id": campaign["id"], **job}
+    if job["state"] == "succeeded":
+        body["ai_content"] = campaign.get("ai_content")
+    return body
+
+@api_router.post("/campaigns/{campaign_id}/generate", status_code=202)
+async def generate_campaign_content(campaign_id: str, user=Depends(get_current_contractor)):
+    """Queue calendar generation; poll GET .../generation or stream .../generation/events for the result."""
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+
+    campaign_filter = {"id": campaign_id, "contractor_id": user["id"]}
+    campaign = await db.campaigns.find_one(campaign_filter, {"_id": 0, "id": 1, "duration_days": 1})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    # Re-submitting while a job is queued or running returns that job instead of starting another
+    job = await campaign_jobs.submit(campaign_filter, {"stage": "queued", "posts_expected": campaign_post_target(campaign)})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return fast_json(
+        {"campaign_id": campaign_id, **public_job(job)}, status_code=202,
+        headers={"Location": f"/api/campaigns/{campaign_id}/generation"}
     )
-    campaign["ai_content"] = ai_content
-    campaign["status"] = "generated"
-    return campaign
+
+@api_router.get("/campaigns/{campaign_id}/generation")
+async def get_campaign_generation(campaign_id: str, user=Depends(get_current_contractor)):
+    campaign = await db.campaigns.find_one(
+        {"id": campaign_id, "contractor_id": user["id"]}, {"_id": 0, "id": 1, "generation": 1, "ai_content": 1}
+    )
+    if not campaign or not campaign.get("generation"):
+        raise HTTPException(status_code=404, detail="No generation job for this campaign")
+    return fast_json(campaign_generation_body(campaign))
+
+async def campaign_generation_events(campaign_filter: dict):
+    last, quiet = None, 0.0
+    while True:
+        campaign = await db.campaigns.find_one(campaign_filter, {"_id": 0, "id": 1, "generation": 1, "ai_content": 1})
+        if not campaign or not campaign.get("generation"):
+            yield sse_event("error", {"detail": "Campaign not found"})
+            return
+        body = campaign_generation_body(campaign)
+        if body["state"] in FINISHED_STATES:
+            yield sse_event("done", body)
+            return
+        if body != last:
+            yield sse_event("progress", body)
+            last, quiet = body, 0.0
+        elif quiet >= SSE_HEARTBEAT_SECONDS:
+            yield b": ping\n\n"
+            quiet = 0.0
+        await asyncio.sleep(JOB_WATCH_SECONDS)
+        quiet += JOB_WATCH_SECONDS
+
+@api_router.get("/campaigns/{campaign_id}/generation/events")
+async def stream_campaign_generation(campaign_id: str, user=Depends(get_current_contractor)):
+    """SSE: "progress" on every change, then one "done" with the final state (and ai_content on success)."""
+    campaign_filter = {"id": campaign_id, "contractor_id": user["id"]}
+    if not await db.campaigns.find_one(campaign_filter, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return event_response(campaign_generation_events(campaign_filter))
+
+@api_router.delete("/campaigns/{campaign_id}/generation/{job_id}")
+async def cancel_campaign_generation(campaign_id: str, job_id: str, user=Depends(get_current_contractor)):
+    if not await campaign_jobs.cancel({"id": campaign_id, "contractor_id": user["id"]}, job_id):
+        raise HTTPException(status_code=409, detail="Job is not queued or running")
+    return {"message": "Cancelled"}
+
+@api_router.get("/admin/jobs")
+async def get_job_stats():
+    return campaign_jobs.stats()
 
 @api_router.put("/campaigns/{campaign_id}/status")
 async def update_campaign_status(campaign_id: str, data: LeadStatusUpdate, user=Depends(get_current_contractor)):
-    result = await db.campaigns.update_one(
+    before = await db.campaigns.find_one_and_update(
         {"id": campaign_id, "contractor_id": user["id"]},
-        {"$set": {"status": data.status}}
+        {"$set": {"status": data.status}},
+        projection={"_id": 0, "status": 1}
     )
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    await rollups.record_campaign_status_change(db, user["id"], before.get("status", "draft"), data.status)
     return {"message": "Status updated"}
 
 @api_router.delete("/campaigns/{campaign_id}")
 async def delete_campaign(campaign_id: str, user=Depends(get_current_contractor)):
-    result = await db.campaigns.delete_one({"id": campaign_id, "contractor_id": user["id"]})
-    if result.deleted_count == 0:
+    deleted = await db.campaigns.find_one_and_delete(
+        {"id": campaign_id, "contractor_id": user["id"]}, projection={"_id": 0, "status": 1}
+    )
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    await rollups.record_campaign(db, user["id"], deleted.get("status", "draft"), delta=-1)
     return {"message": "Deleted"}
 
 # ─── AI Lead Scoring Agent ───
 
-LEAD_SCORING_PROMPT = """You are an AI lead scoring agent for ICF construction. Score leads based on:
-- Budget (higher = better score)
-- Timeline (sooner = higher urgency)
-- Project type (new home > addition > basement > other)
-- Project size (larger = higher value)
-- Description quality (detailed = more serious buyer)
+# score, grade, urgency and estimated_value come from the rule engine in
+# scoring_helper; the LLM only writes the narrative fields, on request.
+LEAD_NARRATIVE_PROMPT = """You are an AI lead analyst for ICF construction contractors. You are given a lead and
+the score our rubric already assigned it (budget, timeline, project type, project size, description quality).
+Do not re-score the lead. Explain the score and draft outreach.
 
 Return valid JSON:
 {
-  "score": 0-100,
-  "grade": "A/B/C/D",
-  "urgency": "high/medium/low",
-  "estimated_value": "$X - $Y",
-  "insights": "brief analysis",
-  "recommended_action": "what the contractor should do",
+  "insights": "brief analysis of why this lead scored as it did and what stands out",
   "follow_up_message": "suggested personalized outreach message"
 }"""
 
-@api_router.post("/leads/{lead_id}/score")
-async def score_lead(lead_id: str, user=Depends(get_current_contractor)):
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=500, detail="AI service not configured")
-
-    lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
-
-    session_id = f"score_{lead_id}_{uuid.uuid4().hex[:8]}"
-    chat = LlmChat(
-        api_key=EMERGENT_LLM_KEY,
-        session_id=session_id,
-        system_message=LEAD_SCORING_PROMPT
-    )
-
-    prompt = f"""Score this ICF construction lead:
+async def llm_narrative(lead: dict, score_data: dict, contractor_id: str = None) -> dict:
+    """insights and follow_up_message for a scored lead; LLM errors propagate."""
+    prompt = f"""Lead:
 Name: {lead['name']}
 Location: {lead.get('city', 'N/A')}, {lead.get('state', 'N/A')}
 Project type: {lead.get('project_type', 'N/A')}
@@ -1241,26 +1651,74 @@ Budget range: {lead.get('budget_range', 'N/A')}
 Timeline: {lead.get('timeline', 'N/A')}
 Description: {lead.get('description', 'N/A')}
 
-Return ONLY valid JSON with: score, grade, urgency, estimated_value, insights, recommended_action, follow_up_message"""
+Score: {score_data['score']}/100, grade {score_data['grade']}, {score_data['urgency']} urgency, estimated value {score_data['estimated_value']}
+Factor breakdown (0-1): {', '.join(f"{k} {v}" for k, v in score_data['factors'].items())}
+
+Return ONLY valid JSON with: insights, follow_up_message"""
 
+    response = await complete(EMERGENT_LLM_KEY, LEAD_NARRATIVE_PROMPT, prompt, route="lead_narrative",
+                              priority=STANDARD, session_prefix=f"score_{lead['id']}", contractor_id=contractor_id)
     try:
-        response = await chat.send_message(UserMessage(text=prompt))
-        import json
-        clean = response.strip()
-        if clean.startswith("```"):
-            clean = clean.split("\n", 1)[1] if "\n" in clean else clean[3:]
-            clean = clean.rsplit("```", 1)[0]
-        score_data = json.loads(clean)
-    except json.JSONDecodeError:
-        score_data = {"score": 50, "grade": "C", "urgency": "medium", "estimated_value": "Unknown", "insights": response, "recommended_action": "Contact the lead", "follow_up_message": ""}
-    except Exception as e:
-        logger.error(f"Lead scoring error: {e}")
-        raise HTTPException(status_code=500, detail="AI lead scoring failed")
+        narrative = parse_llm_json(response)
+    except JsonStreamError:
+        narrative = None
+    if not isinstance(narrative, dict) or not (narrative.get("insights") or narrative.get("follow_up_message")):
+        return {"insights": response, "follow_up_message": ""}
+    return {"insights": narrative.get("insights", ""), "follow_up_message": narrative.get("follow_up_message", "")}
 
-    await db.leads.update_one({"id": lead_id}, {"$set": {"ai_score": score_data}})
+@api_router.post("/leads/{lead_id}/score")
+async def score_lead(lead_id: str, narrative: bool = True, user=Depends(get_current_contractor)):
+    """
+    Rule-based score, plus the LLM-written insights and follow-up when
+    `narrative` is set. Unchanged leads that already have them skip both.
+    """
+    lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    if not needs_scoring(lead) and (has_narrative(lead) or not narrative):
+        return lead
+
+    score_data = rule_scores([lead])[0]
+    if narrative and EMERGENT_LLM_KEY:
+        try:
+            score_data.update(await llm_narrative(lead, score_data, user["id"]), narrative=True)
+        except Exception as e:
+            # The score itself doesn't depend on the LLM, so still return it
+            logger.error(f"Lead narrative error: {e}")
+
+    await db.leads.update_one({"id": lead_id}, score_update(lead, score_data))
     lead["ai_score"] = score_data
+    lead["ai_score_hash"] = scoring_input_hash(lead)
     return lead
 
+@api_router.post("/leads/score-batch")
+async def score_leads_batch(data: LeadScoreBatchRequest, user=Depends(get_current_contractor)):
+    """
+    Score the given lead_ids, or the newest leads (optionally with `status`),
+    up to LEAD_SCORE_BATCH_MAX. Streams SSE start/progress/done events unless
+    `stream` is false, in which case it returns the "done" summary.
+    """
+    if data.narrative and not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    narrate = (lambda lead, score_data: llm_narrative(lead, score_data, user["id"])) if data.narrative else None
+
+    if data.lead_ids is not None:
+        if len(data.lead_ids) > LEAD_SCORE_BATCH_MAX:
+            raise HTTPException(status_code=400, detail=f"At most {LEAD_SCORE_BATCH_MAX} leads per batch")
+        leads = await db.leads.find({"id": {"$in": data.lead_ids}}, SCORING_PROJECTION).to_list(LEAD_SCORE_BATCH_MAX)
+    else:
+        query = {"status": data.status} if data.status else {}
+        leads = await db.leads.find(query, SCORING_PROJECTION).sort(
+            [("created_at", -1), ("id", -1)]
+        ).limit(LEAD_SCORE_BATCH_MAX).to_list(LEAD_SCORE_BATCH_MAX)
+
+    if not data.stream:
+        async def ignore(event, payload):
+            pass
+        return await score_leads(db.leads, leads, ignore, narrate, force=data.force)
+
+    return task_response(lambda emit: score_leads(db.leads, leads, emit, narrate, force=data.force))
+
 # ─── Scheduling Endpoints ───
 
 @api_router.post("/schedule")
@@ -1275,33 +1733,39 @@ async def create_scheduled_post(data: SchedulePostCreate, user=Depends(get_curre
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.scheduled_posts.insert_one(doc)
+    await rollups.record_scheduled_posts(db, user["id"], [doc])
     return {k: v for k, v in doc.items() if k != "_id"}
 
 @api_router.get("/schedule")
-async def get_scheduled_posts(user=Depends(get_current_contractor)):
-    posts = await db.scheduled_posts.find(
-        {"contractor_id": user["id"]}, {"_id": 0}
-    ).sort("scheduled_date", 1).to_list(500)
-    return posts
+async def get_scheduled_posts(cursor: Optional[str] = None, limit: Optional[int] = None, user=Depends(get_current_contractor)):
+    posts, next_cursor = await paginate(
+        db.scheduled_posts, {"contractor_id": user["id"]}, {"_id": 0}, "scheduled_date", 1, clamp_limit(limit, 500), cursor
+    )
+    return fast_json(page_response(posts, next_cursor, cursor, limit))
 
 @api_router.put("/schedule/{post_id}")
 async def update_scheduled_post(post_id: str, data: SchedulePostUpdate, user=Depends(get_current_contractor)):
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await db.scheduled_posts.update_one(
-        {"id": post_id, "contractor_id": user["id"]}, {"$set": update_data}
+    before = await db.scheduled_posts.find_one_and_update(
+        {"id": post_id, "contractor_id": user["id"]}, {"$set": update_data}, projection={"_id": 0}
     )
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Post not found")
+    if "status" in update_data:
+        await rollups.record_post_status_change(db, user["id"], before.get("status", "scheduled"), update_data["status"])
     updated = await db.scheduled_posts.find_one({"id": post_id}, {"_id": 0})
     return updated
 
 @api_router.delete("/schedule/{post_id}")
 async def delete_scheduled_post(post_id: str, user=Depends(get_current_contractor)):
-    result = await db.scheduled_posts.delete_one({"id": post_id, "contractor_id": user["id"]})
-    if result.deleted_count == 0:
+    deleted = await db.scheduled_posts.find_one_and_delete(
+        {"id": post_id, "contractor_id": user["id"]}, projection={"_id": 0, "status": 1, "platform": 1}
+    )
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Post not found")
+    await rollups.record_scheduled_posts(db, user["id"], [deleted], delta=-1)
     return {"message": "Deleted"}
 
 @api_router.post("/schedule/{post_id}/publish")
@@ -1331,13 +1795,11 @@ async def publish_scheduled_post(post_id: str, user=Depends(get_current_contract
         {"id": post_id},
         {"$set": {"status": publish_status, "published_at": now, "auto_posted": bool(account)}}
     )
-    await db.notifications.insert_one({
-        "id": str(uuid.uuid4()),
-        "contractor_id": user["id"],
+    await rollups.record_post_status_change(db, user["id"], post.get("status", "scheduled"), publish_status)
+    await insert_notification(db, user["id"], {
         "type": "post_published",
         "title": f"Post Published on {platform_name}",
         "message": notif_msg,
-        "read": False,
         "emailed": False,
         "created_at": now
     })
@@ -1347,21 +1809,13 @@ async def publish_scheduled_post(post_id: str, user=Depends(get_current_contract
     return post
 
 @api_router.post("/schedule/bulk")
-async def bulk_schedule_posts(posts: List[SchedulePostCreate], user=Depends(get_current_contractor)):
-    created = []
-    for post_data in posts:
-        post_id = str(uuid.uuid4())
-        doc = {
-            "id": post_id,
-            "contractor_id": user["id"],
-            **post_data.model_dump(),
-            "status": "scheduled",
-            "published_at": None,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.scheduled_posts.insert_one(doc)
-        created.append({k: v for k, v in doc.items() if k != "_id"})
-    return created
+async def bulk_schedule_posts(request: Request, user=Depends(get_current_contractor)):
+    """Body is a JSON array of posts; invalid items are reported individually, not fatally."""
+    created, errors = await stream_bulk_insert(
+        db.scheduled_posts, request.stream(), SchedulePostCreate, scheduled_post_doc(user["id"])
+    )
+    await rollups.record_scheduled_posts(db, user["id"], created)
+    return {"created": created, "errors": errors}
 
 # ─── Social Media Accounts ───
 
@@ -1424,15 +1878,11 @@ async def connect_social_account(data: SocialAccountConnect, user=Depends(get_cu
         doc["id"] = str(uuid.uuid4())
         await db.social_accounts.insert_one(doc)
 
-    await db.notifications.insert_one({
-        "id": str(uuid.uuid4()),
-        "contractor_id": user["id"],
+    await insert_notification(db, user["id"], {
         "type": "account_connected",
         "title": f"{PLATFORM_META[data.platform]['name']} Connected",
         "message": f"Your {PLATFORM_META[data.platform]['name']} account '{data.account_name}' has been connected. Posts to this platform will now auto-publish.",
-        "read": False,
-        "emailed": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "emailed": False
     })
 
     safe_doc = {k: v for k, v in doc.items() if k not in ["_id", "access_token"]}
@@ -1459,120 +1909,57 @@ async def get_connection_status(user=Depends(get_current_contractor)):
 # ─── Notifications Endpoints ───
 
 @api_router.get("/notifications")
-async def get_notifications(user=Depends(get_current_contractor)):
-    notifications = await db.notifications.find(
-        {"contractor_id": user["id"]}, {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
-    return notifications
+async def get_notifications(cursor: Optional[str] = None, limit: Optional[int] = None, user=Depends(get_current_contractor)):
+    notifications, next_cursor = await notification_feed(db, user["id"], clamp_limit(limit, 100), cursor)
+    return fast_json(page_response(notifications, next_cursor, cursor, limit))
 
 @api_router.get("/notifications/unread-count")
 async def get_unread_count(user=Depends(get_current_contractor)):
-    count = await db.notifications.count_documents({"contractor_id": user["id"], "read": False})
-    return {"count": count}
+    return {"count": await unread_count(db, user["id"])}
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, user=Depends(get_current_contractor)):
-    await db.notifications.update_one(
-        {"id": notification_id, "contractor_id": user["id"]},
-        {"$set": {"read": True}}
-    )
+    await mark_read(db, user["id"], notification_id)
     return {"message": "Marked as read"}
 
 @api_router.put("/notifications/read-all")
 async def mark_all_read(user=Depends(get_current_contractor)):
-    await db.notifications.update_many(
-        {"contractor_id": user["id"], "read": False},
-        {"$set": {"read": True}}
-    )
+    await mark_all_notifications_read(db, user["id"])
     return {"message": "All marked as read"}
 
 # ─── Analytics Endpoint ───
 
 @api_router.get("/analytics")
 async def get_analytics(user=Depends(get_current_contractor)):
-    # Leads by status
-    leads = await db.leads.find({}, {"_id": 0}).to_list(1000)
-    status_counts = {}
-    leads_by_date = {}
-    for lead in leads:
-        s = lead.get("status", "new")
-        status_counts[s] = status_counts.get(s, 0) + 1
-        date_key = lead.get("created_at", "")[:10]
-        if date_key:
-            leads_by_date[date_key] = leads_by_date.get(date_key, 0) + 1
-
-    # Content by platform
-    content = await db.generated_content.find(
-        {"contractor_id": user["id"]}, {"_id": 0, "platform": 1, "items": 1, "created_at": 1}
-    ).to_list(500)
-    content_by_platform = {}
-    total_posts = 0
-    for c in content:
-        p = c.get("platform", "unknown")
-        count = len(c.get("items", []))
-        content_by_platform[p] = content_by_platform.get(p, 0) + count
-        total_posts += count
-
-    # Campaigns
-    campaigns = await db.campaigns.find(
-        {"contractor_id": user["id"]}, {"_id": 0, "status": 1, "goal": 1, "platforms": 1}
-    ).to_list(100)
-    campaign_by_status = {}
-    for camp in campaigns:
-        s = camp.get("status", "draft")
-        campaign_by_status[s] = campaign_by_status.get(s, 0) + 1
-
-    # Scheduled posts
-    scheduled = await db.scheduled_posts.find(
-        {"contractor_id": user["id"]}, {"_id": 0, "status": 1, "platform": 1, "scheduled_date": 1}
-    ).to_list(500)
-    schedule_by_status = {}
-    schedule_by_platform = {}
-    for sp in scheduled:
-        s = sp.get("status", "scheduled")
-        schedule_by_status[s] = schedule_by_status.get(s, 0) + 1
-        p = sp.get("platform", "unknown")
-        schedule_by_platform[p] = schedule_by_platform.get(p, 0) + 1
-
-    # Notifications
-    unread = await db.notifications.count_documents({"contractor_id": user["id"], "read": False})
-
-    return {
-        "leads": {
-            "total": len(leads),
-            "by_status": status_counts,
-            "by_date": dict(sorted(leads_by_date.items())[-30:]),
-            "conversion_rate": round((status_counts.get("qualified", 0) / max(len(leads), 1)) * 100, 1)
-        },
-        "content": {
-            "total_batches": len(content),
-            "total_posts": total_posts,
-            "by_platform": content_by_platform
-        },
-        "campaigns": {
-            "total": len(campaigns),
-            "by_status": campaign_by_status
-        },
-        "schedule": {
-            "total": len(scheduled),
-            "by_status": schedule_by_status,
-            "by_platform": schedule_by_platform
-        },
-        "notifications_unread": unread
-    }
+    analytics, unread = await asyncio.gather(
+        rollups.read_analytics(db, user["id"]),
+        unread_count(db, user["id"])
+    )
+    if analytics is None:
+        # Rollups are still being seeded; fall back to live aggregation
+        analytics = await compute_analytics(db, user["id"])
+    analytics["notifications_unread"] = unread
+    return fast_json(analytics)
 
 # ─── Stats Endpoint ───
 
 @api_router.get("/stats")
-async def get_stats():
-    contractor_count = await db.contractors.count_documents({})
-    lead_count = await db.leads.count_documents({})
-    return {
+async def get_stats(request: Request):
+    # Collection metadata counts; the body is tiny, so its hash is the ETag
+    contractor_count, lead_count = await asyncio.gather(
+        db.contractors.estimated_document_count(),
+        db.leads.estimated_document_count()
+    )
+    stats = {
         "contractors": max(contractor_count, 47),
         "leads": max(lead_count, 230),
         "projects_completed": max(150 + contractor_count * 3, 200),
         "energy_savings": "50-70%"
     }
+    etag = make_etag("stats", stats)
+    if etag_matches(request, etag):
+        return not_modified(etag, "stats")
+    return fast_json(stats, headers=cache_headers(etag, "stats"))
 
 @api_router.get("/health")
 async def health():
@@ -1591,4 +1978,8 @@ app.add_middleware(
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await llm_usage.flush(db)
     client.close()
+    shutdown_hash_pool()
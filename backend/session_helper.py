@@ -0,0 +1,162 @@
+import os
+import time
+from collections import OrderedDict
+
+# ─── Chat Session Store ───
+# LlmChat objects keep their conversation in memory, so one per live
+# session_id is held here instead of in an unbounded dict. The store is an
+# LRU with an idle TTL, a max entry count and an approximate byte budget
+# (system prompt + every prompt/response the session has carried). Evicted
+# sessions are rebuilt on their next message from the transcript in Mongo,
+# so eviction only costs one indexed read.
+
+CHAT_SESSION_MAX_ENTRIES = int(os.environ.get("CHAT_SESSION_MAX_ENTRIES", "2000"))
+CHAT_SESSION_IDLE_TTL = float(os.environ.get("CHAT_SESSION_IDLE_TTL", "1800"))
+CHAT_SESSION_MAX_BYTES = int(os.environ.get("CHAT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+CHAT_SESSION_REBUILD_MESSAGES = int(os.environ.get("CHAT_SESSION_REBUILD_MESSAGES", "40"))
+# Rough fixed cost of an LlmChat and its client on top of the text it holds
+SESSION_OVERHEAD_BYTES = 4096
+
+
+def _text_bytes(*texts) -> int:
+    return sum(len(t.encode("utf-8")) for t in texts if t)
+
+
+class SessionStore:
+    def __init__(self, max_entries: int = CHAT_SESSION_MAX_ENTRIES, idle_ttl: float = CHAT_SESSION_IDLE_TTL,
+                 max_bytes: int = CHAT_SESSION_MAX_BYTES):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> [value, bytes, last_used]
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.evictions = {"lru": 0, "idle": 0, "bytes": 0}
+
+    def _drop(self, key: str, reason: str = None):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+        if reason:
+            self.evictions[reason] += 1
+
+    def _expire_idle(self, now: float):
+        # Entries are kept in last-used order, so idle ones are all at the front
+        while self._entries:
+            key, (_, _, last_used) = next(iter(self._entries.items()))
+            if last_used + self.idle_ttl > now:
+                break
+            self._drop(key, "idle")
+
+    def _enforce_limits(self):
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)), "lru")
+        # Always keep the newest session, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)), "bytes")
+
+    def get(self, key: str):
+        now = time.monotonic()
+        self._expire_idle(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entry[2] = now
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value, size: int = 0):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = [value, size + SESSION_OVERHEAD_BYTES, time.monotonic()]
+        self.bytes += size + SESSION_OVERHEAD_BYTES
+        self._enforce_limits()
+
+    def record(self, key: str, *texts):
+        """Account for text a live session now carries in its history."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = _text_bytes(*texts)
+        entry[1] += size
+        self.bytes += size
+        self._enforce_limits()
+
+    def peek(self, key: str):
+        """The live session for `key`, without touching LRU order or hit/miss counts."""
+        entry = self._entries.get(key)
+        if entry is None or entry[2] + self.idle_ttl <= time.monotonic():
+            return None
+        return entry[0]
+
+    def __contains__(self, key: str) -> bool:
+        # Membership check that doesn't touch LRU order or hit/miss counts
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] + self.idle_ttl > time.monotonic()
+
+    def discard(self, key: str):
+        if key in self._entries:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        self._expire_idle(time.monotonic())
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "rebuilds": self.rebuilds,
+            "evictions": dict(self.evictions),
+        }
+
+
+chat_sessions = SessionStore()
+
+
+def _transcript(history: list) -> str:
+    lines = []
+    for msg in history:
+        role = "AI" if msg.get("role") == "assistant" else "Homeowner"
+        lines.append(f"{role}: {msg.get('content', '')}")
+    return "\n".join(lines)
+
+
+async def open_chat_session(key: str, collection, session_id: str, system_message: str, make_chat):
+    """
+    Return (chat, restored) for `key`, creating the chat with
+    make_chat(system_message) on a miss. Sessions that already have messages
+    in `collection` are seeded with their most recent transcript so the model
+    keeps the thread; `restored` is how many messages that was (None when the
+    session was still live, 0 for a brand-new conversation).
+    """
+    chat = chat_sessions.get(key)
+    if chat is not None:
+        return chat, None
+
+    history = await collection.find(
+        {"session_id": session_id}, {"_id": 0, "role": 1, "content": 1}
+    ).sort("created_at", -1).limit(CHAT_SESSION_REBUILD_MESSAGES).to_list(CHAT_SESSION_REBUILD_MESSAGES)
+    if history:
+        history.reverse()
+        system_message = f"{system_message}\n\nConversation so far:\n{_transcript(history)}"
+        chat_sessions.rebuilds += 1
+
+    # Another request may have built it while we were reading history
+    chat = chat_sessions.peek(key)
+    if chat is not None:
+        return chat, None
+    chat = make_chat(system_message)
+    chat_sessions.put(key, chat, _text_bytes(system_message))
+    return chat, len(history)
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import aclosing
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from metrics_helper import LatencyWindow
+from response_helper import dumps
+
+logger = logging.getLogger(__name__)
+
+# ─── Server-Sent Events ───
+# Streaming chat endpoints emit:
+#   event: start  {"session_id"}            as soon as the request is accepted
+#   event: delta  {"text"}                  for each chunk of the reply
+#   event: done   {...non-streaming body}   after the reply is persisted
+#   event: error  {"detail"}                if generation fails mid-stream
+# plus ": ping" comments while the model is thinking so proxies keep the
+# connection open. Time to first delta is recorded per route.
+
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def stream_reply(chat, message):
+    """Yield reply text as it arrives; chats without a streaming method yield it whole."""
+    stream = getattr(chat, "stream_message", None)
+    if stream is None:
+        yield await chat.send_message(message)
+        return
+    async for delta in stream(message):
+        if delta:
+            yield delta
+
+
+async def _with_heartbeat(deltas):
+    # Yields None whenever SSE_HEARTBEAT_SECONDS pass without a delta.
+    # aclosing: a client that disconnects ends the upstream request (and frees
+    # its governor slot) now, not when the generator is garbage collected.
+    async with aclosing(deltas):
+        iterator = deltas.__aiter__()
+        pending = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_SECONDS)
+                if not done:
+                    yield None
+                    continue
+                finished, pending = pending, None
+                try:
+                    delta = finished.result()
+                except StopAsyncIteration:
+                    return
+                yield delta
+        finally:
+            if pending is not None:
+                # deltas can't be closed while a step of it is still running
+                pending.cancel()
+                await asyncio.wait({pending})
+
+
+class StreamMetrics:
+    def __init__(self):
+        self._routes = {}
+
+    def _route(self, route: str) -> dict:
+        return self._routes.setdefault(route, {
+            "started": 0, "completed": 0, "failed": 0, "disconnected": 0,
+            "ttfb": LatencyWindow(), "duration": LatencyWindow(),
+        })
+
+    def stats(self) -> dict:
+        return {
+            route: {
+                **{k: v for k, v in m.items() if k not in ("ttfb", "duration")},
+                "ttfb": m["ttfb"].summary(),
+                "duration": m["duration"].summary(),
+            }
+            for route, m in self._routes.items()
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+async def _events(route: str, start: dict, deltas, finish):
+    metrics = stream_metrics._route(route)
+    metrics["started"] += 1
+    started = time.perf_counter()
+    parts = []
+    yield sse_event("start", start)
+    try:
+        async with aclosing(_with_heartbeat(deltas)) as beats:
+            async for delta in beats:
+                if delta is None:
+                    yield b": ping\n\n"
+                    continue
+                if not parts:
+                    metrics["ttfb"].observe((time.perf_counter() - started) * 1000)
+                parts.append(delta)
+                yield sse_event("delta", {"text": delta})
+        result = await finish("".join(parts))
+        metrics["completed"] += 1
+        metrics["duration"].observe((time.perf_counter() - started) * 1000)
+        yield sse_event("done", result)
+    except asyncio.CancelledError:
+        metrics["disconnected"] += 1
+        raise
+    except Exception as e:
+        metrics["failed"] += 1
+        logger.error(f"Stream error on {route}: {e}", exc_info=True)
+        detail = e.detail if isinstance(e, HTTPException) else "AI service temporarily unavailable"
+        yield sse_event("error", {"detail": detail})
+
+
+def event_response(events) -> StreamingResponse:
+    """Stream already-encoded SSE events (see sse_event)."""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+_event_tasks = set()
+
+
+def task_response(run) -> StreamingResponse:
+    """
+    Run `run(emit)` as its own task and stream each `await emit(event, data)`
+    as SSE. The task finishes even if the client disconnects, so work it
+    persists isn't lost; an exception becomes an "error" event.
+    """
+    events = asyncio.Queue()
+
+    async def emit(event: str, data):
+        await events.put(sse_event(event, data))
+
+    async def runner():
+        try:
+            await run(emit)
+        except Exception as e:
+            logger.error(f"Event stream task failed: {e}", exc_info=True)
+            await emit("error", {"detail": e.detail if isinstance(e, HTTPException) else "Request failed"})
+        finally:
+            await events.put(None)
+
+    task = asyncio.create_task(runner())
+    _event_tasks.add(task)
+    task.add_done_callback(_event_tasks.discard)
+
+    async def stream():
+        while (event := await events.get()) is not None:
+            yield event
+
+    return event_response(stream())
+
+
+def sse_response(route: str, start: dict, deltas, finish) -> StreamingResponse:
+    """
+    Stream `deltas` (async iterator of text) as SSE. Once it is exhausted,
+    `finish(full_text)` persists the reply and returns the "done" payload.
+    """
+    return StreamingResponse(_events(route, start, deltas, finish), media_type="text/event-stream",
+                             headers=SSE_HEADERS)
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from context_helper import estimate_tokens
+from metrics_helper import Histogram, LatencyWindow
+from rollup_helper import GLOBAL_ID, contractor_key
+
+logger = logging.getLogger(__name__)
+
+# ─── LLM Usage ───
+# llm_helper records every LLM request once, when it ends: the route that
+# made it, the model, estimated prompt and completion tokens, wall time (from
+# getting a governor slot to the last token, so queueing isn't included) and
+# the outcome. Tokens are estimates from context_helper.estimate_tokens;
+# prompt tokens cover what this process sends, not history that a live chat
+# session replays on its own. Cost uses LLM_PRICES. Callers that joined an
+# identical in-flight call are counted as shared and cost nothing.
+#
+# The series are kept in process and scraped from /api/metrics. Totals per
+# contractor (and overall) are buffered and $inc'ed into llm_usage every
+# LLM_USAGE_FLUSH_SECONDS, so no call waits on a Mongo write. Unlike the
+# analytics rollups these can't be rebuilt from raw data.
+
+# What LlmChat uses when with_model() isn't called
+LLM_DEFAULT_MODEL = os.environ.get("LLM_DEFAULT_MODEL", "openai/gpt-4o")
+# USD per million tokens, input/output
+DEFAULT_PRICES = {
+    "openai/gpt-4o": (2.50, 10.00),
+    "openai/gpt-5.2": (1.75, 14.00),
+}
+# Rough prompt cost of one attached image
+LLM_IMAGE_TOKENS = int(os.environ.get("LLM_IMAGE_TOKENS", "765"))
+LLM_USAGE_FLUSH_SECONDS = float(os.environ.get("LLM_USAGE_FLUSH_SECONDS", "15"))
+# Request duration histogram bounds, in seconds
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+OUTCOMES = ("ok", "error", "cancelled")
+
+
+def load_prices(spec: str = None) -> dict:
+    """Parse "openai/gpt-4o=2.5/10,..." (USD per million input/output tokens) over DEFAULT_PRICES."""
+    prices = dict(DEFAULT_PRICES)
+    for part in (spec or "").split(","):
+        if "=" in part:
+            model, pair = part.split("=", 1)
+            input_price, output_price = pair.split("/", 1)
+            prices[model.strip()] = (float(input_price), float(output_price))
+    return prices
+
+
+LLM_PRICES = load_prices(os.environ.get("LLM_PRICES"))
+
+
+def model_name(model) -> str:
+    """The label for a with_model() tuple, e.g. ("openai", "gpt-5.2") -> "openai/gpt-5.2"."""
+    return "/".join(model) if model else LLM_DEFAULT_MODEL
+
+
+def message_tokens(system_message: str, message) -> int:
+    """Estimated prompt tokens for sending `message` (a UserMessage) under `system_message`."""
+    images = len(getattr(message, "file_contents", None) or [])
+    return estimate_tokens(system_message) + estimate_tokens(getattr(message, "text", "")) + images * LLM_IMAGE_TOKENS
+
+
+class LlmCall:
+    """Measures one request; use as a context manager and add() the reply text as it arrives."""
+
+    def __init__(self, usage: "LlmUsage", route: str, model: str, prompt_tokens: int, contractor_id: str = None):
+        self.usage = usage
+        self.route = route
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.contractor_id = contractor_id
+        self._chars = 0
+        self._started = None
+
+    def add(self, text: str):
+        self._chars += len(text or "")
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            outcome, error = "ok", None
+        elif issubclass(exc_type, Exception):
+            outcome, error = "error", exc_type.__name__
+        else:
+            # Cancelled, or a stream closed before its last delta
+            outcome, error = "cancelled", None
+        completion_tokens = (self._chars + 3) // 4
+        self.usage.record(self.route, self.model, self.prompt_tokens, completion_tokens,
+                          time.perf_counter() - self._started, outcome, error, self.contractor_id)
+        return False
+
+
+class LlmUsage:
+    def __init__(self, prices: dict = None):
+        self.prices = LLM_PRICES if prices is None else prices
+        self._series = {}  # (route, model) -> counters
+        self._shared = {}  # route -> calls served by someone else's request
+        self._pending = {}  # llm_usage _id -> {path: increment}
+        self.flushed = 0
+        self.flush_errors = 0
+
+    def call(self, route: str, model: str, prompt_tokens: int, contractor_id: str = None) -> LlmCall:
+        return LlmCall(self, route, model, prompt_tokens, contractor_id)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+    def _for(self, route: str, model: str) -> dict:
+        return self._series.setdefault((route, model), {
+            "requests": {outcome: 0 for outcome in OUTCOMES}, "errors": {},
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+            "duration": Histogram(LATENCY_BUCKETS), "latency": LatencyWindow(),
+        })
+
+    def record(self, route: str, model: str, prompt_tokens: int, completion_tokens: int, seconds: float,
+               outcome: str = "ok", error: str = None, contractor_id: str = None):
+        series = self._for(route, model)
+        series["requests"][outcome] += 1
+        if error:
+            series["errors"][error] = series["errors"].get(error, 0) + 1
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        series["prompt_tokens"] += prompt_tokens
+        series["completion_tokens"] += completion_tokens
+        series["cost_usd"] += cost
+        series["duration"].observe(seconds)
+        series["latency"].observe(seconds * 1000)
+
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        tokens = prompt_tokens + completion_tokens
+        inc = {
+            "requests": 1, "errors": int(outcome == "error"),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost_usd": cost,
+            f"by_route.{route}.requests": 1, f"by_route.{route}.tokens": tokens, f"by_route.{route}.cost_usd": cost,
+            f"by_date.{day}.requests": 1, f"by_date.{day}.tokens": tokens, f"by_date.{day}.cost_usd": cost,
+        }
+        self._merge({GLOBAL_ID: inc})
+        if contractor_id:
+            self._merge({contractor_key(contractor_id): inc})
+
+    def latency_percentile(self, route: str, q: float, min_samples: int = 1):
+        """Recent latency percentile for `route` across models, in ms; None with fewer than min_samples."""
+        windows = [s["latency"] for (r, _), s in self._series.items() if r == route]
+        if sum(len(w) for w in windows) < min_samples:
+            return None
+        # Routes use one model each in practice; take the slowest if not
+        return max(w.percentile(q) for w in windows if len(w))
+
+    def shared(self, route: str):
+        self._shared[route] = self._shared.get(route, 0) + 1
+
+    def _merge(self, pending: dict):
+        for doc_id, inc in pending.items():
+            totals = self._pending.setdefault(doc_id, {})
+            for path, value in inc.items():
+                totals[path] = totals.get(path, 0) + value
+
+    # ── Mongo rollup ──
+
+    async def flush(self, db) -> int:
+        """Write the buffered increments to llm_usage; returns how many documents were updated."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        doc_ids = list(pending)
+        now = datetime.now(timezone.utc).isoformat()
+        ops = [UpdateOne({"_id": doc_id}, {"$inc": {k: v for k, v in pending[doc_id].items() if v},
+                                           "$set": {"updated_at": now}}, upsert=True)
+               for doc_id in doc_ids]
+        try:
+            await db.llm_usage.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Keep only the increments that weren't applied for the next flush
+            failed = [doc_ids[err["index"]] for err in e.details.get("writeErrors", [])]
+            self._merge({doc_id: pending[doc_id] for doc_id in failed})
+            self.flush_errors += 1
+            logger.error(f"LLM usage rollup failed for {len(failed)} documents: {e}")
+            return len(ops) - len(failed)
+        except PyMongoError as e:
+            self._merge(pending)
+            self.flush_errors += 1
+            logger.error(f"LLM usage rollup failed: {e}")
+            return 0
+        self.flushed += len(ops)
+        return len(ops)
+
+    # ── Export ──
+
+    def stats(self) -> dict:
+        routes = {}
+        for (route, model), s in sorted(self._series.items()):
+            routes.setdefault(route, {})[model] = {
+                "requests": dict(s["requests"]),
+                "errors": dict(s["errors"]),
+                "prompt_tokens": s["prompt_tokens"],
+                "completion_tokens": s["completion_tokens"],
+                "cost_usd": round(s["cost_usd"], 6),
+                "latency": s["latency"].summary(),
+            }
+        return {
+            "routes": routes,
+            "shared": dict(self._shared),
+            "pending_rollups": len(self._pending),
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+        }
+
+    def prometheus(self) -> str:
+        """The series in Prometheus text exposition format."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+
+        series = sorted(self._series.items())
+        metric("llm_requests_total", "counter", "LLM requests by route, model and outcome.", [
+            ("", {"route": r, "model": m, "outcome": o}, s["requests"][o])
+            for (r, m), s in series for o in OUTCOMES
+        ])
+        metric("llm_errors_total", "counter", "Failed LLM requests by exception type.", [
+            ("", {"route": r, "model": m, "error": e}, n)
+            for (r, m), s in series for e, n in sorted(s["errors"].items())
+        ])
+        metric("llm_prompt_tokens_total", "counter", "Estimated prompt tokens sent.", [
+            ("", {"route": r, "model": m}, s["prompt_tokens"]) for (r, m), s in series
+        ])
+        metric("llm_completion_tokens_total", "counter", "Estimated completion tokens received.", [
+            ("", {"route": r, "model": m}, s["completion_tokens"]) for (r, m), s in series
+        ])
+        metric("llm_cost_usd_total", "counter", "Estimated LLM spend in USD.", [
+            ("", {"route": r, "model": m}, s["cost_usd"]) for (r, m), s in series
+        ])
+        metric("llm_request_duration_seconds", "histogram", "LLM request wall time, excluding queueing.", [
+            sample
+            for (r, m), s in series
+            for sample in [
+                *(("_bucket", {"route": r, "model": m, "le": bound}, count) for bound, count in s["duration"].buckets()),
+                ("_sum", {"route": r, "model": m}, s["duration"].sum),
+                ("_count", {"route": r, "model": m}, s["duration"].count),
+            ]
+        ])
+        metric("llm_shared_requests_total", "counter", "Calls answered by an identical in-flight request.", [
+            ("", {"route": r}, n) for r, n in sorted(self._shared.items())
+        ])
+        return "\n".join(lines) + "\n"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(round(value, 9)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels: dict) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{_number(v) if k == "le" else escape(v)}"' for k, v in labels.items()) + "}"
+
+
+llm_usage = LlmUsage()
+
+
+async def read_usage(db, limit: int = 20) -> dict:
+    """Overall totals plus the contractors with the highest estimated spend."""
+    overall, top = await asyncio.gather(
+        db.llm_usage.find_one({"_id": GLOBAL_ID}),
+        db.llm_usage.find({"_id": {"$ne": GLOBAL_ID}}).sort("cost_usd", -1).limit(limit).to_list(limit),
+    )
+    for doc in top:
+        doc["contractor_id"] = doc.pop("_id").split(":", 1)[1]
+    if overall:
+        overall.pop("_id")
+    return {"overall": overall or {}, "contractors": top}
+
+
+async def run_usage_flusher(db):
+    while True:
+        await asyncio.sleep(LLM_USAGE_FLUSH_SECONDS)
+        try:
+            await llm_usage.flush(db)
+        except Exception as e:
+            logger.error(f"LLM usage flush failed: {e}")
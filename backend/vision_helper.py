@@ -1,8 +1,9 @@
 
-from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+from emergentintegrations.llm.chat import ImageContent
+from llm_helper import complete, INTAKE_MODEL, INTERACTIVE
 import base64
+import hashlib
 import os
-import uuid
 import logging
 import httpx
 
@@ -25,24 +26,19 @@ async def analyze_image_with_gpt4o(image_url):
         if not b64_image:
             return "Failed to download image."
 
-        # Create Chat
-        # Using default model (likely gpt-5.2) which supports vision according to docs
-        chat = LlmChat(
-            api_key=os.environ.get('EMERGENT_LLM_KEY'),
-            session_id=f"vision_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert architect. Analyze this floor plan image. Identify rooms, layout, and potential ICF construction benefits."
-        ).with_model("openai", "gpt-5.2")
-        
         # Use ImageContent
         image_content = ImageContent(
             image_base64=b64_image
         )
         
-        # Send Message
-        response = await chat.send_message(UserMessage(
-            text="Please analyze this blueprint.",
-            file_contents=[image_content]
-        ))
+        # Send Message (the same plan uploaded twice at once is analyzed once)
+        response = await complete(
+            os.environ.get('EMERGENT_LLM_KEY'),
+            "You are an expert architect. Analyze this floor plan image. Identify rooms, layout, and potential ICF construction benefits.",
+            "Please analyze this blueprint.",
+            route="vision", priority=INTERACTIVE, model=INTAKE_MODEL, session_prefix="vision", file_contents=[image_content],
+            attachment_key=hashlib.sha256(b64_image.encode()).hexdigest()
+        )
         
         return f"[System: Plan Analysis: {response}]"
     except Exception as e:
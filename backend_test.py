@@ -72,15 +72,11 @@ class ICFHubAPITester:
         except Exception as e:
             return False, 0, {"error": str(e)}
 
-    def test_auth_setup(self):
-        """Register a test contractor for authentication"""
-        print("\n🔐 Setting up authentication...")
-        timestamp = int(time.time())
-        test_email = f"test_{timestamp}@example.com"
-        
+    def register_contractor(self, stamp):
+        """Register contractor test_<stamp>@example.com and use its token for later requests"""
         success, status, response = self.make_request('POST', '/auth/register', {
-            "company_name": f"Test ICF Company {timestamp}",
-            "email": test_email,
+            "company_name": f"Test ICF Company {stamp}",
+            "email": f"test_{stamp}@example.com",
             "password": "TestPassword123!",
             "phone": "555-0123",
             "city": "Test City",
@@ -93,6 +89,17 @@ class ICFHubAPITester:
         if success and 'token' in response:
             self.token = response['token']
             self.contractor_id = response['contractor']['id']
+        return success and 'token' in response, status, response
+
+    def test_auth_setup(self):
+        """Register a test contractor for authentication"""
+        print("\n🔐 Setting up authentication...")
+        timestamp = int(time.time())
+        test_email = f"test_{timestamp}@example.com"
+        
+        success, status, response = self.register_contractor(timestamp)
+
+        if success:
             return self.log_test("Contractor Registration", True, status, f"Token acquired for {test_email}")
         else:
             return self.log_test("Contractor Registration", False, status, f"Failed to get token: {response}")
@@ -144,8 +151,15 @@ class ICFHubAPITester:
             }
         ]
         success, status, response = self.make_request('POST', '/schedule/bulk', bulk_posts, 200)
-        bulk_count = len(response) if isinstance(response, list) else 0
-        self.log_test("POST /api/schedule/bulk - Bulk create posts", success, status, f"Created {bulk_count} posts")
+        bulk_count = len(response.get('created', [])) if success else 0
+        self.log_test("POST /api/schedule/bulk - Bulk create posts", success and bulk_count == 2, status, f"Created {bulk_count} posts")
+        
+        # Test 3b: Bulk create with one invalid post - valid ones still go in
+        mixed_posts = bulk_posts + [{"platform": "facebook"}]
+        success, status, response = self.make_request('POST', '/schedule/bulk', mixed_posts, 200)
+        errors = response.get('errors', []) if success else []
+        partial_ok = success and len(response.get('created', [])) == 2 and len(errors) == 1 and errors[0].get('index') == 2
+        self.log_test("POST /api/schedule/bulk - Per-item errors", partial_ok, status, f"Errors: {errors}")
         
         if post_id:
             # Test 4: Publish scheduled post
@@ -250,6 +264,100 @@ class ICFHubAPITester:
         else:
             self.log_test("GET /api/analytics - Get analytics", False, status, f"Error: {response}")
 
+    def test_sparse_fieldsets(self):
+        """Test summary list projections and per-item full fetch"""
+        print("\n🪶 Testing Sparse Fieldsets...")
+
+        campaign_data = {
+            "name": "Fieldset Test Campaign",
+            "goal": "lead_generation",
+            "platforms": ["facebook"],
+            "target_audience": "Homeowners"
+        }
+        success, status, created = self.make_request('POST', '/campaigns', campaign_data, 200)
+        if not success:
+            self.log_test("POST /api/campaigns - Create campaign", False, status, f"Error: {created}")
+            return
+
+        success, status, response = self.make_request('GET', '/campaigns')
+        listed = next((c for c in response if c.get('id') == created['id']), None) if success else None
+        summary_valid = (
+            listed is not None and
+            'ai_content' not in listed and
+            listed.get('has_content') is False and
+            listed.get('post_count') == 0
+        )
+        self.log_test("GET /api/campaigns - Summary projection", summary_valid, status,
+                      f"Keys: {sorted(listed) if listed else None}")
+
+        success, status, response = self.make_request('GET', '/campaigns?fields=name,status')
+        listed = next((c for c in response if c.get('id') == created['id']), None) if success else None
+        self.log_test("GET /api/campaigns?fields=name,status - Explicit fields",
+                      listed is not None and set(listed) == {'id', 'created_at', 'name', 'status'}, status,
+                      f"Keys: {sorted(listed) if listed else None}")
+
+        success, status, response = self.make_request('GET', f"/campaigns/{created['id']}")
+        self.log_test("GET /api/campaigns/{id} - Full document",
+                      success and 'ai_content' in response and response.get('goal') == 'lead_generation', status)
+
+        success, status, _ = self.make_request('GET', '/campaigns?fields=$where', expected_status=400)
+        self.log_test("GET /api/campaigns?fields=$where - Rejects invalid field", success, status)
+
+        self.make_request('DELETE', f"/campaigns/{created['id']}")
+
+    def test_conditional_get(self):
+        """Test ETag / If-None-Match on public read endpoints"""
+        print("\n🏷️ Testing Conditional GET...")
+
+        for endpoint in ['/stats', '/contractors']:
+            url = f"{self.base_url}{endpoint}"
+            try:
+                first = requests.get(url, timeout=30)
+                etag = first.headers.get('ETag')
+                second = requests.get(url, headers={'If-None-Match': etag or ''}, timeout=30)
+                success = (
+                    first.status_code == 200 and
+                    bool(etag) and
+                    'Cache-Control' in first.headers and
+                    second.status_code == 304 and
+                    second.content == b''
+                )
+                details = f"ETag: {etag}, Revalidated: {second.status_code}"
+                self.log_test(f"GET /api{endpoint} - ETag revalidation", success, second.status_code, details)
+            except Exception as e:
+                self.log_test(f"GET /api{endpoint} - ETag revalidation", False, 0, f"Error: {e}")
+
+    def test_llm_metrics(self):
+        """Test the Prometheus scrape and the LLM usage rollup"""
+        print("\n📈 Testing LLM Metrics...")
+
+        try:
+            response = requests.get(f"{self.base_url}/metrics", timeout=30)
+            success = (
+                response.status_code == 200 and
+                response.headers.get('Content-Type', '').startswith('text/plain') and
+                '# TYPE llm_requests_total counter' in response.text and
+                '# TYPE llm_request_duration_seconds histogram' in response.text
+            )
+            self.log_test("GET /api/metrics - Prometheus format", success, response.status_code)
+        except Exception as e:
+            self.log_test("GET /api/metrics - Prometheus format", False, 0, f"Error: {e}")
+
+        success, status, data = self.make_request('GET', '/admin/llm-usage')
+        success = success and 'routes' in data and 'contractors' in data.get('rollup', {})
+        self.log_test("GET /api/admin/llm-usage", success, status,
+                      f"Routes: {list(data.get('routes', {}))}" if success else str(data))
+
+    def test_llm_resilience(self):
+        """Test the LLM deadline, retry, hedging and circuit breaker stats"""
+        print("\n🛡️ Testing LLM Resilience...")
+
+        success, status, data = self.make_request('GET', '/admin/llm-resilience')
+        breaker = data.get('breaker', {}) if success else {}
+        success = success and breaker.get('state') in ('closed', 'open', 'half_open') and 'chat' in data.get('deadlines_seconds', {})
+        self.log_test("GET /api/admin/llm-resilience", success, status,
+                      f"Breaker: {breaker.get('state')}" if success else str(data))
+
     def test_social_accounts_endpoints(self):
         """Test social media account management endpoints"""
         print("\n🔗 Testing Social Accounts Endpoints...")
@@ -436,6 +544,10 @@ class ICFHubAPITester:
         # Keep basic schedule and analytics tests for integration
         self.test_schedule_endpoints()
         self.test_analytics_endpoint()
+        self.test_sparse_fieldsets()
+        self.test_conditional_get()
+        self.test_llm_metrics()
+        self.test_llm_resilience()
         
         # Print summary
         print("\n" + "=" * 60)
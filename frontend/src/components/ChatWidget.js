@@ -1,7 +1,7 @@
 import { useState, useRef, useEffect } from "react";
 import { MessageCircle, X, Send, Loader2 } from "lucide-react";
 import { Button } from "@/components/ui/button";
-import axios from "axios";
+import { streamChat } from "@/lib/sse";
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -26,14 +26,25 @@ export default function ChatWidget() {
     setMessages(prev => [...prev, { role: "user", content: userMsg }]);
     setLoading(true);
 
+    // The reply bubble appears with the first streamed chunk and grows in place
+    let streaming = false;
+    const showReply = (content, append = false) => setMessages(prev => {
+      if (!streaming) {
+        streaming = true;
+        return [...prev, { role: "assistant", content }];
+      }
+      const last = prev[prev.length - 1];
+      return [...prev.slice(0, -1), { ...last, content: append ? last.content + content : content }];
+    });
+
     try {
-      const { data } = await axios.post(`${API}/chat`, {
+      const data = await streamChat(`${API}/chat/stream`, {
         message: userMsg,
         session_id: sessionId
-      });
-      setMessages(prev => [...prev, { role: "assistant", content: data.response }]);
+      }, { onDelta: (text) => showReply(text, true) });
+      showReply(data.response);
     } catch {
-      setMessages(prev => [...prev, { role: "assistant", content: "Sorry, I'm having trouble connecting. Please try again in a moment." }]);
+      showReply("Sorry, I'm having trouble connecting. Please try again in a moment.");
     } finally {
       setLoading(false);
     }
@@ -86,7 +97,7 @@ export default function ChatWidget() {
                 </div>
               </div>
             ))}
-            {loading && (
+            {loading && messages[messages.length - 1]?.role === "user" && (
               <div className="flex justify-start">
                 <div className="bg-muted px-4 py-3 rounded-sm rounded-bl-none flex gap-1.5">
                   <div className="w-2 h-2 bg-foreground/40 rounded-full typing-dot" />
@@ -0,0 +1,51 @@
+// POST `body` to an SSE endpoint and call onEvent(event, payload) for each
+// event. Resolves with the "done" payload and rejects on an "error" event or
+// a stream that ends early.
+export async function streamEvents(url, body, { onEvent, headers } = {}) {
+  const res = await fetch(url, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Accept: "text/event-stream", ...headers },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok || !res.body) throw new Error(`Stream request failed (${res.status})`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let result = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (!data) continue; // heartbeat comment
+      const payload = JSON.parse(data);
+      if (event === "error") throw new Error(payload.detail);
+      if (event === "done") result = payload;
+      onEvent?.(event, payload);
+    }
+  }
+
+  if (!result) throw new Error("Stream ended before the reply was complete");
+  return result;
+}
+
+// POST a chat message to an SSE endpoint, calling onDelta with each chunk of
+// the reply. Resolves with the "done" payload (same shape as the non-streaming
+// endpoint).
+export function streamChat(url, body, { onDelta } = {}) {
+  return streamEvents(url, body, {
+    onEvent: (event, payload) => { if (event === "delta") onDelta?.(payload.text); },
+  });
+}
@@ -69,20 +69,51 @@ export default function CampaignManager() {
     } finally { setCreating(false); }
   };
 
+  const waitForGeneration = async (campaignId) => {
+    // Generation runs as a background job; poll until it finishes
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const { data } = await axios.get(`${API}/campaigns/${campaignId}/generation`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (data.state === "succeeded") return data;
+      if (data.state === "failed") throw new Error(data.error || "Generation failed");
+      if (data.state === "cancelled") throw new Error("Generation was cancelled");
+    }
+  };
+
   const generateContent = async (campaignId) => {
     setGenerating(campaignId);
     try {
-      const { data } = await axios.post(`${API}/campaigns/${campaignId}/generate`, {}, {
+      await axios.post(`${API}/campaigns/${campaignId}/generate`, {}, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      await waitForGeneration(campaignId);
+      const { data } = await axios.get(`${API}/campaigns/${campaignId}`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       setCampaigns(prev => prev.map(c => c.id === campaignId ? data : c));
       setExpandedCampaign(campaignId);
       toast.success("Campaign content generated by AI!");
     } catch (err) {
-      toast.error(err.response?.data?.detail || "Generation failed");
+      toast.error(err.response?.data?.detail || err.message || "Generation failed");
     } finally { setGenerating(null); }
   };
 
+  const toggleCampaign = async (campaign) => {
+    if (expandedCampaign === campaign.id) { setExpandedCampaign(null); return; }
+    if (!campaign.ai_content) {
+      // The list only carries a summary; fetch the generated calendar on first expand
+      try {
+        const { data } = await axios.get(`${API}/campaigns/${campaign.id}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        setCampaigns(prev => prev.map(c => c.id === campaign.id ? data : c));
+      } catch { toast.error("Failed to load campaign content"); return; }
+    }
+    setExpandedCampaign(campaign.id);
+  };
+
   const deleteCampaign = async (id) => {
     try {
       await axios.delete(`${API}/campaigns/${id}`, {
@@ -267,11 +298,11 @@ export default function CampaignManager() {
                           GENERATE
                         </Button>
                       )}
-                      {campaign.ai_content && (
+                      {(campaign.has_content || campaign.ai_content) && (
                         <Button
                           variant="outline"
                           size="sm"
-                          onClick={() => setExpandedCampaign(expandedCampaign === campaign.id ? null : campaign.id)}
+                          onClick={() => toggleCampaign(campaign)}
                           className="rounded-sm text-xs tracking-widest uppercase"
                         >
                           {expandedCampaign === campaign.id ? <ChevronUp className="w-3 h-3 mr-1" /> : <ChevronDown className="w-3 h-3 mr-1" />}
@@ -9,6 +9,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@
 import { toast } from "sonner";
 import { Sparkles, Copy, Trash2, Loader2, Facebook, Linkedin, Twitter, Instagram, Video, RefreshCw, Calendar, Clock } from "lucide-react";
 import axios from "axios";
+import { streamEvents } from "@/lib/sse";
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -67,19 +68,37 @@ export default function ContentGenerator() {
     setGenerating(true);
     setCurrentResult(null);
     try {
-      const { data } = await axios.post(`${API}/content/generate`, form, {
+      // Posts show up one by one as the model finishes writing each of them
+      const data = await streamEvents(`${API}/content/generate/stream`, form, {
         headers: { Authorization: `Bearer ${token}` },
+        onEvent: (event, payload) => {
+          if (event === "start") setCurrentResult({ ...form, id: payload.id, items: [] });
+          if (event === "item") setCurrentResult(prev => prev && { ...prev, items: [...prev.items, payload.item] });
+        },
       });
       setCurrentResult(data);
       setSavedContent(prev => [data, ...prev]);
-      toast.success(`${form.count} posts generated for ${form.platform}!`);
+      if (data.partial) toast.warning(`Generation was cut off; kept ${data.items.length} posts`);
+      else toast.success(`${data.items.length} posts generated for ${form.platform}!`);
     } catch (err) {
-      toast.error(err.response?.data?.detail || "Generation failed");
+      toast.error(err.message || "Generation failed");
     } finally {
       setGenerating(false);
     }
   };
 
+  const viewContent = async (batch) => {
+    if (batch.items) { setCurrentResult(batch); return; }
+    try {
+      const { data } = await axios.get(`${API}/content/${batch.id}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setCurrentResult(data);
+    } catch {
+      toast.error("Failed to load content");
+    }
+  };
+
   const deleteContent = async (id) => {
     try {
       await axios.delete(`${API}/content/${id}`, {
@@ -294,17 +313,17 @@ export default function ContentGenerator() {
                           <div className="flex items-center gap-2">
                             <Badge variant="outline" className="rounded-sm text-[10px] tracking-wider uppercase">{batch.platform}</Badge>
                             <Badge variant="outline" className="rounded-sm text-[10px] tracking-wider uppercase">{batch.content_type}</Badge>
-                            <span className="mono-label text-[9px]">{batch.items?.length || 0} posts</span>
+                            <span className="mono-label text-[9px]">{batch.item_count ?? batch.items?.length ?? 0} posts</span>
                           </div>
                           <div className="flex items-center gap-2">
-                            <button onClick={() => setCurrentResult(batch)} className="text-xs text-primary hover:underline">View</button>
+                            <button onClick={() => viewContent(batch)} className="text-xs text-primary hover:underline">View</button>
                             <button onClick={() => deleteContent(batch.id)} className="p-1 hover:bg-muted rounded-sm">
                               <Trash2 className="w-3 h-3 text-muted-foreground" />
                             </button>
                           </div>
                         </div>
                         <p className="text-xs text-muted-foreground truncate">
-                          {batch.items?.[0]?.text?.slice(0, 120) || "Generated content"}...
+                          {batch.preview || batch.items?.[0]?.text?.slice(0, 120) || "Generated content"}...
                         </p>
                         <span className="mono-label text-[9px] mt-1 block">{new Date(batch.created_at).toLocaleDateString()}</span>
                       </div>
@@ -10,6 +10,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@
 import { toast } from "sonner";
 import { LogOut, User, FileText, Loader2, Mail, Phone, MapPin, Save, Sparkles, Zap, ArrowRight, Bell, Calendar, BarChart3, CheckCircle, Link2 } from "lucide-react";
 import axios from "axios";
+import { streamEvents } from "@/lib/sse";
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -21,6 +22,7 @@ export default function ContractorDashboard() {
   const [saving, setSaving] = useState(false);
   const [profileForm, setProfileForm] = useState({});
   const [scoringLead, setScoringLead] = useState(null);
+  const [batchScoring, setBatchScoring] = useState(null);
   const [notifications, setNotifications] = useState([]);
   const token = localStorage.getItem("icf_token");
 
@@ -29,7 +31,7 @@ export default function ContractorDashboard() {
     const headers = { Authorization: `Bearer ${token}` };
     Promise.all([
       axios.get(`${API}/contractors/me/profile`, { headers }),
-      axios.get(`${API}/leads`, { headers }),
+      axios.get(`${API}/leads`, { headers, params: { fields: "summary,ai_score" } }),
       axios.get(`${API}/notifications`, { headers })
     ]).then(([profileRes, leadsRes, notifRes]) => {
       setContractor(profileRes.data);
@@ -113,6 +115,26 @@ export default function ContractorDashboard() {
     } finally { setScoringLead(null); }
   };
 
+  const scoreAllLeads = async () => {
+    setBatchScoring({ completed: 0, to_score: 0 });
+    try {
+      // Leads whose details haven't changed since their last score are skipped server-side
+      const summary = await streamEvents(`${API}/leads/score-batch`, { lead_ids: leads.map(l => l.id) }, {
+        headers: { Authorization: `Bearer ${token}` },
+        onEvent: (event, payload) => {
+          if (event === "start") setBatchScoring({ completed: 0, to_score: payload.to_score });
+          if (event === "progress") {
+            setBatchScoring(prev => ({ ...prev, completed: payload.completed }));
+            if (payload.ai_score) setLeads(prev => prev.map(l => l.id === payload.lead_id ? { ...l, ai_score: payload.ai_score } : l));
+          }
+        },
+      });
+      toast.success(`Scored ${summary.scored} leads (${summary.skipped} unchanged)`);
+    } catch {
+      toast.error("Failed to score leads");
+    } finally { setBatchScoring(null); }
+  };
+
   if (loading) {
     return (
       <div className="pt-16 min-h-screen flex items-center justify-center">
@@ -207,6 +229,21 @@ export default function ContractorDashboard() {
           </TabsList>
 
           <TabsContent value="leads">
+            {leads.length > 0 && (
+              <div className="flex justify-end mb-3">
+                <Button
+                  data-testid="lead-score-all-btn"
+                  variant="outline"
+                  size="sm"
+                  onClick={scoreAllLeads}
+                  disabled={batchScoring !== null}
+                  className="rounded-sm text-xs tracking-widest uppercase"
+                >
+                  {batchScoring ? <Loader2 className="w-3 h-3 animate-spin mr-1" /> : <Sparkles className="w-3 h-3 mr-1" />}
+                  {batchScoring ? `SCORING ${batchScoring.completed}/${batchScoring.to_score}` : "AI SCORE ALL"}
+                </Button>
+              </div>
+            )}
             {leads.length === 0 ? (
               <div className="bg-card border border-dashed border-border rounded-sm p-12 text-center">
                 <FileText className="w-10 h-10 text-muted-foreground/30 mx-auto mb-4" />
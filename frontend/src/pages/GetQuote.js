@@ -7,6 +7,7 @@ import axios from "axios";
 import { v4 as uuidv4 } from 'uuid';
 
 import HomeownerUpgrade from "@/components/HomeownerUpgrade";
+import { streamChat } from "@/lib/sse";
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 export default function GetQuote() {
@@ -100,7 +101,7 @@ export default function GetQuote() {
   // Speak AI messages when they arrive
   useEffect(() => {
     const lastMsg = messages[messages.length - 1];
-    if (lastMsg?.role === "assistant" && !loading) {
+    if (lastMsg?.role === "assistant" && !lastMsg.streaming && !loading) {
       speak(lastMsg.content);
     }
   }, [messages, voiceEnabled]);
@@ -131,21 +132,34 @@ export default function GetQuote() {
     setInput("");
     setLoading(true);
 
+    let streaming = false;
     try {
-      const res = await axios.post(`${API}/intake/chat`, {
+      const data = await streamChat(`${API}/intake/chat/stream`, {
         session_id: sessionId,
         message: userMsg
+      }, {
+        onDelta: (text) => {
+          if (!streaming) {
+            streaming = true;
+            setMessages(p => [...p, { role: "assistant", content: text, streaming: true }]);
+          } else {
+            setMessages(p => [...p.slice(0, -1), { ...p[p.length - 1], content: p[p.length - 1].content + text }]);
+          }
+        }
       });
 
-      const aiResponse = res.data.response;
-      setMessages(p => [...p, { role: "assistant", content: aiResponse }]);
+      // Swap in the final text; dropping the streaming flag lets voice playback read it once
+      const final = { role: "assistant", content: data.response };
+      setMessages(p => streaming ? [...p.slice(0, -1), final] : [...p, final]);
       
-      if (res.data.is_complete) {
+      if (data.is_complete) {
         setComplete(true);
-        setSummary(res.data.summary || "");
+        setSummary(data.summary || "");
         toast.success("Intake complete! Matching you with pros now...");
       }
     } catch (err) {
+      // Drop a half-streamed reply; it was never saved
+      if (streaming) setMessages(p => p.filter(m => !m.streaming));
       toast.error("Something went wrong. Please try again.");
     } finally {
       setLoading(false);
@@ -306,7 +320,7 @@ export default function GetQuote() {
               </div>
             </div>
           ))}
-          {(loading || uploading) && (
+          {((loading && !messages[messages.length - 1]?.streaming) || uploading) && (
             <div className="flex justify-start" data-testid="chat-loading-row">
               <div className="bg-muted px-4 py-3 rounded-2xl rounded-tl-none flex items-center gap-1.5 shadow-sm" data-testid="chat-loading-indicator">
                 {uploading ? (
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Load test for ICF Hub's AI routes.
+
+Runs --users virtual users for --duration seconds. Each user repeatedly picks
+a scenario (advisor chat, streamed chat, homeowner intake through to lead
+creation, content batches, campaign generation jobs, lead creation and
+scoring, outreach messages, dashboard reads) by --mix weight. The report has
+throughput, error rate and p50/p95/p99 latency per route, followed by the
+server's own view: LLM requests per route from /admin/llm-usage, governor
+queue waits from /admin/llm-governor and timeouts, retries, hedges and
+circuit breaker state from /admin/llm-resilience.
+
+Everything runs on one Linux box against the fake LLM provider and a local
+mongod:
+
+    mkdir -p /tmp/icf-load && mongod --dbpath /tmp/icf-load --fork --logpath /tmp/icf-load/mongod.log
+    python load_test.py --serve --users 50 --duration 120
+
+--serve starts the backend (uvicorn server:app in backend/) with
+LLM_PROVIDER=fake, MONGO_URL=mongodb://localhost:27017 and a fresh DB_NAME,
+and stops it afterwards. Without it, point --base-url at a backend started
+with LLM_PROVIDER=fake. The fake's latency and failure rates come from the
+FAKE_LLM_* variables in backend/fake_llm_helper.py, which --serve passes
+through, e.g. FAKE_LLM_TTFT_MS=1500 FAKE_LLM_ERROR_RATE=0.05. The LLM_*
+resilience settings (backend/resilience_helper.py) pass through the same
+way, e.g. FAKE_LLM_HANG_RATE=0.02 LLM_HEDGE=1 LLM_DEADLINES=chat=10.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from backend_test import ICFHubAPITester
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+
+DEFAULT_MIX = "chat=25,chat_stream=10,intake=10,content=10,campaign=5,score=15,message=10,reads=15"
+
+FAQ = [
+    "What is ICF construction?",
+    "How much more does an ICF home cost?",
+    "Are ICF homes energy efficient?",
+    "Can ICF walls survive a tornado?",
+    "How long does it take to build an ICF house?",
+]
+INTAKE_TURNS = [
+    "Hi, I'm Sam and I'm building in Tulsa, OK",
+    "You can reach me at sam@example.com",
+    "No plans yet, just a rough idea",
+    "How much more does ICF cost than wood framing?",
+    "Please match me with a contractor",
+]
+PLATFORMS = ["facebook", "instagram", "linkedin", "x", "tiktok"]
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse "chat=25,content=10,..." into scenario weights."""
+    mix = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, weight = part.split("=", 1)
+            if name.strip() not in SCENARIOS:
+                raise ValueError(f"Unknown scenario: {name.strip()} (expected one of {', '.join(SCENARIOS)})")
+            mix[name.strip()] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class LoadTester:
+    def __init__(self, base_url: str, client: httpx.AsyncClient):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.samples = {}  # route -> [(ms, ok)]
+        self.tokens = []
+        self.rng = random.Random()
+
+    def record(self, route: str, ms: float, ok: bool):
+        self.samples.setdefault(route, []).append((ms, ok))
+
+    async def request(self, route: str, method: str, path: str, token: str = None, expected=(200,), **kwargs):
+        """Send one request and record it under `route`; returns the JSON body, or None on failure."""
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+            ok = response.status_code in expected
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.record(route, (time.perf_counter() - started) * 1000, ok)
+        if not ok:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    async def stream(self, route: str, path: str, body: dict, token: str = None):
+        """POST to an SSE endpoint; records time to first delta and to "done" (an "error" event fails it)."""
+        headers = {"Accept": "text/event-stream", **({"Authorization": f"Bearer {token}"} if token else {})}
+        started = time.perf_counter()
+        first = None
+        event = None
+        ok = False
+        try:
+            async with self.client.stream("POST", f"{self.base_url}{path}", json=body, headers=headers) as response:
+                if response.status_code == 200:
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: "):
+                            event = line[7:]
+                            if event in ("delta", "item") and first is None:
+                                first = time.perf_counter()
+                            elif event in ("done", "error"):
+                                ok = event == "done"
+        except httpx.HTTPError:
+            ok = False
+        if first is not None:
+            self.record(f"{route} (first delta)", (first - started) * 1000, True)
+        self.record(route, (time.perf_counter() - started) * 1000, ok)
+
+    # ── Setup ──
+
+    async def register_contractors(self, count: int):
+        # Same registration as backend_test.py, run off the event loop since it uses requests
+        for _ in range(count):
+            tester = ICFHubAPITester(self.base_url)
+            success, _, _ = await asyncio.to_thread(tester.register_contractor, f"load_{uuid.uuid4().hex[:8]}")
+            if success:
+                self.tokens.append(tester.token)
+        if not self.tokens:
+            raise SystemExit("Could not register any contractors; is the backend up?")
+
+    # ── Scenarios ──
+
+    async def chat(self, token: str):
+        # Repeated FAQs exercise the answer cache and first-turn coalescing
+        question = self.rng.choice(FAQ) if self.rng.random() < 0.5 else f"{self.rng.choice(FAQ)} (ref {uuid.uuid4().hex[:6]})"
+        session_id = str(uuid.uuid4())
+        await self.request("chat", "POST", "/chat", json={"message": question, "session_id": session_id})
+        if self.rng.random() < 0.5:
+            await self.request("chat", "POST", "/chat", json={"message": "And what about insurance?",
+                                                              "session_id": session_id})
+
+    async def chat_stream(self, token: str):
+        await self.stream("chat_stream", "/chat/stream", {
+            "message": f"{self.rng.choice(FAQ)} (ref {uuid.uuid4().hex[:6]})", "session_id": str(uuid.uuid4()),
+        })
+
+    async def intake(self, token: str):
+        session_id = str(uuid.uuid4())
+        for message in INTAKE_TURNS:
+            data = await self.request("intake_chat", "POST", "/intake/chat",
+                                      json={"message": message, "session_id": session_id})
+            if not data or data.get("is_complete"):
+                return
+
+    async def content(self, token: str):
+        await self.request("content_generate", "POST", "/content/generate", token, json={
+            "platform": self.rng.choice(PLATFORMS), "content_type": "educational",
+            "topic": "storm resistant homes", "count": self.rng.randint(2, 5),
+        })
+
+    async def campaign(self, token: str):
+        campaign = await self.request("campaign_create", "POST", "/campaigns", token, json={
+            "name": f"Load test {uuid.uuid4().hex[:6]}", "goal": "Generate new home leads",
+            "platforms": self.rng.sample(PLATFORMS, 2), "target_audience": "Families planning a new home",
+            "duration_days": self.rng.choice([7, 14, 30]),
+        })
+        if not campaign:
+            return
+        started = time.perf_counter()
+        job = await self.request("campaign_generate", "POST", f"/campaigns/{campaign['id']}/generate", token,
+                                 expected=(202,))
+        # End to end: queued until the worker finishes the job
+        while job and job.get("state") in ("queued", "running"):
+            await asyncio.sleep(1)
+            job = await self.request("campaign_poll", "GET", f"/campaigns/{campaign['id']}/generation", token)
+        self.record("campaign_job", (time.perf_counter() - started) * 1000, bool(job) and job.get("state") == "succeeded")
+
+    async def score(self, token: str):
+        lead = await self.request("lead_create", "POST", "/leads", json={
+            "name": f"Lead {uuid.uuid4().hex[:6]}", "email": "lead@example.com", "phone": "555-0100",
+            "city": "Tulsa", "state": "OK", "project_type": self.rng.choice(["new_home", "addition", "basement"]),
+            "project_size": self.rng.choice(["1000_2000_sqft", "2000_3000_sqft", "3000_plus_sqft"]),
+            "budget_range": self.rng.choice(["200k_300k", "300k_500k", "500k_plus"]),
+            "timeline": self.rng.choice(["asap", "3_6_months", "6_12_months"]),
+            "description": "Two story home with a walkout basement; energy efficiency matters most.",
+        })
+        if lead:
+            await self.request("lead_score", "POST", f"/leads/{lead['id']}/score", token)
+
+    async def message(self, token: str):
+        await self.request("message_generate", "POST", "/content/generate-message", json={
+            "recipient_name": "Jane Doe", "topic": "Following up on your ICF quote",
+            "key_points": ["site visit this week", "energy savings"], "type": self.rng.choice(["email", "sms"]),
+        })
+
+    async def reads(self, token: str):
+        await self.request("leads_list", "GET", "/leads", token, params={"limit": 20})
+        await self.request("analytics", "GET", "/analytics", token)
+
+    # ── Run ──
+
+    async def user(self, mix: dict, deadline: float, think: float):
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)(self.rng.choice(self.tokens))
+            if think:
+                await asyncio.sleep(self.rng.uniform(0, 2 * think))
+
+    async def run(self, users: int, duration: float, mix: dict, think: float) -> float:
+        started = time.perf_counter()
+        await asyncio.gather(*(self.user(mix, started + duration, think) for _ in range(users)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float):
+        print(f"\n{'route':<28} {'count':>7} {'err%':>6} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for route in sorted(self.samples):
+            samples = self.samples[route]
+            ordered = sorted(ms for ms, _ in samples)
+            errors = sum(1 for _, ok in samples if not ok)
+            print(f"{route:<28} {len(samples):>7} {errors / len(samples) * 100:>5.1f}% {len(samples) / elapsed:>7.2f} "
+                  f"{percentile(ordered, 50):>7.0f}ms {percentile(ordered, 95):>7.0f}ms "
+                  f"{percentile(ordered, 99):>7.0f}ms {ordered[-1]:>7.0f}ms")
+
+    async def report_server(self):
+        usage = await self.request("admin", "GET", "/admin/llm-usage")
+        governor = await self.request("admin", "GET", "/admin/llm-governor")
+        resilience = await self.request("admin", "GET", "/admin/llm-resilience")
+        if usage:
+            print(f"\n{'LLM route':<18} {'model':<16} {'ok':>6} {'error':>6} {'cancel':>6} {'p50':>9} {'p95':>9} {'tokens':>9}")
+            for route, models in sorted(usage.get("routes", {}).items()):
+                for model, s in models.items():
+                    r, latency = s["requests"], s["latency"]
+                    print(f"{route:<18} {model:<16} {r['ok']:>6} {r['error']:>6} {r['cancelled']:>6} "
+                          f"{latency['p50_ms']:>7.0f}ms {latency['p95_ms']:>7.0f}ms "
+                          f"{s['prompt_tokens'] + s['completion_tokens']:>9}")
+            if usage.get("shared"):
+                print(f"shared (coalesced) calls: {usage['shared']}")
+        if governor:
+            waits = {name: c["wait"]["p95_ms"] for name, c in governor["classes"].items()}
+            expired = {name: c["expired"] for name, c in governor["classes"].items()}
+            print(f"governor limit {governor['limit']}: p95 queue wait {waits}, expired {expired}")
+        if resilience:
+            breaker = resilience["breaker"]
+            print(f"timeouts {resilience['timeouts']}, retries {resilience['retries']}, "
+                  f"hedged {resilience['hedged']} (won {resilience['hedge_wins']}); breaker {breaker['state']}, "
+                  f"opened {breaker['opened']}x, rejected {breaker['rejected']}")
+
+
+async def serve(port: int) -> asyncio.subprocess.Process:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "fake",
+        "EMERGENT_LLM_KEY": os.environ.get("EMERGENT_LLM_KEY", "fake"),
+        "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:27017"),
+        "DB_NAME": f"icf_load_{int(time.time())}",
+    }
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+        "--log-level", "warning", cwd=BACKEND_DIR, env=env
+    )
+    async with httpx.AsyncClient() as client:
+        for _ in range(60):
+            if process.returncode is not None:
+                raise SystemExit("Backend exited during startup")
+            try:
+                await client.get(f"http://127.0.0.1:{port}/api/stats")
+                print(f"Backend up on port {port} (DB {env['DB_NAME']}, fake LLM)")
+                return process
+            except httpx.HTTPError:
+                await asyncio.sleep(0.5)
+    process.terminate()
+    raise SystemExit("Backend didn't start within 30s")
+
+
+async def main(args):
+    mix = parse_mix(args.mix)
+    process = await serve(args.port) if args.serve else None
+    base_url = f"http://127.0.0.1:{args.port}/api" if args.serve else args.base_url
+    try:
+        limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            tester = LoadTester(base_url, client)
+            await tester.register_contractors(args.contractors)
+            print(f"🧪 {args.users} users for {args.duration:.0f}s against {base_url}: {json.dumps(mix)}")
+            elapsed = await tester.run(args.users, args.duration, mix, args.think)
+            tester.report(elapsed)
+            await tester.report_server()
+    finally:
+        if process is not None:
+            process.terminate()
+            await process.wait()
+
+
+SCENARIOS = ("chat", "chat_stream", "intake", "content", "campaign", "score", "message", "reads")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001/api")
+    parser.add_argument("--serve", action="store_true", help="start a fake-LLM backend for the run")
+    parser.add_argument("--port", type=int, default=8011, help="port for --serve")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--contractors", type=int, default=5, help="contractor accounts the users share")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between scenarios, in seconds")
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,55 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from bulk_helper import stream_bulk_insert
+
+
+class Post(BaseModel):
+    text: str
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+
+
+def _chunks(body: bytes, size: int = 7):
+    async def gen():
+        gen.read = 0
+        for start in range(0, len(body), size):
+            gen.read += 1
+            yield body[start:start + size]
+    return gen
+
+
+def _run(body: bytes, **kwargs):
+    collection, chunks = FakeCollection(), _chunks(body)
+    created, errors = asyncio.run(stream_bulk_insert(collection, chunks(), Post, lambda post: post.model_dump(),
+                                                     **kwargs))
+    return created, errors, chunks.read
+
+
+def test_invalid_items_are_reported_individually():
+    created, errors, _ = _run(b'[{"text": "a"}, {"txt": 1}, {"text": "c"}]')
+    assert [doc["text"] for doc in created] == ["a", "c"]
+    assert [error["index"] for error in errors] == [1]
+
+
+def test_stops_reading_at_the_first_item_past_max_items():
+    body = b"[" + b",".join(b'{"text": "p"}' for _ in range(1000)) + b"]"
+    created, errors, read = _run(body, max_items=3)
+    assert len(created) == 3
+    assert len(errors) == 1 and errors[0]["index"] == 3
+    assert read < len(body) // 7 // 10
+
+
+def test_oversized_element_ends_the_batch():
+    body = b'[{"text": "ok"}, {"text": "' + b"x" * 500 + b'"}, {"text": "never"}]'
+    created, errors, read = _run(body, max_item_chars=100)
+    assert [doc["text"] for doc in created] == ["ok"]
+    assert len(errors) == 1 and "over 100 characters" in errors[0]["error"]
+    assert read < len(body) // 7
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from json_stream_helper import JsonStreamError, LlmJson, PartialReply, parse_llm_json, parse_llm_stream
+
+
+@pytest.mark.parametrize("reply, value", [
+    ('[{"a": 1}]', [{"a": 1}]),
+    ('```json\n[{"a": 1}]\n```', [{"a": 1}]),
+    ('Here you go:\n```json\n{"insights": "x"}\n```\nLet me know!', {"insights": "x"}),
+    ('Sure {not json} [{"a": 1}]', [{"a": 1}]),
+    ('Here you go: I {think}\n```json\n[{"a": 1}]\n```', [{"a": 1}]),
+    ('Use {name}, then:\n[{"a": 1}]', [{"a": 1}]),
+    ('{"insights": "x"} hope that {helps}', {"insights": "x"}),
+    ('[{"a": 1,}, {"b": 2},]', [{"a": 1}, {"b": 2}]),
+    ('{"text": "curly } and [ in a string"}', {"text": "curly } and [ in a string"}),
+])
+def test_parse_llm_json(reply, value):
+    parser = LlmJson()
+    parser.feed(reply)
+    assert parser.result() == value
+    assert not parser.repaired
+
+
+@pytest.mark.parametrize("reply, value", [
+    ('[{"text": "hello wor', [{"text": "hello wor"}]),
+    ('{"strategy": "Post da', {"strategy": "Post da"}),
+    ('[{"a": 1}, {"b": ', [{"a": 1}]),
+    ('[{"a": 1}, {"b": tru', [{"a": 1}]),
+    ('{"calendar": [{"day": 1}, {"day": 2, "post', {"calendar": [{"day": 1}, {"day": 2}]}),
+])
+def test_truncated_reply_is_repaired(reply, value):
+    parser = LlmJson()
+    parser.feed(reply)
+    assert parser.result() == value
+    assert parser.repaired
+
+
+@pytest.mark.parametrize("reply", [
+    "",
+    "No JSON here at all.",
+    "Sure {not json} and nothing else",
+    '{"a": tru',
+    '[',
+    '{"a": ',
+])
+def test_unrecoverable_reply_raises(reply):
+    with pytest.raises(JsonStreamError):
+        parse_llm_json(reply)
+
+
+def test_items_are_emitted_as_they_close():
+    parser = LlmJson(("content_calendar",))
+    reply = 'Plan {draft}:\n```json\n{"strategy": "s", "content_calendar": [{"day": 1}, {"day": 2}]}\n```'
+    items = []
+    for ch in reply:
+        items += parser.feed(ch)
+    assert items == [{"day": 1}, {"day": 2}]
+    assert parser.result()["strategy"] == "s"
+
+
+async def _deltas(chunks, error=None):
+    for chunk in chunks:
+        yield chunk
+    if error is not None:
+        raise error
+
+
+def test_parse_llm_stream_cut_off_is_partial():
+    with pytest.raises(PartialReply) as raised:
+        asyncio.run(parse_llm_stream(_deltas(['[{"a": 1}, ', '{"b": 2']), ()))
+    assert raised.value.value == [{"a": 1}, {"b": 2}]
+    assert isinstance(raised.value.__cause__, JsonStreamError)
+
+
+def test_parse_llm_stream_on_item_errors_propagate():
+    async def on_item(item):
+        raise KeyError("db down")
+
+    with pytest.raises(KeyError):
+        asyncio.run(parse_llm_stream(_deltas(['[{"a": 1}]']), (), on_item))
+
+
+def test_parse_llm_stream_without_json_returns_none():
+    assert asyncio.run(parse_llm_stream(_deltas(["I {think} so"]), ())) == (None, "I {think} so")
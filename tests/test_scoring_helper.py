@@ -0,0 +1,134 @@
+import math
+from datetime import date
+
+import pytest
+
+import scoring_helper
+from scoring_helper import parse_budget, parse_square_feet, parse_timeline_months, rule_scores
+
+
+class FixedDate(date):
+    @classmethod
+    def today(cls):
+        return cls(2026, 10, 17)
+
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(scoring_helper, "date", FixedDate)
+    parse_timeline_months.cache_clear()
+    yield
+    parse_timeline_months.cache_clear()
+
+
+@pytest.mark.parametrize("value, months", [
+    ("ASAP", 0.0),
+    ("right now", 0.0),
+    ("Immediately", 0.0),
+    ("urgent", 0.0),
+    ("now", 0.0),
+    ("It's urgent, we need to start now", 0.0),
+    ("not now, maybe next year", 12.0),
+    ("no rush, not urgent", 24.0),
+    ("not in a hurry but asap would be ideal", 0.0),
+    ("3-6 months", 3.0),
+    ("within 2 weeks", 2 / 4.345),
+    ("1-2 years", 12.0),
+    ("next few months", 3.0),
+    ("flexible", 24.0),
+    ("Spring 2027", 5.0),
+    ("March 2028", 17.0),
+    ("in 2026", 0.0),
+    ("2027", 3.0),
+])
+def test_parse_timeline_months(value, months):
+    assert parse_timeline_months(value) == pytest.approx(months)
+
+
+@pytest.mark.parametrize("value", ["I don't know", "not known yet", "", None, "unknown", "TBD", "whenever",
+                                   "not right now", "isn't urgent"])
+def test_parse_timeline_months_unknown(value):
+    assert math.isnan(parse_timeline_months(value))
+
+
+def test_parse_timeline_months_follows_the_calendar(monkeypatch):
+    assert parse_timeline_months("Spring 2027") == 5.0
+
+    class NextYear(date):
+        @classmethod
+        def today(cls):
+            return cls(2027, 2, 1)
+
+    monkeypatch.setattr(scoring_helper, "date", NextYear)
+    assert parse_timeline_months("Spring 2027") == 1.0
+
+
+@pytest.mark.parametrize("value, budget", [
+    ("300k_500k", (300_000, 500_000)),
+    ("300-500k", (300_000, 500_000)),
+    ("$1.2m", (1_200_000, 1_200_000)),
+    ("$2,025,000", (2_025_000, 2_025_000)),
+    ("under 400k", (200_000, 400_000)),
+    ("over 1m", (1_000_000, 1_500_000)),
+    ("2025 budget 300k", (300_000, 300_000)),
+])
+def test_parse_budget(value, budget):
+    assert parse_budget(value) == budget
+
+
+@pytest.mark.parametrize("value", ["2025", "n/a", "", None, "not sure", "500"])
+def test_parse_budget_unknown(value):
+    assert parse_budget(value) is None
+
+
+@pytest.mark.parametrize("value, sqft", [("2,500 sq ft", 2_500), ("2000", 2_000), ("1800-2200", 2_000), ("large", 3_500)])
+def test_parse_square_feet(value, sqft):
+    assert parse_square_feet(value) == sqft
+
+
+def test_parse_square_feet_unknown():
+    assert math.isnan(parse_square_feet("n/a"))
+
+
+def test_rule_scores_ranks_ready_buyers_first():
+    hot, cold = rule_scores([
+        {"budget_range": "750k_1m", "timeline": "ASAP", "project_type": "New custom home",
+         "project_size": "3,500 sq ft", "description": "4 bed 3 bath two story home on a 2 acre lot, plans drawn by "
+                                                        "our architect, permit in progress, want hurricane resistance"},
+        {"budget_range": "under 100k", "timeline": "just exploring", "project_type": "Garden wall",
+         "project_size": "", "description": ""},
+    ])
+    assert hot["score"] > cold["score"]
+    assert (hot["grade"], hot["urgency"]) == ("A", "high")
+    assert (cold["grade"], cold["urgency"]) == ("D", "low")
+    assert hot["recommended_action"] == scoring_helper.RECOMMENDED_ACTIONS["A"]
+    assert hot["estimated_value"] == "$750,000 - $1,000,000"
+    assert hot["method"] == "rules"
+    assert set(hot["factors"]) == set(scoring_helper.FACTORS)
+
+
+def test_rule_scores_unknown_fields_are_neutral():
+    [score] = rule_scores([{"budget_range": "n/a", "timeline": "I don't know", "project_type": "", "project_size": ""}])
+    neutral = scoring_helper.NEUTRAL_FACTOR
+    assert score["factors"] == {"budget": neutral, "timeline": neutral, "project_type": neutral,
+                                "project_size": neutral, "description": 0.0}
+    assert score["urgency"] == "medium"
+    assert score["estimated_value"] == "Unknown"
+
+
+def test_rule_scores_calendar_year_is_not_a_month_count():
+    [soon, later] = rule_scores([{"timeline": "Spring 2027"}, {"timeline": "2029"}])
+    assert soon["urgency"] == "medium"
+    assert later["urgency"] == "low"
+    assert soon["factors"]["timeline"] > later["factors"]["timeline"]
+
+
+def test_rule_scores_weights():
+    lead = {"budget_range": "1m", "timeline": "flexible", "project_type": "other", "project_size": "", "description": ""}
+    [budget_only] = rule_scores([lead], {"budget": 1.0, "timeline": 0.0, "project_type": 0.0,
+                                         "project_size": 0.0, "description": 0.0})
+    assert budget_only["score"] == 100
+
+
+def test_rule_scores_empty():
+    assert rule_scores([]) == []